@@ -1,17 +1,7 @@
-import { NextResponse } from "next/server";
+import { proxyToPython } from "@/lib/pyProxy";
 
 export async function POST(req: Request) {
-  const body = await req.json();
-
-  // Local python service
-  const pyUrl = process.env.PY_URL || "http://127.0.0.1:8000/analyze";
-
-  const resp = await fetch(pyUrl, {
-    method: "POST",
-    headers: { "content-type": "application/json" },
-    body: JSON.stringify(body)
-  });
-
-  const data = await resp.json();
-  return NextResponse.json(data, { status: resp.status });
+  // ?stream=1: NDJSON stage events, passed through as they arrive
+  const stream = new URL(req.url).searchParams.get("stream") === "1";
+  return proxyToPython(req, stream ? "/analyze/stream" : "/analyze");
 }
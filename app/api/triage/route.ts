@@ -0,0 +1,6 @@
+import { proxyToPython } from "@/lib/pyProxy";
+
+export async function POST(req: Request) {
+  // NDJSON stage and draft events, passed through as they arrive
+  return proxyToPython(req, "/triage");
+}
@@ -2,6 +2,7 @@
 
 import { useMemo, useState } from "react";
 import { PRESETS, buildPayload, type PresetKey } from "@/lib/schemas";
+import { filterEntities } from "@/lib/scores";
 
 const SAMPLES: Record<PresetKey, string[]> = {
   saas_support: [
@@ -32,11 +33,101 @@ const SAMPLES: Record<PresetKey, string[]> = {
 
 type Mode = "manual" | "agent";
 
-function shouldAutoDraft(routing: { priority?: string } | null): boolean {
-  const p = (routing?.priority || "").toUpperCase();
-  return p === "P0" || p === "P1";
+// Stage events from /analyze/stream (NDJSON): severity, intent, routing, entities, entity_scores, ticket_fields, done.
+// /triage adds draft_started (at routing), then draft or draft_error after done.
+const STREAM_STAGES = new Set(["severity", "intent", "routing", "entities", "ticket_fields"]);
+const DRAFT_EVENTS = new Set(["draft_started", "draft", "draft_error"]);
+
+async function readTriageStream(
+  body: ReadableStream<Uint8Array>,
+  onUpdate: (partial: any) => void,
+  onDraft?: (evt: { event: string; data: any }) => void
+): Promise<any> {
+  const reader = body.getReader();
+  const decoder = new TextDecoder();
+  let buffered = "";
+  let result: any = {};
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffered += decoder.decode(value, { stream: true });
+    let nl: number;
+    while ((nl = buffered.indexOf("\n")) >= 0) {
+      const line = buffered.slice(0, nl).trim();
+      buffered = buffered.slice(nl + 1);
+      if (!line) continue;
+      const evt = JSON.parse(line);
+      if (evt.event === "error") throw new Error(evt.data?.detail || "Request failed");
+      if (evt.event === "done") {
+        result = { preset: evt.data.preset, ...result, timings_ms: evt.data.timings_ms };
+      } else if (evt.event === "entity_scores") {
+        result = { ...result, ...evt.data };
+      } else if (DRAFT_EVENTS.has(evt.event)) {
+        onDraft?.(evt);
+        continue;
+      } else if (STREAM_STAGES.has(evt.event)) {
+        result = { ...result, [evt.event]: evt.data };
+      }
+      onUpdate(result);
+    }
+  }
+  return result;
+}
+
+type DraftResult = {
+  draft: string;
+  tokens_in: number;
+  tokens_out: number;
+  latency_ms: number;
+  ttft_ms?: number | null;
+  cached?: boolean;
+  context_used?: boolean;
+  context_preview?: string | null;
+  context_queue?: string | null;
+};
+
+// Events from /draft/stream (NDJSON): context, token (one per delta), done (usage, latency_ms, ttft_ms).
+async function readDraftStream(body: ReadableStream<Uint8Array>, onUpdate: (partial: DraftResult) => void): Promise<DraftResult> {
+  const reader = body.getReader();
+  const decoder = new TextDecoder();
+  let buffered = "";
+  let result: DraftResult = { draft: "", tokens_in: 0, tokens_out: 0, latency_ms: 0 };
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffered += decoder.decode(value, { stream: true });
+    let nl: number;
+    while ((nl = buffered.indexOf("\n")) >= 0) {
+      const line = buffered.slice(0, nl).trim();
+      buffered = buffered.slice(nl + 1);
+      if (!line) continue;
+      const evt = JSON.parse(line);
+      if (evt.event === "error") throw new Error(evt.data?.detail || "Draft request failed");
+      if (evt.event === "context") result = { ...result, ...evt.data };
+      else if (evt.event === "token") result = { ...result, draft: result.draft + evt.data };
+      else if (evt.event === "done") result = { ...result, draft: result.draft.trim(), ...evt.data };
+      onUpdate(result);
+    }
+  }
+  return result;
 }
 
+async function streamDraft(text: string, triage: any, onUpdate: (partial: DraftResult) => void): Promise<DraftResult> {
+  const resp = await fetch("/api/draft?stream=1", {
+    method: "POST",
+    headers: { "content-type": "application/json" },
+    body: JSON.stringify({ text, triage }),
+  });
+  if (!resp.ok || !resp.body) {
+    const errData = await resp.json().catch(() => null);
+    throw new Error(errData?.detail || "Draft request failed");
+  }
+  return readDraftStream(resp.body, onUpdate);
+}
+
+// Agent mode auto-drafts high-severity tickets only
+const AUTO_DRAFT_PRIORITIES = ["P0", "P1"];
+
 export default function Page() {
   const [mode, setMode] = useState<Mode>("manual");
   const [preset, setPreset] = useState<PresetKey>("saas_support");
@@ -46,19 +137,20 @@ export default function Page() {
   const [out, setOut] = useState<any>(null);
   const [err, setErr] = useState<string | null>(null);
   const [draftLoading, setDraftLoading] = useState(false);
-  const [draftResult, setDraftResult] = useState<{
-    draft: string;
-    tokens_in: number;
-    tokens_out: number;
-    latency_ms: number;
-    context_used?: boolean;
-    context_preview?: string | null;
-    context_queue?: string | null;
-  } | null>(null);
+  const [draftResult, setDraftResult] = useState<DraftResult | null>(null);
   const [draftErr, setDraftErr] = useState<string | null>(null);
 
   const sampleOptions = useMemo(() => SAMPLES[preset], [preset]);
 
+  // Threshold changes re-filter the raw entity scores locally; below score_floor the spans were never returned.
+  const belowFloor = out?.score_floor != null && threshold < out.score_floor;
+  const shown = useMemo(() => {
+    if (!out) return null;
+    const { entity_scores, score_floor, ...rest } = out;
+    if (!entity_scores || belowFloor) return rest;
+    return { ...rest, entities: filterEntities(entity_scores, threshold) };
+  }, [out, threshold, belowFloor]);
+
   async function analyze() {
     setLoading(true);
     setErr(null);
@@ -67,38 +159,36 @@ export default function Page() {
     setDraftErr(null);
 
     try {
-      const payload = buildPayload(preset, text, threshold);
-      const resp = await fetch("/api/analyze", {
+      // Agent mode: one /triage call starts the P0/P1 draft as soon as routing is known
+      const payload = {
+        ...buildPayload(preset, text, threshold),
+        rawScores: true,
+        ...(mode === "agent" ? { draftPriorities: AUTO_DRAFT_PRIORITIES } : {})
+      };
+      const resp = await fetch(mode === "agent" ? "/api/triage" : "/api/analyze?stream=1", {
         method: "POST",
         headers: { "content-type": "application/json" },
         body: JSON.stringify(payload)
       });
 
-      const data = await resp.json();
-      if (!resp.ok) throw new Error(data?.detail || "Request failed");
-      setOut(data);
-
-      if (mode === "agent" && shouldAutoDraft(data?.routing)) {
-        setDraftLoading(true);
-        try {
-          const draftResp = await fetch("/api/draft", {
-            method: "POST",
-            headers: { "content-type": "application/json" },
-            body: JSON.stringify({ text: text.trim(), triage: data }),
-          });
-          const draftData = await draftResp.json();
-          if (!draftResp.ok) throw new Error(draftData?.detail || "Draft request failed");
-          setDraftResult(draftData);
-        } catch (e: any) {
-          setDraftErr(e?.message || "Unknown error");
-        } finally {
+      if (!resp.ok || !resp.body) {
+        const errData = await resp.json().catch(() => null);
+        throw new Error(errData?.detail || "Request failed");
+      }
+      await readTriageStream(resp.body, setOut, (evt) => {
+        if (evt.event === "draft_started") {
+          setDraftLoading(true);
+        } else {
           setDraftLoading(false);
+          if (evt.event === "draft") setDraftResult(evt.data);
+          else setDraftErr(evt.data?.detail || "Draft request failed");
         }
-      }
+      });
     } catch (e: any) {
       setErr(e?.message || "Unknown error");
     } finally {
       setLoading(false);
+      setDraftLoading(false);
     }
   }
 
@@ -108,14 +198,7 @@ export default function Page() {
     setDraftErr(null);
     setDraftResult(null);
     try {
-      const resp = await fetch("/api/draft", {
-        method: "POST",
-        headers: { "content-type": "application/json" },
-        body: JSON.stringify({ text: text.trim(), triage: out }),
-      });
-      const data = await resp.json();
-      if (!resp.ok) throw new Error(data?.detail || "Draft request failed");
-      setDraftResult(data);
+      await streamDraft(text.trim(), shown, setDraftResult);
     } catch (e: any) {
       setDraftErr(e?.message || "Unknown error");
     } finally {
@@ -171,9 +254,9 @@ export default function Page() {
             </select>
           </div>
           <div className="toolbar-item">
-            <label>Threshold</label>
+            <label>Threshold {threshold.toFixed(2)}</label>
             <input
-              type="number"
+              type="range"
               step="0.05"
               min="0"
               max="1"
@@ -207,7 +290,8 @@ export default function Page() {
         </div>
         <div className="card">
           <label>Output</label>
-          <pre>{out ? JSON.stringify(out, null, 2) : "Run Analyze to see structured output."}</pre>
+          {belowFloor && <p className="small">Threshold is below the score floor ({out.score_floor}); Analyze again to see more entities.</p>}
+          <pre>{shown ? JSON.stringify(shown, null, 2) : "Run Analyze to see structured output."}</pre>
         </div>
       </div>
 
@@ -241,6 +325,8 @@ export default function Page() {
               <div className="metrics-box">
                 <p className="small" style={{ marginBottom: 4 }}>
                   <strong>This request:</strong> {draftResult.tokens_in} in / {draftResult.tokens_out} out tokens, {draftResult.latency_ms.toFixed(0)} ms
+                  {draftResult.ttft_ms != null && <> (first token {draftResult.ttft_ms.toFixed(0)} ms)</>}
+                  {draftResult.cached && <> · cached (no LLM call)</>}
                 </p>
                 {(() => {
                   const estAllLlmIn = Math.ceil(text.length / 4) * 2.5;
@@ -0,0 +1,99 @@
+// Pass-through proxy from the Next.js API routes to the Python service. Request and response bodies are
+// piped as bytes (never parsed or re-serialized), and all routes share one keep-alive connection pool,
+// so a large /analyze/batch payload costs a copy, not two JSON round trips.
+import http from "node:http";
+import https from "node:https";
+import { Readable, pipeline } from "node:stream";
+
+// Base URL of the Python service; a trailing /analyze (the old default for the analyze route) is ignored.
+const PY_URL = (process.env.PY_URL || "http://127.0.0.1:8000").replace(/\/+$/, "").replace(/\/analyze$/, "");
+// Pooled upstream connections per Next.js process
+const PY_MAX_SOCKETS = Number(process.env.PY_MAX_SOCKETS || 64);
+// Idle pooled sockets are closed before uvicorn's 5 s keep-alive timeout, so a request never lands on a
+// socket the server is closing.
+const PY_IDLE_MS = Number(process.env.PY_IDLE_MS || 4000);
+
+// Request headers worth forwarding: body framing, and the service's own x-triage-* options
+// (X-Triage-Deadline-Ms, X-Triage-Profile). Cookies and the like stay at the edge.
+const FORWARD_REQUEST = /^(content-type|content-length|accept|x-triage-.*)$/i;
+// Hop-by-hop headers belong to the upstream connection, not the response we return.
+const HOP_BY_HOP = new Set(["connection", "keep-alive", "transfer-encoding", "date", "server"]);
+
+type Pool = { agent: http.Agent; lib: typeof http | typeof https };
+
+// One pool per process; kept on globalThis so dev-mode module reloads don't orphan open sockets.
+const POOL_KEY = Symbol.for("triage.pyProxy.pool");
+
+function pool(): Pool {
+  const g = globalThis as any;
+  if (!g[POOL_KEY]) {
+    const secure = PY_URL.startsWith("https:");
+    const lib = secure ? https : http;
+    const agent = new lib.Agent({
+      keepAlive: true,
+      maxSockets: PY_MAX_SOCKETS,
+      maxFreeSockets: PY_MAX_SOCKETS,
+      timeout: PY_IDLE_MS,
+      scheduling: "lifo", // reuse the warmest socket; extras idle out
+    });
+    g[POOL_KEY] = { agent, lib };
+  }
+  return g[POOL_KEY];
+}
+
+function ms(value: number): string {
+  return value.toFixed(2);
+}
+
+function unreachable(detail: string): Response {
+  return new Response(JSON.stringify({ detail }), { status: 502, headers: { "content-type": "application/json" } });
+}
+
+/**
+ * Forward `req` to `path` on the Python service and return its response unchanged (status, headers,
+ * body stream). Adds Server-Timing (`proxy` = time spent in this function, `upstream` = request sent to
+ * response headers), x-proxy-overhead-ms and x-proxy-socket (`reused` or `new`).
+ */
+export async function proxyToPython(req: Request, path: string): Promise<Response> {
+  const t0 = performance.now();
+  const { agent, lib } = pool();
+  const headers: Record<string, string> = {};
+  req.headers.forEach((value, name) => {
+    if (FORWARD_REQUEST.test(name)) headers[name] = value;
+  });
+
+  return new Promise<Response>((resolve) => {
+    const upstream = lib.request(`${PY_URL}${path}`, { method: req.method, headers, agent });
+    let sentAt = t0;
+
+    upstream.on("error", (e) => resolve(unreachable(`python service unreachable: ${e.message}`)));
+    upstream.on("response", (res) => {
+      const headersAt = performance.now();
+      const out = new Headers();
+      for (const [name, value] of Object.entries(res.headers)) {
+        if (value === undefined || HOP_BY_HOP.has(name)) continue;
+        for (const v of Array.isArray(value) ? value : [value]) out.append(name, v);
+      }
+      if (!out.has("cache-control")) out.set("cache-control", "no-store");
+      const body = res.statusCode === 204 || res.statusCode === 304 ? null : (Readable.toWeb(res) as ReadableStream<Uint8Array>);
+      const overhead = sentAt - t0 + (performance.now() - headersAt);
+      out.append("server-timing", `proxy;dur=${ms(overhead)}, upstream;dur=${ms(headersAt - sentAt)}`);
+      out.set("x-proxy-overhead-ms", ms(overhead));
+      out.set("x-proxy-socket", upstream.reusedSocket ? "reused" : "new");
+      resolve(new Response(body, { status: res.statusCode || 502, headers: out }));
+    });
+
+    // The browser went away: stop the upstream work (a completed response has already freed its socket).
+    req.signal?.addEventListener("abort", () => {
+      if (!upstream.res?.complete) upstream.destroy();
+    });
+
+    if (req.body) {
+      // A failed upload destroys the upstream request, which surfaces through its "error" handler
+      pipeline(Readable.fromWeb(req.body as any), upstream, () => {});
+    } else {
+      upstream.end();
+    }
+    sentAt = performance.now();
+  });
+}
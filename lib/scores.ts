@@ -0,0 +1,11 @@
+// Client-side twin of python/score_sweep.py: /analyze with rawScores returns every entity span scoring
+// >= score_floor, so the threshold slider re-filters those instead of running inference again.
+export type EntityScores = Record<string, { text: string; confidence: number }[]>;
+
+export function filterEntities(scores: EntityScores, threshold: number): { entities: Record<string, string[]> } {
+  const entities: Record<string, string[]> = {};
+  for (const [label, spans] of Object.entries(scores)) {
+    entities[label] = spans.filter((s) => s.confidence >= threshold).map((s) => s.text);
+  }
+  return { entities };
+}
@@ -0,0 +1,152 @@
+"""
+Admission control for /analyze: bounded concurrency and queue, deadlines, a degradation ladder.
+
+At most `max_concurrency` requests run at once; up to `max_queue` more wait
+for a slot on the event loop, in arrival order, without holding a threadpool
+thread. Past that, admit() raises Overloaded with a Retry-After estimate
+(queue depth x mean run time / slots), so bursts are shed with a 503 instead
+of piling up in the threadpool. A request with a deadline waits only until
+its deadline, then is shed the same way.
+
+The ladder trades the stages routing does not need for latency: once
+`degrade_at[0]` requests are waiting, admitted requests skip extract_json;
+past `degrade_at[1]` they skip entities too. Severity and intent (and so
+routing) always run. Recent per-stage times also let the pipeline skip a
+stage that would not finish inside a request's deadline (fits()).
+
+A batch of tickets run as one forward pass is admitted with a weight: it
+holds one slot per ticket (at most all of them), so /analyze/batch counts
+against the same limit as the tickets it carries.
+"""
+from __future__ import annotations
+
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, List, Optional, Sequence, Tuple
+
+# Optional stages in the order the ladder drops them
+LADDER = ("extract_json", "entities")
+
+
+class Overloaded(Exception):
+    def __init__(self, reason: str, detail: str, retry_after_s: int) -> None:
+        super().__init__(detail)
+        self.reason = reason  # "queue_full" | "deadline"
+        self.retry_after_s = retry_after_s
+
+
+class Admission:
+    """Slots and queue live on the event loop (admit() is async, so waiting requests hold no thread)."""
+
+    def __init__(self, max_concurrency: int = 4, max_queue: int = 64, degrade_at: Sequence[int] = (16, 32)) -> None:
+        if len(degrade_at) > len(LADDER):
+            raise ValueError(f"degrade_at has one threshold per ladder stage ({', '.join(LADDER)})")
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.degrade_at = list(degrade_at)
+        self.running = 0
+        self.counters = {"admitted": 0, "degraded": 0, "queue_full": 0, "deadline": 0}
+        self._waiters: Deque[Tuple[asyncio.Future, int]] = deque()  # (slot, weight), FIFO: freed slots go to the head
+        self._run_ms: List[float] = []  # recent request run times, for Retry-After
+        self._stage_ms: Dict[str, List[float]] = {}  # recent per-stage times, for fits()
+        self._stage_lock = threading.Lock()  # stages are observed from worker threads
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def _retry_after_s(self) -> int:
+        mean_s = (sum(self._run_ms) / len(self._run_ms) / 1000.0) if self._run_ms else 1.0
+        return max(1, math.ceil((self.waiting + 1) * mean_s / self.max_concurrency))
+
+    def skip_for(self, waiting: int) -> List[str]:
+        """Stages the ladder drops with `waiting` requests queued."""
+        return [stage for stage, at in zip(LADDER, self.degrade_at) if waiting >= at]
+
+    def _expired(self) -> Overloaded:
+        self.counters["deadline"] += 1
+        return Overloaded("deadline", "deadline passed while queued for triage", self._retry_after_s())
+
+    async def _acquire(self, deadline: Optional[float], weight: int) -> None:
+        if deadline is not None and deadline <= time.perf_counter():
+            raise self._expired()
+        if self.running + weight <= self.max_concurrency and not self._waiters:
+            self.running += weight
+            return
+        if self.waiting >= self.max_queue:
+            self.counters["queue_full"] += 1
+            raise Overloaded("queue_full", f"triage queue full ({self.waiting} waiting)", self._retry_after_s())
+        slot = asyncio.get_running_loop().create_future()
+        waiter = (slot, weight)
+        self._waiters.append(waiter)
+        timeout = None if deadline is None else max(0.0, deadline - time.perf_counter())
+        try:
+            await asyncio.wait_for(asyncio.shield(slot), timeout)
+        except BaseException as exc:
+            if slot.done() and not isinstance(exc, asyncio.CancelledError):
+                return  # the slots were handed over as the deadline hit: use them
+            if slot.done():
+                self._release(weight)  # cancelled after the hand-over: pass the slots on
+            else:
+                self._waiters.remove(waiter)
+                self._hand_over()  # a heavy waiter at the head may have been holding up lighter ones
+            if isinstance(exc, asyncio.TimeoutError):
+                raise self._expired() from None
+            raise
+
+    def _release(self, weight: int) -> None:
+        self.running -= weight
+        self._hand_over()
+
+    def _hand_over(self) -> None:
+        """Give freed slots to waiters in arrival order, as long as the oldest one fits."""
+        while self._waiters and self.running + self._waiters[0][1] <= self.max_concurrency:
+            slot, weight = self._waiters.popleft()
+            if not slot.done():
+                self.running += weight
+                slot.set_result(None)
+
+    @asynccontextmanager
+    async def admit(self, deadline: Optional[float] = None, weight: int = 1) -> AsyncIterator[List[str]]:
+        """Hold `weight` run slots (capped at max_concurrency) for the block; yields the stages to skip.
+
+        deadline is a time.perf_counter() value.
+        """
+        weight = max(1, min(weight, self.max_concurrency))
+        await self._acquire(deadline, weight)
+        skip = self.skip_for(self.waiting)
+        self.counters["admitted"] += 1
+        self.counters["degraded"] += bool(skip)
+        t0 = time.perf_counter()
+        try:
+            yield skip
+        finally:
+            self._run_ms = (self._run_ms + [(time.perf_counter() - t0) * 1000.0])[-50:]
+            self._release(weight)
+
+    def observe(self, stage: str, ms: float) -> None:
+        with self._stage_lock:
+            self._stage_ms[stage] = (self._stage_ms.get(stage, []) + [ms])[-50:]
+
+    def fits(self, stage: str, deadline: Optional[float]) -> bool:
+        """Whether `stage` (at its recent mean time) would finish before deadline; True with no deadline or no samples yet."""
+        if deadline is None:
+            return True
+        with self._stage_lock:
+            recent = self._stage_ms.get(stage)
+            estimate_s = sum(recent) / len(recent) / 1000.0 if recent else 0.0
+        return time.perf_counter() + estimate_s <= deadline
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "degrade_at": dict(zip(LADDER, self.degrade_at)),
+            "running": self.running,
+            "waiting": self.waiting,
+            **self.counters,
+        }
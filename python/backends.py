@@ -0,0 +1,138 @@
+"""
+Pluggable CPU inference backends behind the GLiNER2 extractor.
+
+TRIAGE_BACKEND selects how the model runs; every backend returns a GLiNER2
+object so server.py keeps calling extract()/batch_extract() unchanged:
+
+- torch: eager fp32 PyTorch (baseline)
+- int8:  dynamic int8 quantization of every nn.Linear (torch.ao.quantization)
+- onnx:  the transformer encoder exported to ONNX and run with ONNX Runtime;
+         span/classification heads stay in torch. Needs `pip install onnx onnxruntime`.
+
+Check routing quality against fp32 with scripts/backend_accuracy_gate.py.
+"""
+from __future__ import annotations
+
+import inspect
+import os
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, Optional, Tuple
+
+import torch
+
+BACKENDS = ("torch", "int8", "onnx")
+
+# Exported encoders are cached here, keyed by model id, so only the first onnx start pays for export
+ONNX_DIR = Path(os.environ.get("TRIAGE_ONNX_DIR", Path(__file__).resolve().parent / ".onnx"))
+ONNX_OPSET = 17
+
+
+def quantize_int8(model: torch.nn.Module) -> torch.nn.Module:
+    """Dynamic int8 quantization of Linear layers in place (weights int8, activations quantized per batch)."""
+    model.eval()
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+class _EncoderForExport(torch.nn.Module):
+    def __init__(self, encoder: torch.nn.Module) -> None:
+        super().__init__()
+        self.encoder = encoder
+
+    def forward(self, input_ids: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+        return self.encoder(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+
+
+def export_encoder(encoder: torch.nn.Module, path: Path) -> Path:
+    """Export a Hugging Face encoder to ONNX with dynamic batch and sequence axes."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    input_ids = torch.ones(2, 16, dtype=torch.long)
+    attention_mask = torch.ones(2, 16, dtype=torch.long)
+    tmp = path.with_suffix(".tmp")
+    # Newer torch defaults to the dynamo exporter; the TorchScript exporter handles HF encoders reliably.
+    extra = {"dynamo": False} if "dynamo" in inspect.signature(torch.onnx.export).parameters else {}
+    with torch.no_grad():
+        torch.onnx.export(
+            _EncoderForExport(encoder).eval(),
+            (input_ids, attention_mask),
+            str(tmp),
+            input_names=["input_ids", "attention_mask"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "last_hidden_state": {0: "batch", 1: "sequence"},
+            },
+            opset_version=ONNX_OPSET,
+            **extra,
+        )
+    tmp.replace(path)
+    return path
+
+
+class OnnxEncoder(torch.nn.Module):
+    """Drop-in for the GLiNER2 encoder: same call signature, output has .last_hidden_state."""
+
+    def __init__(self, onnx_path: Path, config: Any = None, threads: Optional[int] = None) -> None:
+        super().__init__()
+        self.onnx_path = onnx_path
+        self.config = config
+        # Callers read device/dtype from next(encoder.parameters())
+        self._anchor = torch.nn.Parameter(torch.zeros(1), requires_grad=False)
+        self.reset_session(threads)
+
+    def reset_session(self, threads: Optional[int] = None) -> None:
+        """(Re)create the ORT session, e.g. in a forked worker: ORT thread pools do not survive fork."""
+        try:
+            import onnxruntime as ort
+        except ImportError as exc:
+            raise RuntimeError("TRIAGE_BACKEND=onnx needs onnxruntime: pip install onnx onnxruntime") from exc
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = threads or torch.get_num_threads()
+        self.session = ort.InferenceSession(str(self.onnx_path), options, providers=["CPUExecutionProvider"])
+
+    def forward(self, input_ids: torch.Tensor, attention_mask: Optional[torch.Tensor] = None, **_: Any) -> Any:
+        if attention_mask is None:
+            attention_mask = torch.ones_like(input_ids)
+        (hidden,) = self.session.run(
+            ["last_hidden_state"],
+            {
+                "input_ids": input_ids.detach().cpu().numpy().astype("int64"),
+                "attention_mask": attention_mask.detach().cpu().numpy().astype("int64"),
+            },
+        )
+        return SimpleNamespace(last_hidden_state=torch.from_numpy(hidden))
+
+
+def use_onnx_encoder(model: Any, model_source: str) -> Any:
+    """Export model.encoder once (cached under ONNX_DIR) and swap in an ONNX Runtime session."""
+    name = model_source.strip("/").replace("/", "--")
+    path = ONNX_DIR / f"{name}.encoder.onnx"
+    if not path.exists():
+        export_encoder(model.encoder, path)
+    model.encoder = OnnxEncoder(path, config=getattr(model.encoder, "config", None))
+    return model
+
+
+def load_extractor(model_source: str, backend: str = "torch") -> Tuple[Any, Dict[str, float]]:
+    """Load GLiNER2 for the given backend; returns (extractor, load-time breakdown in ms)."""
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown TRIAGE_BACKEND {backend!r}; expected one of {', '.join(BACKENDS)}")
+    from gliner2 import GLiNER2
+
+    load_ms: Dict[str, float] = {}
+    t0 = time.perf_counter()
+    model = GLiNER2.from_pretrained(model_source)
+    model.eval()
+    load_ms["from_pretrained"] = (time.perf_counter() - t0) * 1000.0
+
+    t0 = time.perf_counter()
+    if backend == "int8":
+        quantize_int8(model)
+    elif backend == "onnx":
+        use_onnx_encoder(model, model_source)
+    if backend != "torch":
+        load_ms[f"backend_{backend}"] = (time.perf_counter() - t0) * 1000.0
+    return model, load_ms
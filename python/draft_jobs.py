@@ -0,0 +1,298 @@
+"""
+Background draft jobs: bounded async worker pool with backpressure.
+
+submit() queues a job and returns at once; `workers` asyncio tasks take jobs
+in FIFO order and run them. When `max_queue` jobs are already waiting,
+submit() raises JobQueueFull with a Retry-After estimate (queue depth x mean
+job time / workers). Each job records queue wait vs run time; a queued or
+running job can be cancelled. Finished jobs are kept for `ttl_s` so clients
+can poll (or long-poll with wait()) for the result.
+
+Jobs run in the process that accepted them. Under serve.py, polls can land on
+any worker, so each change of a job's status is also published (on_change) to
+a JobTable: a small SQLite file every worker reads, where a cancel that lands
+on another worker is recorded for the owner to pick up.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import closing
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+QUEUED, RUNNING, DONE, ERROR, CANCELLED = "queued", "running", "done", "error", "cancelled"
+FINISHED = (DONE, ERROR, CANCELLED)
+
+
+class JobQueueFull(Exception):
+    def __init__(self, depth: int, retry_after_s: int) -> None:
+        super().__init__(f"draft queue full ({depth} waiting)")
+        self.retry_after_s = retry_after_s
+
+
+@dataclass
+class Job:
+    id: str
+    payload: Any
+    status: str = QUEUED
+    created_at: float = field(default_factory=time.perf_counter)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Any = None
+    error: Optional[str] = None
+    _done: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+    _task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+    def timings_ms(self) -> Dict[str, Optional[float]]:
+        """queue_wait (created -> started), run (started -> finished), total; None until reached."""
+        def span(a: Optional[float], b: Optional[float]) -> Optional[float]:
+            return (b - a) * 1000.0 if a is not None and b is not None else None
+
+        return {
+            "queue_wait": span(self.created_at, self.started_at or self.finished_at),
+            "run": span(self.started_at, self.finished_at),
+            "total": span(self.created_at, self.finished_at),
+        }
+
+
+class DraftJobQueue:
+    def __init__(
+        self,
+        run: Callable[[Any], Awaitable[Any]],
+        workers: int = 8,
+        max_queue: int = 64,
+        ttl_s: float = 600.0,
+        on_change: Optional[Callable[["Job"], None]] = None,
+    ) -> None:
+        self.run = run
+        self.on_change = on_change
+        self.workers = workers
+        self.max_queue = max_queue
+        self.ttl_s = ttl_s
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.rejected = 0
+        self._jobs: Dict[str, Job] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._run_ms: List[float] = []  # recent job run times, for Retry-After
+        self._waiting = 0  # queued jobs not yet cancelled (cancelled ones stay in the asyncio.Queue until a worker skips them)
+        self._stopping = False
+
+    def start(self) -> None:
+        """Start the workers on the running event loop (idempotent per loop)."""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        self._loop = loop
+        self._stopping = False
+        self._queue = asyncio.Queue()
+        self._tasks = [loop.create_task(self._worker(), name=f"draft-worker-{i}") for i in range(self.workers)]
+
+    async def stop(self) -> None:
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks, self._queue, self._loop = [], None, None
+        self._waiting = 0
+
+    def depth(self) -> int:
+        return self._waiting
+
+    def _changed(self, job: Job) -> None:
+        if self.on_change is not None:
+            self.on_change(job)
+
+    def _retry_after_s(self) -> int:
+        mean_s = (sum(self._run_ms) / len(self._run_ms) / 1000.0) if self._run_ms else 1.0
+        return max(1, math.ceil(self.depth() * mean_s / self.workers))
+
+    def _purge(self) -> None:
+        cutoff = time.perf_counter() - self.ttl_s
+        for job_id in [j.id for j in self._jobs.values() if j.finished_at is not None and j.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def submit(self, payload: Any) -> Job:
+        self.start()
+        self._purge()
+        if self.depth() >= self.max_queue:
+            self.rejected += 1
+            raise JobQueueFull(self.depth(), self._retry_after_s())
+        job = Job(id=uuid.uuid4().hex, payload=payload)
+        self._jobs[job.id] = job
+        self._queue.put_nowait(job)
+        self._waiting += 1
+        self._changed(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def unfinished(self) -> List[Job]:
+        return [j for j in self._jobs.values() if j.status not in FINISHED]
+
+    async def wait(self, job: Job, timeout_s: float) -> Job:
+        """Return once the job finishes or timeout_s passes (long-poll)."""
+        if timeout_s > 0 and job.status not in FINISHED:
+            try:
+                await asyncio.wait_for(job._done.wait(), timeout_s)
+            except asyncio.TimeoutError:
+                pass
+        return job
+
+    def cancel(self, job: Job) -> bool:
+        """Cancel a queued or running job; False if it already finished."""
+        if job.status in FINISHED:
+            return False
+        if job._task is not None:
+            job._task.cancel()  # the worker records the cancellation
+        else:
+            self._waiting -= 1
+            self._finish(job, CANCELLED)
+        return True
+
+    def _finish(self, job: Job, status: str, result: Any = None, error: Optional[str] = None) -> None:
+        job.status, job.result, job.error = status, result, error
+        job.finished_at = time.perf_counter()
+        job._done.set()
+        if status == DONE:
+            self.completed += 1
+        elif status == ERROR:
+            self.failed += 1
+        else:
+            self.cancelled += 1
+        self._changed(job)
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            if job.status != QUEUED:  # cancelled while waiting
+                continue
+            self._waiting -= 1
+            job.status, job.started_at = RUNNING, time.perf_counter()
+            self._changed(job)
+            job._task = asyncio.ensure_future(self.run(job.payload))
+            try:
+                result = await job._task
+            except asyncio.CancelledError:
+                if self._stopping or not job._task.cancelled():
+                    raise  # the worker itself is being stopped
+                self._finish(job, CANCELLED)
+                continue
+            except Exception as exc:
+                self._finish(job, ERROR, error=getattr(exc, "detail", None) or f"{type(exc).__name__}: {exc}")
+            else:
+                self._finish(job, DONE, result=result)
+            finally:
+                job._task = None
+            self._run_ms = (self._run_ms + [(job.finished_at - job.started_at) * 1000.0])[-50:]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "queued": self.depth(),
+            "running": sum(1 for j in self._jobs.values() if j.status == RUNNING),
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "rejected": self.rejected,
+        }
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS draft_jobs (
+    id TEXT PRIMARY KEY,
+    owner INTEGER NOT NULL,
+    version INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    finished_at REAL
+);
+"""
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class JobTable:
+    """Job status shared by serve.py workers (SQLite, WAL). Blocking: call it off the event loop.
+
+    The owning worker save()s each status change with an increasing version (a
+    write that arrives out of order never rolls a job back). Other workers load()
+    it for polls, and request_cancel() flags it for the owner, which reads the
+    flags with cancel_requested(). Finished jobs are deleted after ttl_s.
+    """
+
+    def __init__(self, path: Path, ttl_s: float = 600.0) -> None:
+        self.path = Path(path)
+        self.ttl_s = ttl_s
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()):
+            pass
+
+    def _connect(self) -> sqlite3.Connection:
+        # One short-lived connection per call: calls come from worker threads in several processes
+        conn = sqlite3.connect(str(self.path), timeout=30.0)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        return conn
+
+    def save(self, job_id: str, version: int, status: str, payload: Dict[str, Any]) -> None:
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT INTO draft_jobs (id, owner, version, status, payload, finished_at) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET version = excluded.version, status = excluded.status, "
+                "payload = excluded.payload, finished_at = excluded.finished_at WHERE excluded.version > draft_jobs.version",
+                (job_id, os.getpid(), version, status, json.dumps(payload), now if status in FINISHED else None),
+            )
+            conn.execute("DELETE FROM draft_jobs WHERE finished_at < ?", (now - self.ttl_s,))
+
+    def load(self, job_id: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """(status, payload), or None for an unknown or expired job. An unfinished job whose worker died reads as error."""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT owner, status, payload FROM draft_jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        owner, status, payload = row[0], row[1], json.loads(row[2])
+        if status not in FINISHED and not _alive(owner):
+            status = ERROR
+            payload.update(status=ERROR, error="the worker running this job exited")
+        return status, payload
+
+    def request_cancel(self, job_id: str) -> Optional[str]:
+        """Flag an unfinished job for its owner to cancel; returns its status (None if unknown)."""
+        with closing(self._connect()) as conn, conn:
+            marks = ",".join("?" * len(FINISHED))
+            conn.execute(
+                f"UPDATE draft_jobs SET cancel_requested = 1 WHERE id = ? AND status NOT IN ({marks})", (job_id, *FINISHED)
+            )
+            row = conn.execute("SELECT status FROM draft_jobs WHERE id = ?", (job_id,)).fetchone()
+        return row[0] if row else None
+
+    def cancel_requested(self, job_ids: List[str]) -> List[str]:
+        if not job_ids:
+            return []
+        marks = ",".join("?" * len(job_ids))
+        with closing(self._connect()) as conn:
+            rows = conn.execute(f"SELECT id FROM draft_jobs WHERE cancel_requested = 1 AND id IN ({marks})", job_ids).fetchall()
+        return [row[0] for row in rows]
@@ -0,0 +1,138 @@
+"""
+Pooled async LLM client for /draft (OpenAI-compatible chat completions).
+
+One AsyncOpenAI client, and so one keep-alive HTTP connection pool, serves
+every draft instead of a new client and TLS handshake per request. A
+semaphore caps in-flight LLM calls at `max_concurrency`; extra drafts wait
+for a slot instead of piling onto the provider. stream() yields tokens as the
+provider sends them and reports time-to-first-token.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Optional, Union
+
+
+@dataclass
+class DraftCompletion:
+    draft: str
+    tokens_in: int
+    tokens_out: int
+    latency_ms: float
+    ttft_ms: Optional[float] = None
+    cached: bool = False  # served from the draft cache: no LLM call, zero tokens
+
+
+class DraftLLM:
+    def __init__(
+        self,
+        api_key: Optional[str],
+        model: str,
+        base_url: Optional[str] = None,
+        max_concurrency: int = 8,
+        timeout_s: float = 60.0,
+        max_retries: int = 2,
+    ) -> None:
+        self.api_key = api_key
+        self.model = model
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency
+        self.timeout_s = timeout_s
+        self.max_retries = max_retries
+        self.in_flight = 0
+        self._client: Any = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.api_key)
+
+    def _pool(self) -> tuple[Any, asyncio.Semaphore]:
+        """Client + semaphore for the running event loop (created once per loop, e.g. once per worker)."""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            import httpx
+            from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+            limits = httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency)
+            self._client = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                timeout=self.timeout_s,
+                max_retries=self.max_retries,
+                http_client=DefaultAsyncHttpxClient(limits=limits),
+            )
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._client, self._slots
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            client, self._client, self._loop = self._client, None, None
+            await client.close()
+
+    async def complete(self, prompt: str) -> DraftCompletion:
+        client, slots = self._pool()
+        async with slots:
+            self.in_flight += 1
+            try:
+                t0 = time.perf_counter()
+                resp = await client.chat.completions.create(
+                    model=self.model,
+                    messages=[{"role": "user", "content": prompt}],
+                )
+                t1 = time.perf_counter()
+            finally:
+                self.in_flight -= 1
+        choice = resp.choices[0] if resp.choices else None
+        usage = resp.usage
+        return DraftCompletion(
+            draft=(choice.message.content or "").strip() if choice else "",
+            tokens_in=(usage.prompt_tokens or 0) if usage else 0,
+            tokens_out=(usage.completion_tokens or 0) if usage else 0,
+            latency_ms=(t1 - t0) * 1000.0,
+        )
+
+    async def stream(self, prompt: str) -> AsyncIterator[Union[str, DraftCompletion]]:
+        """Yield each token delta as it arrives, then one DraftCompletion with usage and ttft_ms."""
+        client, slots = self._pool()
+        async with slots:
+            self.in_flight += 1
+            try:
+                t0 = time.perf_counter()
+                ttft_ms: Optional[float] = None
+                parts = []
+                usage = None
+                stream = await client.chat.completions.create(
+                    model=self.model,
+                    messages=[{"role": "user", "content": prompt}],
+                    stream=True,
+                    stream_options={"include_usage": True},
+                )
+                # Closing the stream returns its connection to the pool even if our caller stops early
+                async with stream:
+                    async for chunk in stream:
+                        if chunk.usage is not None:
+                            usage = chunk.usage
+                        delta = chunk.choices[0].delta.content if chunk.choices else None
+                        if delta:
+                            if ttft_ms is None:
+                                ttft_ms = (time.perf_counter() - t0) * 1000.0
+                            parts.append(delta)
+                            yield delta
+                t1 = time.perf_counter()
+            finally:
+                self.in_flight -= 1
+        yield DraftCompletion(
+            draft="".join(parts).strip(),
+            tokens_in=(usage.prompt_tokens or 0) if usage else 0,
+            tokens_out=(usage.completion_tokens or 0) if usage else 0,
+            latency_ms=(t1 - t0) * 1000.0,
+            ttft_ms=ttft_ms,
+        )
+
+    def stats(self) -> dict:
+        return {"model": self.model, "max_concurrency": self.max_concurrency, "in_flight": self.in_flight}
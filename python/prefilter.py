@@ -0,0 +1,198 @@
+"""
+Cascaded triage: a keyword/regex prefilter that decides obvious tickets before GLiNER2 runs.
+
+Each preset can register rules: weighted regexes that vote for a severity or intent label, and
+(optionally) a regex per entity label. Rules are compiled once at registration and checked against
+the preset's label sets, like presets.py does for schemas. decide() scores every label as the sum of
+the weights of its matching rules. A task is decided only if its top label reaches `min_score` and
+leads the runner-up by `min_margin`. Anything less falls through to the model.
+
+Entity rules decide the entities stage only when they cover every entity label of the preset.
+A regex can find an invoice id but cannot rule out a company name, so presets with free-text
+labels always take their entities from the model.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import presets
+
+RuleSpec = Tuple[str, str, float]  # (regex, label, weight); regexes are matched case-insensitively
+STAGES = ("entities", "severity", "intent", "ticket_fields")
+
+
+@dataclass
+class Decision:
+    """Per-stage results the rules are confident about (None = run the model), plus every label's score."""
+
+    severity: Optional[Dict[str, str]] = None
+    intent: Optional[Dict[str, str]] = None
+    entities: Optional[Dict[str, Any]] = None
+    scores: Dict[str, Dict[str, float]] = field(default_factory=dict)
+
+    def decided_by(self) -> Dict[str, str]:
+        decided = {"severity": self.severity, "intent": self.intent, "entities": self.entities}
+        return {stage: "rules" if decided.get(stage) is not None else "model" for stage in STAGES}
+
+
+class PresetRules:
+    def __init__(
+        self,
+        severity: Dict[str, List[Tuple[Any, str, float]]],
+        intent: Dict[str, List[Tuple[Any, str, float]]],
+        entities: Dict[str, Any],
+        entity_labels: Sequence[str],
+    ) -> None:
+        self.severity = severity
+        self.intent = intent
+        self.entities = entities
+        self.covers_entities = bool(entity_labels) and set(entity_labels) <= set(entities)
+
+    @staticmethod
+    def _decide_task(rules: List[Tuple[Any, str, float]], text: str, min_score: float, min_margin: float) -> Tuple[Optional[str], Dict[str, float]]:
+        scores: Dict[str, float] = {}
+        for pattern, label, weight in rules:
+            if pattern.search(text):
+                scores[label] = scores.get(label, 0.0) + weight
+        ranked = sorted(scores.values(), reverse=True)
+        if not ranked or ranked[0] < min_score or ranked[0] - (ranked[1] if len(ranked) > 1 else 0.0) < min_margin:
+            return None, scores
+        return max(scores, key=lambda label: scores[label]), scores
+
+    def _decide_stage(self, tasks: Dict[str, List[Tuple[Any, str, float]]], text: str, min_score: float, min_margin: float, scores: Dict[str, Dict[str, float]]) -> Optional[Dict[str, str]]:
+        """{task: label} if every task of the stage is decided, else None."""
+        if not tasks:
+            return None
+        decided: Dict[str, str] = {}
+        for task, rules in tasks.items():
+            label, scores[task] = self._decide_task(rules, text, min_score, min_margin)
+            if label is not None:
+                decided[task] = label
+        return decided if len(decided) == len(tasks) else None
+
+    def decide(self, text: str, min_score: float = 1.0, min_margin: float = 0.75) -> Decision:
+        scores: Dict[str, Dict[str, float]] = {}
+        decision = Decision(scores=scores)
+        decision.severity = self._decide_stage(self.severity, text, min_score, min_margin, scores)
+        decision.intent = self._decide_stage(self.intent, text, min_score, min_margin, scores)
+        if self.covers_entities:
+            found: Dict[str, List[str]] = {}
+            for label, pattern in self.entities.items():
+                spans = found[label] = []
+                for match in pattern.finditer(text):
+                    span = match.group(match.lastindex or 0).strip()
+                    if span and span not in spans:
+                        spans.append(span)
+            decision.entities = {"entities": found}
+        return decision
+
+
+RULES: Dict[str, PresetRules] = {}
+
+
+def _compile_tasks(what: str, specs: Dict[str, List[RuleSpec]], schema: Dict[str, List[str]]) -> Dict[str, List[Tuple[Any, str, float]]]:
+    compiled: Dict[str, List[Tuple[Any, str, float]]] = {}
+    for task, rules in specs.items():
+        if task not in schema:
+            raise ValueError(f"{what}: task {task!r} is not in the preset schema")
+        for _, label, weight in rules:
+            if label not in schema[task]:
+                raise ValueError(f"{what}.{task}: label {label!r} is not one of {schema[task]}")
+            if weight <= 0:
+                raise ValueError(f"{what}.{task}: rule weights must be positive")
+        compiled[task] = [(re.compile(pattern, re.I), label, weight) for pattern, label, weight in rules]
+    return compiled
+
+
+def register_rules(
+    preset_id: str,
+    *,
+    severity: Optional[Dict[str, List[RuleSpec]]] = None,
+    intent: Optional[Dict[str, List[RuleSpec]]] = None,
+    entities: Optional[Dict[str, str]] = None,
+) -> PresetRules:
+    """Compile a preset's prefilter rules once; raises ValueError if a task or label is not in the preset."""
+    preset = presets.PRESETS.get(preset_id)
+    if preset is None:
+        raise ValueError(f"unknown preset {preset_id!r}")
+    compiled = preset.compiled
+    for label in entities or {}:
+        if label not in compiled.entity_labels:
+            raise ValueError(f"entities: label {label!r} is not one of {compiled.entity_labels}")
+    rules = RULES[preset_id] = PresetRules(
+        _compile_tasks("severity", severity or {}, compiled.severity_schema),
+        _compile_tasks("intent", intent or {}, compiled.intent_schema),
+        {label: re.compile(pattern, re.I) for label, pattern in (entities or {}).items()},
+        compiled.entity_labels,
+    )
+    return rules
+
+
+def rules_for(preset_id: str, compiled: Any) -> Optional[PresetRules]:
+    """The preset's rules, or None when it has none or the request sent its own schemas (labels may differ)."""
+    preset = presets.PRESETS.get(preset_id)
+    if preset is None or compiled is not preset.compiled:
+        return None
+    return RULES.get(preset_id)
+
+
+# Severity: explicit severities and outage language. "Critical" and "all users" only add to sev0,
+# so they need another sev0 signal to decide it.
+_OUTAGE_SEVERITY: List[RuleSpec] = [
+    (r"\bsev[\s-]?0\b", "sev0", 1.0),
+    (r"\b(complete|total|full)\s+outage\b|\bentire\s+(org|organi[sz]ation|company)\b[^.]{0,20}\b(blocked|down)\b", "sev0", 1.0),
+    (r"\bcritical\b", "sev0", 0.5),
+    (r"\ball\s+(users|customers|requests|logins|sso\s+logins)\b", "sev0", 0.5),
+    (r"\bsev[\s-]?1\b", "sev1", 1.0),
+    (r"\b(outage|incident)\b", "sev1", 0.5),
+    (r"\b(urgent|asap|immediate(ly)?|escalat\w*)\b", "sev1", 0.5),
+    (r"\b5\d\d\b|\b5\d\ds\b|\bdown\b", "sev1", 0.25),
+    (r"\bprod(uction)?\b", "sev1", 0.25),
+]
+# Questions, docs and feature requests: low severity
+_QUESTION_SEVERITY: List[RuleSpec] = [
+    (r"\bhow\s+(do|can|should)\s+(we|i)\b|\bdocumentation\b|\bdoc\s+link\b|\bfeature\s+request\b", "sev3", 1.0),
+]
+
+register_rules(
+    "saas_support",
+    severity={"severity": _OUTAGE_SEVERITY + _QUESTION_SEVERITY},
+    intent={"intent": [
+        (r"\b(outage|incident|sev[\s-]?[01])\b", "incident", 1.0),
+        (r"\b(invoice|refund\w*|billed|charged|pricing|price\s+quote)\b", "billing", 1.0),
+        (r"\badd\s+\S+@\S+\s+to\b|\b(admin|owner)\s+role\b|\baccess\s+request\b", "access", 1.0),
+        (r"\bhow\s+(do|can|should)\s+(we|i)\b|\bdocumentation\b|\bdoc\s+link\b", "how_to", 1.0),
+        (r"^\s*bug\b|\breproducible\b", "bug", 1.0),
+        (r"\bfeature\s+request\b", "other", 1.0),
+    ]},
+)
+
+register_rules(
+    "auth_incident",
+    severity={"severity": _OUTAGE_SEVERITY},
+    intent={"intent": [
+        (r"\b(outage|incident|sev[\s-]?[01])\b", "incident_report", 1.0),
+        (r"\badd\s+\S+@\S+\s+to\b|\baccess\s+request\b|\b(admin|owner)\s+role\b", "access_request", 1.0),
+        (r"\b(sso|saml|scim|idp|okta|azure\s?ad|onelogin|pingfederate|adfs)\b", "sso_issue", 0.5),
+        (r"\b(log\s?in|login|sign[\s-]?in|mfa|password)\b", "login_issue", 0.5),
+    ]},
+)
+
+register_rules(
+    "billing",
+    # Billing tickets are low severity unless they also read like an outage; outage words cut the margin
+    severity={"severity": _OUTAGE_SEVERITY + [
+        (r"\b(invoice|refund\w*|charged?|billed|pricing|quote|renewal|plan|seats?|discount\w*|payment|subscription)\b", "sev3", 1.0),
+    ]},
+    intent={"intent": [
+        (r"\brefund\w*\b", "refund_request", 1.0),
+        (r"\b(billed\s+twice|duplicate\s+charge|double[\s-]charged)\b", "refund_request", 0.5),
+        (r"\binvoice\b|\bINV-\d+\b", "invoice_issue", 0.5),
+        (r"\b(overdue|late\s+fee|reissue)\b", "invoice_issue", 0.5),
+        (r"\b(pricing|price|quote[d]?|discount\w*|per\s+seat)\b", "pricing", 1.0),
+        (r"\bcancel\w*\b", "cancelation", 1.0),
+        (r"\b(payment\s+(terms|method)|billing\s+cycle|net-30)\b", "billing_question", 1.0),
+    ]},
+)
@@ -0,0 +1,351 @@
+"""
+Server-side preset registry (mirrors lib/schemas.ts).
+
+Each preset's labels and schemas are validated once at registration and
+compiled into reusable GLiNER2 Schema objects, so requests can send just
+`preset` + `text` and the backend skips per-request schema building.
+Requests with custom inline schemas still work; they are compiled on first
+use and kept in a small LRU keyed on the schemas' canonical JSON.
+
+Structures are built the way GLiNER2's extract_json builds them: on a
+checkpoint with record decoding (`enable_records`) they use "natural" record
+mode, so the server calls `use_model()` once the model is loaded.
+"""
+from __future__ import annotations
+
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from gliner2 import Schema
+
+SEVERITY_SCHEMA: Dict[str, List[str]] = {"severity": ["sev0", "sev1", "sev2", "sev3"]}
+
+# Compiled inline (non-preset) schemas kept per process
+INLINE_CACHE_SIZE = 64
+
+# GLiNER2's structure mode for the loaded model: "natural" on enable_records checkpoints, else None
+_record_mode: Optional[str] = None
+_inline: "OrderedDict[str, CompiledSchemas]" = OrderedDict()
+_inline_lock = threading.Lock()
+
+
+def parse_field_spec(spec: str) -> tuple[str, str, Optional[List[str]], Optional[str]]:
+    """Parse an extract_json field spec "name::dtype::[a|b]::description" (same rules as GLiNER2)."""
+    parts = spec.split("::")
+    name, dtype, choices, desc = parts[0], "list", None, None
+    explicit_dtype = False
+    for part in parts[1:]:
+        if part in ("str", "list"):
+            dtype, explicit_dtype = part, True
+        elif part.startswith("[") and part.endswith("]"):
+            choices = [c.strip() for c in part[1:-1].split("|")]
+            if not explicit_dtype:
+                dtype = "str"
+        else:
+            desc = part
+    return name, dtype, choices, desc
+
+
+def _check_labels(what: str, labels: Any) -> None:
+    if not isinstance(labels, list) or not labels:
+        raise ValueError(f"{what}: expected a non-empty list of labels")
+    if any(not isinstance(label, str) or not label.strip() for label in labels):
+        raise ValueError(f"{what}: labels must be non-empty strings")
+    if len(set(labels)) != len(labels):
+        raise ValueError(f"{what}: duplicate labels")
+
+
+def validate_schemas(
+    entity_labels: List[str],
+    severity_schema: Dict[str, List[str]],
+    intent_schema: Dict[str, List[str]],
+    json_schema: Dict[str, List[str]],
+) -> None:
+    """Raise ValueError if any label list or extract_json field spec is malformed."""
+    _check_labels("entityLabels", entity_labels)
+    for name, schema in (("severitySchema", severity_schema), ("intentSchema", intent_schema)):
+        if not schema:
+            raise ValueError(f"{name}: expected at least one classification task")
+        for task, labels in schema.items():
+            _check_labels(f"{name}.{task}", labels)
+    if not json_schema:
+        raise ValueError("jsonSchema: expected at least one structure")
+    for parent, fields in json_schema.items():
+        if not fields:
+            raise ValueError(f"jsonSchema.{parent}: expected at least one field")
+        names = [parse_field_spec(spec)[0] for spec in fields]
+        _check_labels(f"jsonSchema.{parent}", names)
+
+
+def _add_structures(schema: Schema, json_schema: Dict[str, List[str]], record_mode: Optional[str]) -> Schema:
+    """Add `json_schema`'s structures exactly as GLiNER2's extract_json (`_json_schema`) does."""
+    for parent, fields in json_schema.items():
+        builder = schema.structure(parent, mode=record_mode)
+        for spec in fields:
+            name, dtype, choices, desc = parse_field_spec(spec)
+            builder.field(
+                name,
+                dtype=dtype,
+                choices=choices,
+                description=desc,
+                cardinality=(
+                    "required_one"
+                    if record_mode and dtype == "str"
+                    else "zero_or_more"
+                    if record_mode
+                    else None
+                ),
+                exclusive=record_mode is not None,
+            )
+    return schema
+
+
+class CompiledSchemas:
+    """Validated labels/schemas plus the GLiNER2 Schema objects each triage stage runs with."""
+
+    def __init__(
+        self,
+        entity_labels: List[str],
+        severity_schema: Dict[str, List[str]],
+        intent_schema: Dict[str, List[str]],
+        json_schema: Dict[str, List[str]],
+    ) -> None:
+        validate_schemas(entity_labels, severity_schema, intent_schema, json_schema)
+        self.entity_labels = entity_labels
+        self.severity_schema = severity_schema
+        self.intent_schema = intent_schema
+        self.json_schema = json_schema
+
+        self.entities = Schema().entities(entity_labels)
+        self.severity = Schema()
+        for task, labels in severity_schema.items():
+            self.severity.classification(task, labels)
+        self.intent = Schema()
+        for task, labels in intent_schema.items():
+            self.intent.classification(task, labels)
+        for schema in (self.entities, self.severity, self.intent):
+            schema.build()
+        self._build_structures(_record_mode)
+
+    def _build_structures(self, record_mode: Optional[str]) -> None:
+        self.record_mode = record_mode
+        self.ticket_fields = _add_structures(Schema(), self.json_schema, record_mode)
+        self.ticket_fields.build()
+        self._fused: Dict[float, Schema] = {}
+
+    def matches(
+        self,
+        entity_labels: List[str],
+        severity_schema: Dict[str, List[str]],
+        intent_schema: Dict[str, List[str]],
+        json_schema: Dict[str, List[str]],
+    ) -> bool:
+        return (
+            entity_labels == self.entity_labels
+            and severity_schema == self.severity_schema
+            and intent_schema == self.intent_schema
+            and json_schema == self.json_schema
+        )
+
+    def fused(self, threshold: float) -> Schema:
+        """One schema covering entities (at `threshold`), both classifications and the structures."""
+        schema = self._fused.get(threshold)
+        if schema is None:
+            schema = Schema().entities(self.entity_labels, threshold=threshold)
+            for task, labels in {**self.severity_schema, **self.intent_schema}.items():
+                schema.classification(task, labels)
+            _add_structures(schema, self.json_schema, self.record_mode)
+            schema.build()
+            self._fused[threshold] = schema
+        return schema
+
+
+class Preset:
+    def __init__(self, preset_id: str, name: str, description: str, compiled: CompiledSchemas) -> None:
+        self.id = preset_id
+        self.name = name
+        self.description = description
+        self.compiled = compiled
+
+    def as_payload(self) -> Dict[str, Any]:
+        """Request fields for this preset, in /analyze payload naming."""
+        return {
+            "entityLabels": self.compiled.entity_labels,
+            "severitySchema": self.compiled.severity_schema,
+            "intentSchema": self.compiled.intent_schema,
+            "jsonSchema": self.compiled.json_schema,
+        }
+
+
+PRESETS: Dict[str, Preset] = {}
+
+
+def register_preset(
+    preset_id: str,
+    *,
+    name: str,
+    description: str,
+    entity_labels: List[str],
+    intent_schema: Dict[str, List[str]],
+    json_schema: Dict[str, List[str]],
+    severity_schema: Dict[str, List[str]] = SEVERITY_SCHEMA,
+) -> Preset:
+    """Validate and compile a preset's schemas once; raises ValueError on a malformed schema."""
+    compiled = CompiledSchemas(entity_labels, severity_schema, intent_schema, json_schema)
+    preset = PRESETS[preset_id] = Preset(preset_id, name, description, compiled)
+    return preset
+
+
+def resolve(
+    preset_id: str,
+    entity_labels: List[str],
+    severity_schema: Dict[str, List[str]],
+    intent_schema: Dict[str, List[str]],
+    json_schema: Dict[str, List[str]],
+) -> CompiledSchemas:
+    """Precompiled schemas when the request matches its preset, else the inline schemas (compiled once, LRU)."""
+    preset = PRESETS.get(preset_id)
+    if preset is not None and preset.compiled.matches(entity_labels, severity_schema, intent_schema, json_schema):
+        return preset.compiled
+    key = json.dumps([entity_labels, severity_schema, intent_schema, json_schema], sort_keys=True)
+    with _inline_lock:
+        compiled = _inline.get(key)
+        if compiled is not None:
+            _inline.move_to_end(key)
+            return compiled
+    # Compile outside the lock; two threads racing on a new schema both compile and one copy is kept
+    compiled = CompiledSchemas(entity_labels, severity_schema, intent_schema, json_schema)
+    with _inline_lock:
+        compiled = _inline.setdefault(key, compiled)
+        _inline.move_to_end(key)
+        while len(_inline) > INLINE_CACHE_SIZE:
+            _inline.popitem(last=False)
+    return compiled
+
+
+def use_model(model: Any) -> None:
+    """Rebuild the presets' structures for `model`'s record mode (GLiNER2 `enable_records`); drops cached inline schemas."""
+    global _record_mode
+    _record_mode = "natural" if getattr(model, "enable_records", False) else None
+    with _inline_lock:
+        _inline.clear()
+    for preset in PRESETS.values():
+        if preset.compiled.record_mode != _record_mode:
+            preset.compiled._build_structures(_record_mode)
+
+
+register_preset(
+    "saas_support",
+    name="SaaS Support",
+    description="Product, integration, environment; severity and intent; ticket fields",
+    entity_labels=[
+        "customer_name",
+        "company",
+        "product",
+        "feature",
+        "integration",
+        "error_code",
+        "environment",
+        "cloud",
+        "region",
+    ],
+    intent_schema={"intent": ["bug", "how_to", "access", "incident", "billing", "other"]},
+    json_schema={
+        "ticket_fields": [
+            "customer_name::str::Customer name",
+            "company::str::Company name",
+            "product::str::Product area",
+            "feature::str::Feature area",
+            "integration::str::Integration mentioned",
+            "error_code::str::Error code if present",
+            "environment::str::prod/stage/dev",
+            "cloud::str::aws/gcp/azure if present",
+            "region::str::Region",
+            "intent::str::Intent label",
+            "severity::str::sev0-sev3",
+            "next_queue::str::Routing queue",
+        ]
+    },
+)
+
+register_preset(
+    "auth_incident",
+    name="Auth / SSO",
+    description="SSO, IdP, auth errors, incident routing",
+    entity_labels=[
+        "customer_name",
+        "company",
+        "idp",
+        "integration",
+        "product",
+        "error_code",
+        "environment",
+        "region",
+    ],
+    intent_schema={
+        "intent": [
+            "sso_issue",
+            "login_issue",
+            "access_request",
+            "incident_report",
+            "how_to",
+            "other",
+        ]
+    },
+    json_schema={
+        "ticket_fields": [
+            "customer_name::str::Customer name",
+            "company::str::Company name",
+            "idp::str::Identity provider (Okta/AzureAD/etc.)",
+            "integration::str::Integration name",
+            "error_code::str::Error code if present",
+            "environment::str::prod/stage/dev",
+            "region::str::Region",
+            "intent::str::Intent label",
+            "severity::str::sev0-sev3",
+            "next_queue::str::Routing queue",
+        ]
+    },
+)
+
+register_preset(
+    "billing",
+    name="Billing",
+    description="Plan, invoice IDs, pricing, billing intent",
+    entity_labels=[
+        "customer_name",
+        "company",
+        "plan",
+        "invoice_id",
+        "amount",
+        "currency",
+        "product",
+        "date",
+        "region",
+    ],
+    intent_schema={
+        "intent": [
+            "billing_question",
+            "refund_request",
+            "invoice_issue",
+            "pricing",
+            "cancelation",
+            "other",
+        ]
+    },
+    json_schema={
+        "ticket_fields": [
+            "customer_name::str::Customer name",
+            "company::str::Company name",
+            "plan::str::Plan name if mentioned",
+            "invoice_id::str::Invoice ID if present",
+            "amount::str::Amount if present",
+            "currency::str::Currency if present",
+            "intent::str::Billing intent category",
+            "severity::str::sev0-sev3",
+            "next_queue::str::Routing queue",
+        ]
+    },
+)
@@ -0,0 +1,174 @@
+"""
+Opt-in profiling for the analyze hot path (TRIAGE_PROFILING=1).
+
+Two kinds of capture:
+- "torch": torch.profiler CPU trace with Python stacks. It is exported as a
+  Chrome trace (.json) that opens in chrome://tracing or ui.perfetto.dev and
+  splits time across tokenization, encoder ops, span decoding and response
+  serialization.
+- "sample": a stdlib stack sampler that reads sys._current_frames() every
+  few milliseconds. It writes collapsed stacks (.folded), which speedscope or
+  flamegraph.pl turn into a flamegraph. It can follow one request thread or
+  every thread for a time window.
+
+Profiles are written to one local directory that keeps the newest `keep`
+files. With profiling off, nothing here is imported or called.
+"""
+from __future__ import annotations
+
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+KINDS = ("torch", "sample")
+_NAME_RE = re.compile(r"^[\w.-]+\.(json|folded)$")
+
+
+class StackSampler:
+    """Samples Python stacks of `thread_ids` (all threads but its own if None) into collapsed-stack counts."""
+
+    def __init__(self, interval_s: float = 0.005, thread_ids: Optional[Set[int]] = None) -> None:
+        self.interval_s = interval_s
+        self.thread_ids = thread_ids
+        self.counts: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _collapse(frame: Any, root: str) -> str:
+        names: List[str] = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        names.append(root)
+        return ";".join(reversed(names))
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.is_set():
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for tid, frame in sys._current_frames().items():
+                if tid == own or (self.thread_ids is not None and tid not in self.thread_ids):
+                    continue
+                self.counts[self._collapse(frame, names.get(tid, str(tid)))] += 1
+            self.samples += 1
+            self._stop.wait(self.interval_s)
+
+    def start(self) -> "StackSampler":
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.counts
+
+    def write(self, path: Path) -> None:
+        path.write_text("".join(f"{stack} {n}\n" for stack, n in self.counts.most_common()))
+
+
+class Profiler:
+    def __init__(self, directory: Path, keep: int = 50, sample_interval_ms: float = 5.0) -> None:
+        self.directory = Path(directory)
+        self.keep = keep
+        self.sample_interval_s = sample_interval_ms / 1000.0
+        self._busy = threading.Lock()  # torch.profiler cannot nest; one capture at a time
+        self._armed: Optional[Dict[str, Any]] = None  # {"kind", "until"} for window-armed torch traces
+
+    def _new_path(self, label: str, kind: str) -> Path:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        safe = re.sub(r"[^\w-]", "_", label)[:40] or "profile"
+        return self.directory / f"{stamp}-{safe}-{kind}-{uuid.uuid4().hex[:6]}.{'json' if kind == 'torch' else 'folded'}"
+
+    def _prune(self) -> None:
+        files = sorted(self.list(), key=lambda p: p.stat().st_mtime)
+        for path in files[:max(0, len(files) - self.keep)]:
+            path.unlink(missing_ok=True)
+
+    def list(self) -> List[Path]:
+        if not self.directory.is_dir():
+            return []
+        return [p for p in self.directory.iterdir() if _NAME_RE.match(p.name)]
+
+    def resolve(self, name: str) -> Optional[Path]:
+        """Path of a profile by file name (no directory traversal), or None."""
+        if not _NAME_RE.match(name):
+            return None
+        path = self.directory / name
+        return path if path.is_file() else None
+
+    def requested_kind(self, header: Optional[str]) -> Optional[str]:
+        """Kind for this request: the header if valid, else a torch trace while a window is armed."""
+        if header in KINDS:
+            return header
+        armed = self._armed
+        if armed is not None and time.monotonic() < armed["until"]:
+            return armed["kind"]
+        return None
+
+    def arm(self, kind: str, seconds: float) -> Dict[str, Any]:
+        self._armed = {"kind": kind, "until": time.monotonic() + seconds}
+        return {"kind": kind, "seconds": seconds, "mode": "per_request"}
+
+    @contextmanager
+    def capture(self, kind: str, label: str) -> Iterator[Dict[str, Any]]:
+        """Profile the enclosed block on the calling thread; yields the info dict (filled with "file" on exit).
+
+        If another capture is running, the block runs unprofiled and info["skipped"] says why.
+        """
+        info: Dict[str, Any] = {"kind": kind}
+        if not self._busy.acquire(blocking=False):
+            info["skipped"] = "another profile is being captured"
+            yield info
+            return
+        path = self._new_path(label, kind)
+        try:
+            if kind == "torch":
+                from torch.profiler import ProfilerActivity, profile
+
+                with profile(activities=[ProfilerActivity.CPU], record_shapes=True, with_stack=True) as prof:
+                    yield info
+                prof.export_chrome_trace(str(path))
+            else:
+                sampler = StackSampler(self.sample_interval_s, {threading.get_ident()}).start()
+                try:
+                    yield info
+                finally:
+                    sampler.stop()
+                sampler.write(path)
+                info["samples"] = sampler.samples
+        finally:
+            self._busy.release()
+        info["file"] = path.name
+        self._prune()
+
+    def sample_window(self, seconds: float, label: str = "window") -> Dict[str, Any]:
+        """Sample every thread for `seconds` in the background; the .folded file appears when it ends."""
+        if not self._busy.acquire(blocking=False):
+            raise RuntimeError("another profile is being captured")
+        path = self._new_path(label, "sample")
+
+        def _run() -> None:
+            try:
+                sampler = StackSampler(self.sample_interval_s).start()
+                time.sleep(seconds)
+                sampler.stop()
+                sampler.write(path)
+            finally:
+                self._busy.release()
+            self._prune()
+
+        threading.Thread(target=_run, name="profile-window", daemon=True).start()
+        return {"kind": "sample", "seconds": seconds, "mode": "window", "file": path.name}
@@ -0,0 +1,235 @@
+"""
+Content-addressed LRU + TTL result cache, bounded by bytes, with single-flight.
+
+Concurrent get_or_compute() calls for the same key run compute() once; the
+other callers wait for that result instead of repeating the work.
+PersistentResultCache also appends JSON values to a file and reloads the
+unexpired ones on startup; several processes may share the file.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, so the file is only safe for one process
+    fcntl = None
+
+
+def content_key(*parts: Any) -> str:
+    """sha256 over a canonical JSON encoding of parts."""
+    blob = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        max_entries: int = 10_000,
+        ttl_s: float = 3600.0,
+        size_of: Callable[[Any], int] = lambda v: len(json.dumps(v, default=str)),
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.size_of = size_of
+        self._entries: "OrderedDict[str, Tuple[Any, int, float]]" = OrderedDict()  # key -> (value, size, expires_at)
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _drop(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self.bytes -= size
+
+    def _lookup(self, key: str) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        value, _, expires_at = entry
+        if expires_at <= time.monotonic():
+            self._drop(key)
+            self.expirations += 1
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def get(self, key: str, count_miss: bool = True) -> Optional[Any]:
+        """Cached value or None. count_miss=False for a fast-path check that is followed by get_or_compute()."""
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                self.hits += 1
+            elif count_miss:
+                self.misses += 1
+            return value
+
+    def put(self, key: str, value: Any, ttl_s: Optional[float] = None) -> None:
+        size = self.size_of(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (value, size, time.monotonic() + (self.ttl_s if ttl_s is None else ttl_s))
+            self.bytes += size
+            while self.bytes > self.max_bytes or len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any], keep: Optional[Callable[[Any], bool]] = None) -> Tuple[Any, str]:
+        """Return (value, status) where status is "hit", "miss" (computed here) or "coalesced".
+
+        A computed value for which keep(value) is False is returned (and shared with coalesced callers) but not stored.
+        """
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                self.hits += 1
+                return value, "hit"
+            waiting = self._inflight.get(key)
+            if waiting is None:
+                self.misses += 1
+                owner = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+        if waiting is not None:
+            return waiting.result(), "coalesced"
+        try:
+            value = compute()
+        except BaseException as exc:
+            with self._lock:
+                self._inflight.pop(key, None)
+            owner.set_exception(exc)
+            raise
+        # Store before retiring the in-flight entry, so a caller arriving in between finds one or the other
+        try:
+            if keep is None or keep(value):
+                self.put(key, value)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            owner.set_result(value)
+        return value, "miss"
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "max_entries": self.max_entries,
+            "ttl_s": self.ttl_s,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+        }
+
+
+class PersistentResultCache(ResultCache):
+    """ResultCache whose JSON-serialisable values survive restarts via an append-only JSONL file.
+
+    Each put() appends {"key", "value", "expires_at" (wall clock)}; on startup the
+    file is replayed (expired lines skipped) and compacted. The file is rewritten
+    once it holds more than twice as many lines as it had live records. Workers forked by
+    serve.py share the file: appends and rewrites hold an flock on a sidecar
+    .lock file, and a rewrite keeps every live line in the file (not only this
+    process's entries), so one worker's compaction never drops another's appends.
+    """
+
+    def __init__(self, path: Path, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.path = Path(path)
+        self._lock_path = self.path.with_suffix(self.path.suffix + ".lock")
+        self._file_lock = threading.Lock()
+        self._lines = 0
+        self._compact_at = 32  # rewrite once the file has this many lines
+        self._load()
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Exclusive across threads (threading.Lock) and processes (flock, where available)."""
+        with self._file_lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self._lock_path, "a") as lock:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_EX)  # released when the file closes
+                yield
+
+    def _read_live(self) -> "OrderedDict[str, Tuple[Any, float]]":
+        """Unexpired records in the file, last write per key wins, oldest first. Caller holds _locked()."""
+        live: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        if not self.path.exists():
+            return live
+        now = time.time()
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue  # torn final line after a crash
+                live.pop(rec["key"], None)
+                if rec["expires_at"] > now:
+                    live[rec["key"]] = (rec["value"], rec["expires_at"])
+        return live
+
+    def _load(self) -> None:
+        with self._locked():
+            live = self._read_live()
+            self._rewrite(live)
+        now = time.time()
+        for key, (value, expires_at) in live.items():
+            super().put(key, value, ttl_s=expires_at - now)
+
+    def _rewrite(self, live: "OrderedDict[str, Tuple[Any, float]]") -> None:
+        """Replace the file with the newest max_entries live records. Caller holds _locked()."""
+        keep = list(live.items())[-self.max_entries:]
+        tmp = self.path.with_suffix(self.path.suffix + f".{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for key, (value, expires_at) in keep:
+                f.write(json.dumps({"key": key, "value": value, "expires_at": expires_at}) + "\n")
+        os.replace(tmp, self.path)
+        self._lines = len(keep)
+        self._compact_at = 2 * max(len(keep), 16)
+
+    def _compact(self) -> None:
+        with self._locked():
+            self._rewrite(self._read_live())
+
+    def put(self, key: str, value: Any, ttl_s: Optional[float] = None) -> None:
+        """Store and append to the file (blocking file I/O: call it off the event loop)."""
+        super().put(key, value, ttl_s)
+        ttl = self.ttl_s if ttl_s is None else ttl_s
+        line = json.dumps({"key": key, "value": value, "expires_at": time.time() + ttl}) + "\n"
+        with self._locked():
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+            self._lines += 1
+            if self._lines > max(self._compact_at, 2 * len(self)):
+                self._rewrite(self._read_live())
@@ -0,0 +1,191 @@
+"""
+Dynamic micro-batching scheduler: one worker thread owns the model.
+
+Concurrent /analyze requests are queued; the worker collects them for up to
+`max_wait_ms` (or until `max_batch` are waiting), groups them by schema key,
+runs one batched forward pass per group and resolves each caller's future.
+Keeping all model calls on one thread avoids threadpool requests fighting over
+torch intra-op threads.
+"""
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# run_batch(items) -> (results in the same order, batch timings_ms)
+RunBatch = Callable[[List[Any]], Tuple[List[Any], Dict[str, float]]]
+
+
+class SchedulerFull(Exception):
+    """Raised by submit() when the queue is at max_queue."""
+
+
+class SchedulerStopped(Exception):
+    """Raised by submit() once stop() has begun, and set on futures still queued when the worker exits."""
+
+
+@dataclass
+class _Item:
+    payload: Any
+    future: Future
+    enqueued_at: float
+    queue_depth: int
+    key: Optional[str] = None
+    fn: Optional[Callable[[], Any]] = None  # set for call() items: run as-is, never batched
+
+
+@dataclass
+class SchedulerStats:
+    batches: int = 0
+    items: int = 0
+    max_batch_seen: int = 0
+    last_batch_sizes: List[int] = field(default_factory=list)
+
+
+class InferenceScheduler:
+    def __init__(
+        self,
+        run_batch: RunBatch,
+        key: Callable[[Any], str],
+        max_batch: int = 16,
+        max_wait_ms: float = 5.0,
+        max_queue: int = 1024,
+        torch_threads: Optional[int] = None,
+    ) -> None:
+        self.run_batch = run_batch
+        self.key = key
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        self.max_queue = max_queue
+        self.torch_threads = torch_threads
+        self.stats = SchedulerStats()
+        self._queue: "queue.Queue[Optional[_Item]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()  # orders _put() against stop(): nothing is queued after the sentinel
+        self._stopping = False
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._loop, name="inference-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Finish the items queued before stop(), fail anything behind them with SchedulerStopped, reject new ones."""
+        if not self.running:
+            return
+        with self._lock:
+            self._stopping = True
+            self._queue.put(None)
+        self._thread.join(timeout)
+        if not self._thread.is_alive():
+            self._drain()  # otherwise the worker drains once it reaches the sentinel
+        self._thread = None
+
+    def _drain(self) -> None:
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None and item.future.set_running_or_notify_cancel():
+                item.future.set_exception(SchedulerStopped("inference scheduler stopped"))
+
+    def submit(self, payload: Any) -> Future:
+        """Queue one request; the future resolves to (result, per-request scheduler stats)."""
+        return self._put(_Item(payload, Future(), time.perf_counter(), self.depth(), key=self.key(payload)))
+
+    def call(self, fn: Callable[[], Any]) -> Future:
+        """Run fn on the model thread (serialized with batches); the future resolves to its return value."""
+        return self._put(_Item(None, Future(), time.perf_counter(), self.depth(), fn=fn))
+
+    def _put(self, item: _Item) -> Future:
+        if item.queue_depth >= self.max_queue:
+            raise SchedulerFull(f"inference queue full ({item.queue_depth} waiting)")
+        with self._lock:
+            if self._stopping:
+                raise SchedulerStopped("inference scheduler is stopping")
+            self._queue.put(item)
+        return item.future
+
+    def _collect(self, first: _Item) -> Tuple[List[_Item], bool]:
+        """Gather up to max_batch items, waiting at most max_wait_ms after the first one."""
+        items = [first]
+        deadline = time.perf_counter() + self.max_wait_ms / 1000.0
+        while len(items) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return items, True
+            items.append(item)
+        return items, False
+
+    def _loop(self) -> None:
+        if self.torch_threads:
+            import torch
+            torch.set_num_threads(self.torch_threads)
+        while True:
+            first = self._queue.get()
+            if first is None:
+                break
+            items, stop = self._collect(first)
+            self._run(items)
+            if stop:
+                break
+        self._drain()
+
+    def _run(self, items: List[_Item]) -> None:
+        groups: Dict[str, List[_Item]] = {}
+        for item in items:
+            if item.fn is not None:
+                self._run_call(item)
+            else:
+                groups.setdefault(item.key or "", []).append(item)
+        for group in groups.values():
+            self._run_group(group)
+
+    def _run_call(self, item: _Item) -> None:
+        if not item.future.set_running_or_notify_cancel():
+            return
+        try:
+            item.future.set_result(item.fn())
+        except BaseException as exc:
+            item.future.set_exception(exc)
+
+    def _run_group(self, group: List[_Item]) -> None:
+        group = [item for item in group if item.future.set_running_or_notify_cancel()]
+        if not group:
+            return
+        started = time.perf_counter()
+        try:
+            results, timings = self.run_batch([item.payload for item in group])
+        except BaseException as exc:
+            for item in group:
+                item.future.set_exception(exc)
+            return
+        self.stats.batches += 1
+        self.stats.items += len(group)
+        self.stats.max_batch_seen = max(self.stats.max_batch_seen, len(group))
+        self.stats.last_batch_sizes = (self.stats.last_batch_sizes + [len(group)])[-100:]
+        for item, result in zip(group, results):
+            item.future.set_result((result, {
+                "batch_size": float(len(group)),
+                "queue_wait_ms": (started - item.enqueued_at) * 1000.0,
+                "queue_depth": float(item.queue_depth),
+                "batch_total_ms": timings.get("total", 0.0),
+            }))
@@ -0,0 +1,45 @@
+"""
+Threshold-independent entity scores.
+
+The entity threshold only filters span scores after the model has run.
+Severity, intent, ticket fields and routing do not depend on it. An
+/analyze request with "rawScores": true therefore extracts entities once
+at a low floor and returns every span with its confidence. filter_entities()
+and sweep() then give the entities at any threshold >= that floor without
+running the model again. GLiNER2 keeps spans scoring >= threshold, and span
+checkpoints resolve overlaps greedily by confidence. Dropping low-scoring spans
+afterwards therefore gives the same entities as running at that threshold.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List
+
+EntityScores = Dict[str, List[Dict[str, Any]]]  # label -> [{"text", "confidence"}], highest score first
+
+
+def entity_scores(raw: Any) -> EntityScores:
+    """{label: [{"text", "confidence"}]} from an extract(..., include_confidence=True) entities result."""
+    entities = raw.get("entities", {}) if isinstance(raw, dict) else {}
+    scores: EntityScores = {}
+    for label, spans in entities.items():
+        spans = spans if isinstance(spans, list) else [spans] if spans else []
+        scores[label] = sorted(
+            ({"text": s["text"], "confidence": float(s["confidence"])} for s in spans if isinstance(s, dict) and s.get("text")),
+            key=lambda s: -s["confidence"],
+        )
+    return scores
+
+
+def filter_entities(scores: EntityScores, threshold: float) -> Dict[str, Any]:
+    """Entities at `threshold`, in the same {"entities": {label: [text, ...]}} shape /analyze returns."""
+    return {"entities": {label: [s["text"] for s in spans if s["confidence"] >= threshold] for label, spans in scores.items()}}
+
+
+def sweep(scores: EntityScores, thresholds: Iterable[float], floor: float = 0.0) -> Dict[float, Dict[str, Any]]:
+    """filter_entities() at every threshold. Thresholds below the extraction floor would miss spans, so they raise."""
+    out: Dict[float, Dict[str, Any]] = {}
+    for threshold in thresholds:
+        if threshold < floor:
+            raise ValueError(f"threshold {threshold} is below the score floor {floor} the spans were extracted at")
+        out[threshold] = filter_entities(scores, threshold)
+    return out
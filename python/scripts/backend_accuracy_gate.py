@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Accuracy + latency gate for the int8 / ONNX inference backends.
+Runs the golden tickets through the fp32 torch baseline and each candidate
+backend in-process, then reports routing agreement with fp32, routing accuracy
+vs expected_routing, and per-ticket latency (mean / p50 / p95).
+Exits 1 if any candidate agrees with fp32 on fewer than --min-agreement % of tickets.
+Usage: python python/scripts/backend_accuracy_gate.py [--backends int8,onnx] [--min-agreement 95]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(REPO_ROOT / "python"))
+sys.path.insert(0, str(REPO_ROOT / "python" / "scripts"))
+
+import server  # noqa: E402
+from backends import BACKENDS, load_extractor  # noqa: E402
+from generate_metrics_report import _percentile  # noqa: E402
+
+GOLDEN_TICKETS_PATH = REPO_ROOT / "python" / "tests" / "fixtures" / "golden_tickets.json"
+
+
+def _run_backend(backend: str, tickets: List[Dict[str, Any]], threshold: float) -> Tuple[List[Dict[str, Any]], List[float], Dict[str, float]]:
+    """Routing per ticket and wall-clock latency (ms) with the given backend loaded."""
+    server.extractor, load_ms = load_extractor(server.MODEL_DIR or server.MODEL_ID, backend)
+    # First call pays lazy init; keep it out of the latency numbers
+    server._analyze_one(server.AnalyzeRequest(text=tickets[0]["text"], threshold=threshold, preset=tickets[0]["preset"]))
+    routings, latencies = [], []
+    for item in tickets:
+        req = server.AnalyzeRequest(text=item["text"], threshold=threshold, preset=item["preset"])
+        t0 = time.perf_counter()
+        result = server._analyze_one(req)
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+        routings.append(result.routing)
+    return routings, latencies, load_ms
+
+
+def _same(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    return a.get("next_queue") == b.get("next_queue") and a.get("priority") == b.get("priority")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--backends", default="int8,onnx", help="Comma-separated candidates to compare with fp32")
+    parser.add_argument("--threshold", type=float, default=0.6)
+    parser.add_argument("--min-agreement", type=float, default=95.0, help="Min %% of tickets routed like fp32")
+    parser.add_argument("--json", type=Path, help="Also write the report as JSON here")
+    args = parser.parse_args()
+
+    candidates = [b.strip() for b in args.backends.split(",") if b.strip()]
+    unknown = [b for b in candidates if b not in BACKENDS]
+    if unknown:
+        print(f"Unknown backend(s): {', '.join(unknown)}; expected {', '.join(BACKENDS)}", file=sys.stderr)
+        return 2
+    with open(GOLDEN_TICKETS_PATH) as f:
+        tickets = json.load(f)
+
+    baseline: List[Dict[str, Any]] = []
+    report: Dict[str, Any] = {"threshold": args.threshold, "tickets": len(tickets), "backends": {}}
+    failed = []
+    for backend in ["torch"] + candidates:
+        routings, latencies, load_ms = _run_backend(backend, tickets, args.threshold)
+        if backend == "torch":
+            baseline = routings
+        agree = sum(_same(r, b) for r, b in zip(routings, baseline))
+        correct = sum(_same(r, item["expected_routing"]) for r, item in zip(routings, tickets))
+        vals = sorted(latencies)
+        row = {
+            "agreement_pct": round(100 * agree / len(tickets), 1),
+            "accuracy_pct": round(100 * correct / len(tickets), 1),
+            "mean_ms": round(sum(vals) / len(vals), 1),
+            "p50_ms": round(_percentile(vals, 50), 1),
+            "p95_ms": round(_percentile(vals, 95), 1),
+            "load_ms": {k: round(v, 1) for k, v in load_ms.items()},
+        }
+        report["backends"][backend] = row
+        if backend != "torch" and row["agreement_pct"] < args.min_agreement:
+            failed.append(backend)
+
+    print("| Backend | Agreement vs fp32 | Routing accuracy | Mean (ms) | p50 (ms) | p95 (ms) |")
+    print("|---------|-------------------|------------------|-----------|----------|----------|")
+    for backend, row in report["backends"].items():
+        print(f"| {backend} | {row['agreement_pct']}% | {row['accuracy_pct']}% | {row['mean_ms']} | {row['p50_ms']} | {row['p95_ms']} |")
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+    if failed:
+        print(f"FAIL: {', '.join(failed)} below {args.min_agreement}% agreement with fp32", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
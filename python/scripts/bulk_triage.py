@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Offline bulk triage: JSONL tickets in, JSONL triage results out, in constant memory.
+Each input line is {"text": ..., "preset"?: ..., "threshold"?: ..., "mode"?: ..., "id"?: ...};
+each output line is {"line", "id", "preset", "routing", "severity", "intent", "entities",
+"ticket_fields", "timings_ms"} or {"line", "id", "error"}, in input order.
+Tickets run through server.py's batched analyze path (_analyze_batch + _route) on a process
+pool, one model per worker. Progress is checkpointed to <output>.ckpt after every chunk, so
+re-running the same command resumes an interrupted run where it stopped.
+Usage: python python/scripts/bulk_triage.py tickets.jsonl triaged.jsonl [--workers 4] [--batch-size 16]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(REPO_ROOT / "python"))
+
+# Bulk runs stay out of the server's triage history and caches; draft memory is not used here
+os.environ.setdefault("TRIAGE_STORE_PATH", "")
+os.environ.setdefault("TRIAGE_CACHE", "0")
+os.environ.setdefault("TRIAGE_MEMORY_PER_QUEUE", "1")
+
+import server  # noqa: E402
+from backends import BACKENDS, load_extractor  # noqa: E402
+
+Chunk = Tuple[int, List[bytes], int]  # (first line number, raw lines, input byte offset after the chunk)
+
+
+def _read_chunks(path: Path, offset: int, first_line: int, chunk_size: int) -> Iterator[Chunk]:
+    """Yield chunk_size raw lines at a time, starting at byte offset (resume point)."""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        line_no = first_line
+        lines: List[bytes] = []
+        for raw in iter(f.readline, b""):
+            lines.append(raw)
+            if len(lines) == chunk_size:
+                yield line_no, lines, f.tell()
+                line_no += len(lines)
+                lines = []
+        if lines:
+            yield line_no, lines, f.tell()
+
+
+def _worker_init(model_source: str, backend: str, threads: int) -> None:
+    import torch
+
+    if threads:
+        torch.set_num_threads(threads)
+    server.extractor, _ = load_extractor(model_source, backend)
+
+
+def _triage_chunk(chunk: Chunk, defaults: Dict[str, Any], batch_size: int) -> List[str]:
+    """Triage one chunk; returns output JSONL lines in input order."""
+    first_line, raw_lines, _ = chunk
+    out: List[Optional[Dict[str, Any]]] = [None] * len(raw_lines)
+    groups: Dict[str, List[Tuple[int, Any, server.AnalyzeRequest]]] = {}
+    for i, raw in enumerate(raw_lines):
+        line_no, ticket_id = first_line + i, first_line + i
+        if not raw.strip():
+            out[i] = {"line": line_no, "id": ticket_id, "error": "empty line"}
+            continue
+        try:
+            rec = json.loads(raw)
+            ticket_id = rec.get("id", line_no)
+            req = server.AnalyzeRequest(**{**defaults, **{k: rec[k] for k in ("text", "preset", "threshold", "mode") if k in rec}})
+        except Exception as exc:
+            out[i] = {"line": line_no, "id": ticket_id, "error": f"{type(exc).__name__}: {exc}"}
+            continue
+        groups.setdefault(server._schema_key(req), []).append((i, ticket_id, req))
+
+    for members in groups.values():
+        for start in range(0, len(members), batch_size):
+            batch = members[start:start + batch_size]
+            try:
+                results, _ = server._analyze_batch([req for _, _, req in batch])
+            except Exception as exc:
+                for i, ticket_id, _ in batch:
+                    out[i] = {"line": first_line + i, "id": ticket_id, "error": f"{type(exc).__name__}: {exc}"}
+                continue
+            for (i, ticket_id, _), result in zip(batch, results):
+                out[i] = {"line": first_line + i, "id": ticket_id, **result.model_dump(exclude_none=True)}
+    return [json.dumps(rec, default=str) + "\n" for rec in out]
+
+
+class _InlineFuture:
+    """Future-like wrapper for --workers 0 (run in this process)."""
+
+    def __init__(self, lines: List[str]) -> None:
+        self._lines = lines
+
+    def result(self) -> List[str]:
+        return self._lines
+
+
+def _load_checkpoint(ckpt: Path, input_path: Path) -> Dict[str, Any]:
+    if not ckpt.exists():
+        return {"input": str(input_path), "input_offset": 0, "lines_done": 0, "output_bytes": 0}
+    state = json.loads(ckpt.read_text())
+    if state.get("input") != str(input_path):
+        raise SystemExit(f"{ckpt} belongs to {state.get('input')}; pass --restart to start over")
+    return state
+
+
+def _save_checkpoint(ckpt: Path, state: Dict[str, Any]) -> None:
+    tmp = ckpt.with_suffix(ckpt.suffix + ".tmp")
+    tmp.write_text(json.dumps(state))
+    os.replace(tmp, ckpt)
+
+
+def _fmt_eta(seconds: float) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def run(
+    input_path: Path,
+    output_path: Path,
+    *,
+    workers: int = 1,
+    threads_per_worker: int = 0,
+    chunk_size: int = 64,
+    batch_size: int = 16,
+    defaults: Optional[Dict[str, Any]] = None,
+    backend: str = "torch",
+    restart: bool = False,
+    progress: bool = True,
+) -> Dict[str, Any]:
+    """Triage input_path into output_path, resuming from <output>.ckpt; returns the final checkpoint state."""
+    input_path, output_path = input_path.resolve(), output_path.resolve()
+    ckpt = output_path.with_name(output_path.name + ".ckpt")
+    if restart:
+        ckpt.unlink(missing_ok=True)
+    elif output_path.exists() and not ckpt.exists():
+        raise SystemExit(f"{output_path} exists and has no checkpoint; pass --restart to overwrite")
+    state = _load_checkpoint(ckpt, input_path)
+    defaults = defaults or {"preset": "saas_support", "threshold": 0.6}
+
+    # Drop anything written after the last checkpoint (a chunk interrupted mid-write)
+    with open(output_path, "ab") as f:
+        f.truncate(state["output_bytes"])
+    _save_checkpoint(ckpt, state)
+
+    model_source = server.MODEL_DIR or server.MODEL_ID
+    if workers > 0:
+        pool = ProcessPoolExecutor(workers, initializer=_worker_init, initargs=(model_source, backend, threads_per_worker))
+        window = 2 * workers
+    else:
+        _worker_init(model_source, backend, threads_per_worker)
+        pool, window = None, 1
+
+    total_bytes = input_path.stat().st_size
+    start_offset, start_lines = state["input_offset"], state["lines_done"]
+    t0 = last_report = time.perf_counter()
+    pending: "deque[Tuple[Any, Chunk]]" = deque()
+    chunks = _read_chunks(input_path, state["input_offset"], state["lines_done"], chunk_size)
+
+    def report(final: bool = False) -> None:
+        elapsed = time.perf_counter() - t0
+        done = state["lines_done"] - start_lines
+        rate = done / elapsed if elapsed > 0 else 0.0
+        byte_rate = (state["input_offset"] - start_offset) / elapsed if elapsed > 0 else 0.0
+        eta = (total_bytes - state["input_offset"]) / byte_rate if byte_rate > 0 else 0.0
+        pct = 100.0 * state["input_offset"] / total_bytes if total_bytes else 100.0
+        print(
+            f"\r[bulk] {state['lines_done']:,} tickets  {rate:,.1f}/s  {pct:5.1f}%  ETA {_fmt_eta(eta)}",
+            end="\n" if final else "",
+            file=sys.stderr,
+            flush=True,
+        )
+
+    try:
+        with open(output_path, "ab") as out:
+            exhausted = False
+            while pending or not exhausted:
+                while not exhausted and len(pending) < window:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        exhausted = True
+                        break
+                    if pool is not None:
+                        fut: Any = pool.submit(_triage_chunk, chunk, defaults, batch_size)
+                    else:
+                        fut = _InlineFuture(_triage_chunk(chunk, defaults, batch_size))
+                    pending.append((fut, chunk))
+                if not pending:
+                    break
+                fut, (first_line, raw_lines, end_offset) = pending.popleft()
+                out.write("".join(fut.result()).encode("utf-8"))
+                out.flush()
+                os.fsync(out.fileno())
+                state.update(input_offset=end_offset, lines_done=first_line + len(raw_lines), output_bytes=out.tell())
+                _save_checkpoint(ckpt, state)
+                if progress and time.perf_counter() - last_report >= 1.0:
+                    report()
+                    last_report = time.perf_counter()
+    except KeyboardInterrupt:
+        if progress:
+            report(final=True)
+        print(f"[bulk] interrupted; re-run the same command to resume from line {state['lines_done']}", file=sys.stderr)
+        raise
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+    if progress:
+        report(final=True)
+    ckpt.unlink(missing_ok=True)
+    return state
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Offline bulk triage over JSONL with resume")
+    parser.add_argument("input", type=Path, help="JSONL tickets")
+    parser.add_argument("output", type=Path, help="JSONL results (resumes via <output>.ckpt)")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2), help="Processes, one model each (0 = in-process)")
+    parser.add_argument("--threads-per-worker", type=int, default=0, help="torch threads per worker (0 = torch default)")
+    parser.add_argument("--chunk-size", type=int, default=64, help="Tickets per worker task (and per checkpoint)")
+    parser.add_argument("--batch-size", type=int, default=16, help="Tickets per batched forward pass")
+    parser.add_argument("--preset", default="saas_support", help="Preset for lines without one")
+    parser.add_argument("--threshold", type=float, default=0.6, help="Entity threshold for lines without one")
+    parser.add_argument("--mode", choices=["staged", "fused", "cascade"], default=server.TRIAGE_MODE)
+    parser.add_argument("--backend", choices=BACKENDS, default=server.TRIAGE_BACKEND)
+    parser.add_argument("--restart", action="store_true", help="Ignore any checkpoint and overwrite the output")
+    args = parser.parse_args()
+
+    try:
+        state = run(
+            args.input,
+            args.output,
+            workers=args.workers,
+            threads_per_worker=args.threads_per_worker,
+            chunk_size=args.chunk_size,
+            batch_size=args.batch_size,
+            defaults={"preset": args.preset, "threshold": args.threshold, "mode": args.mode},
+            backend=args.backend,
+            restart=args.restart,
+        )
+    except KeyboardInterrupt:
+        return 130
+    print(f"[bulk] wrote {state['lines_done']:,} results to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Golden-set report for cascade mode: what the regex prefilter decides, and what that costs in routing.
+Runs every golden ticket in-process through the full staged pipeline and through mode="cascade".
+Reports routing agreement with the full pipeline, routing accuracy vs expected_routing, latency
+(mean / p50 / p95) and the latency saved, plus how often rules decided each stage, per preset.
+--rules-only skips the model: it reports rule coverage, and routing accuracy on tickets where the
+rules decided both severity and intent.
+Exits 1 if cascade agrees with the full pipeline on fewer than --min-agreement % of tickets.
+Usage: python python/scripts/cascade_report.py [--min-agreement 95] [--rules-only] [--json report.json]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(REPO_ROOT / "python"))
+sys.path.insert(0, str(REPO_ROOT / "python" / "scripts"))
+
+# Report runs stay out of the triage history
+os.environ.setdefault("TRIAGE_STORE_PATH", "")
+
+import prefilter  # noqa: E402
+import server  # noqa: E402
+from backends import BACKENDS, load_extractor  # noqa: E402
+from generate_metrics_report import _percentile  # noqa: E402
+
+GOLDEN_TICKETS_PATH = REPO_ROOT / "python" / "tests" / "fixtures" / "golden_tickets.json"
+RULE_STAGES = ("severity", "intent", "entities")
+
+
+def _same(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    return a.get("next_queue") == b.get("next_queue") and a.get("priority") == b.get("priority")
+
+
+def _latency(values: List[float]) -> Dict[str, float]:
+    vals = sorted(values)
+    return {
+        "mean_ms": round(sum(vals) / len(vals), 1),
+        "p50_ms": round(_percentile(vals, 50), 1),
+        "p95_ms": round(_percentile(vals, 95), 1),
+    }
+
+
+def _coverage(tickets: List[Dict[str, Any]], decided_by: List[Dict[str, str]]) -> Dict[str, Dict[str, Any]]:
+    """Per preset (and "all"): tickets and how many had each stage decided by rules."""
+    out: Dict[str, Dict[str, Any]] = {}
+    for item, by in zip(tickets, decided_by):
+        for key in (item["preset"], "all"):
+            row = out.setdefault(key, {"tickets": 0, **{stage: 0 for stage in RULE_STAGES}})
+            row["tickets"] += 1
+            for stage in RULE_STAGES:
+                row[stage] += by.get(stage) == "rules"
+    return {**{k: v for k, v in out.items() if k != "all"}, **({"all": out["all"]} if out else {})}
+
+
+def build_report(tickets: List[Dict[str, Any]], full: List[Dict[str, Any]], cascade: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Compare per-ticket runs ({"routing", "ms", "decided_by"}) of the full pipeline and cascade mode."""
+    n = len(tickets)
+    agree = sum(_same(c["routing"], f["routing"]) for c, f in zip(cascade, full))
+    report: Dict[str, Any] = {"tickets": n, "pipelines": {}}
+    for name, runs in (("full", full), ("cascade", cascade)):
+        correct = sum(_same(r["routing"], item["expected_routing"]) for r, item in zip(runs, tickets))
+        report["pipelines"][name] = {"accuracy_pct": round(100 * correct / n, 1), **_latency([r["ms"] for r in runs])}
+    report["agreement_pct"] = round(100 * agree / n, 1)
+    full_mean, cascade_mean = report["pipelines"]["full"]["mean_ms"], report["pipelines"]["cascade"]["mean_ms"]
+    report["latency_saved_pct"] = round(100 * (1 - cascade_mean / full_mean), 1) if full_mean > 0 else 0.0
+    report["coverage"] = _coverage(tickets, [r["decided_by"] or {} for r in cascade])
+    report["disagreements"] = [
+        {"index": i, "preset": item["preset"], "full": f["routing"], "cascade": c["routing"], "decided_by": c["decided_by"]}
+        for i, (item, f, c) in enumerate(zip(tickets, full, cascade))
+        if not _same(c["routing"], f["routing"])
+    ]
+    return report
+
+
+def rules_only_report(tickets: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Rule coverage without the model; accuracy only where rules decided the whole routing input."""
+    decided_by, both, correct = [], 0, 0
+    for item in tickets:
+        req = server.AnalyzeRequest(text=item["text"], preset=item["preset"], mode="cascade")
+        decision = server._cascade(req) or prefilter.Decision()
+        decided_by.append(decision.decided_by())
+        if decision.severity and decision.intent:
+            both += 1
+            routing = server._route(server._label(decision.severity), server._label(decision.intent))
+            correct += _same(routing, item["expected_routing"])
+    return {
+        "tickets": len(tickets),
+        "coverage": _coverage(tickets, decided_by),
+        "routed_by_rules": both,
+        "rules_accuracy_pct": round(100 * correct / both, 1) if both else None,
+    }
+
+
+def _run(mode: str, tickets: List[Dict[str, Any]], threshold: float) -> List[Dict[str, Any]]:
+    runs = []
+    for item in tickets:
+        req = server.AnalyzeRequest(text=item["text"], threshold=threshold, preset=item["preset"], mode=mode)
+        t0 = time.perf_counter()
+        result = server._analyze_one(req)
+        runs.append({"routing": result.routing, "ms": (time.perf_counter() - t0) * 1000.0, "decided_by": result.decided_by})
+    return runs
+
+
+def _print_coverage(coverage: Dict[str, Dict[str, Any]]) -> None:
+    print("| Preset | Tickets | Severity by rules | Intent by rules | Entities by rules |")
+    print("|--------|---------|-------------------|-----------------|-------------------|")
+    for preset, row in coverage.items():
+        print(f"| {preset} | {row['tickets']} | {row['severity']} | {row['intent']} | {row['entities']} |")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--threshold", type=float, default=0.6)
+    parser.add_argument("--backend", choices=BACKENDS, default=server.TRIAGE_BACKEND)
+    parser.add_argument("--min-agreement", type=float, default=95.0, help="Min %% of tickets routed like the full pipeline")
+    parser.add_argument("--rules-only", action="store_true", help="Report rule coverage without loading the model")
+    parser.add_argument("--json", type=Path, help="Also write the report as JSON here")
+    args = parser.parse_args()
+
+    with open(GOLDEN_TICKETS_PATH) as f:
+        tickets = json.load(f)
+
+    if args.rules_only:
+        report = rules_only_report(tickets)
+        _print_coverage(report["coverage"])
+        print(f"\nRouted entirely by rules: {report['routed_by_rules']}/{report['tickets']} "
+              f"(routing accuracy {report['rules_accuracy_pct']}%)")
+    else:
+        server.extractor, _ = load_extractor(server.MODEL_DIR or server.MODEL_ID, args.backend)
+        # First call pays lazy init; keep it out of the latency numbers
+        server._analyze_one(server.AnalyzeRequest(text=tickets[0]["text"], threshold=args.threshold, preset=tickets[0]["preset"], mode="staged"))
+        full = _run("staged", tickets, args.threshold)
+        cascade = _run("cascade", tickets, args.threshold)
+        report = build_report(tickets, full, cascade)
+
+        print("| Pipeline | Agreement vs full | Routing accuracy | Mean (ms) | p50 (ms) | p95 (ms) |")
+        print("|----------|-------------------|------------------|-----------|----------|----------|")
+        for name, row in report["pipelines"].items():
+            agreement = 100.0 if name == "full" else report["agreement_pct"]
+            print(f"| {name} | {agreement}% | {row['accuracy_pct']}% | {row['mean_ms']} | {row['p50_ms']} | {row['p95_ms']} |")
+        print(f"\nLatency saved by cascade: {report['latency_saved_pct']}% of mean per-ticket time\n")
+        _print_coverage(report["coverage"])
+        for miss in report["disagreements"]:
+            print(f"- ticket {miss['index']} ({miss['preset']}): full {miss['full']} vs cascade {miss['cascade']} {miss['decided_by']}")
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+    if not args.rules_only and report["agreement_pct"] < args.min_agreement:
+        print(f"FAIL: cascade agrees with the full pipeline on {report['agreement_pct']}% < {args.min_agreement}%", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Concurrent load test for /analyze against a real uvicorn server.
+Starts `uvicorn server:app` (or targets --url), waits for /health, then offers golden tickets
+at each --rates level with open-loop Poisson arrivals: requests go out on schedule whether or
+not earlier ones have returned, so queueing shows up as latency instead of a slower client.
+Reports tickets/sec, errors (503s are requests shed by admission control), degraded responses
+(stages skipped under load or --deadline-ms), in-flight concurrency and p50/p95/p99 of the client
+round trip and of every server stage in timings_ms. Results go to python/tests/.load_results.json (read by
+generate_metrics_report.py). With a baseline file, exits 1 if throughput drops or p50/p95/p99
+latency grows by more than --tolerance at any level.
+Usage: python python/scripts/load_benchmark.py [--rates 2,4,8,16] [--duration 20] [--save-baseline]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(REPO_ROOT / "python" / "scripts"))
+
+from generate_metrics_report import _percentile  # noqa: E402
+
+GOLDEN_TICKETS_PATH = REPO_ROOT / "python" / "tests" / "fixtures" / "golden_tickets.json"
+RESULTS_PATH = REPO_ROOT / "python" / "tests" / ".load_results.json"
+BASELINE_PATH = REPO_ROOT / "python" / "tests" / "fixtures" / "load_baseline.json"
+
+# timings_ms keys that are not durations
+NON_STAGE_KEYS = {"batch_size", "chunks"}
+GATED_PERCENTILES = ("p50", "p95", "p99")
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    vals = sorted(values)
+    if not vals:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "mean": 0.0}
+    return {
+        "p50": round(_percentile(vals, 50), 1),
+        "p95": round(_percentile(vals, 95), 1),
+        "p99": round(_percentile(vals, 99), 1),
+        "mean": round(sum(vals) / len(vals), 1),
+    }
+
+
+async def run_level(
+    client: Any, tickets: List[Dict[str, Any]], rate: float, duration_s: float, threshold: float, seed: int = 0, deadline_ms: Optional[float] = None
+) -> Dict[str, Any]:
+    """Offer `rate` tickets/sec for duration_s (Poisson arrivals) and summarize what came back."""
+    rng = random.Random(seed)
+    headers = {"X-Triage-Deadline-Ms": str(deadline_ms)} if deadline_ms else None
+    latencies: List[float] = []
+    degraded = 0  # 200s that skipped entities / extract_json (admission ladder or deadline)
+    stages: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    in_flight = {"now": 0, "peak": 0, "samples": []}
+
+    async def one(ticket: Dict[str, Any]) -> None:
+        nonlocal degraded
+        in_flight["now"] += 1
+        in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+        in_flight["samples"].append(in_flight["now"])
+        t0 = time.perf_counter()
+        try:
+            resp = await client.post("/analyze", json={"text": ticket["text"], "preset": ticket["preset"], "threshold": threshold}, headers=headers)
+            elapsed = (time.perf_counter() - t0) * 1000.0
+            if resp.status_code != 200:
+                errors[str(resp.status_code)] = errors.get(str(resp.status_code), 0) + 1
+                return
+            latencies.append(elapsed)
+            data = resp.json()
+            degraded += bool(data.get("skipped_stages"))
+            for key, value in (data.get("timings_ms") or {}).items():
+                if key not in NON_STAGE_KEYS and isinstance(value, (int, float)):
+                    stages.setdefault(key, []).append(float(value))
+        except Exception as exc:
+            errors[type(exc).__name__] = errors.get(type(exc).__name__, 0) + 1
+        finally:
+            in_flight["now"] -= 1
+
+    tasks = []
+    t_start = time.perf_counter()
+    next_at = 0.0
+    i = 0
+    while next_at < duration_s:
+        delay = t_start + next_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(one(tickets[i % len(tickets)])))
+        i += 1
+        next_at += rng.expovariate(rate)
+    await asyncio.gather(*tasks)
+    wall_s = time.perf_counter() - t_start
+
+    samples = in_flight["samples"]
+    return {
+        "offered_rps": rate,
+        "sent": len(tasks),
+        "ok": len(latencies),
+        "errors": errors,
+        "degraded": degraded,
+        "wall_s": round(wall_s, 2),
+        "tickets_per_s": round(len(latencies) / wall_s, 2) if wall_s > 0 else 0.0,
+        "in_flight_mean": round(sum(samples) / len(samples), 1) if samples else 0.0,
+        "in_flight_peak": in_flight["peak"],
+        "latency_ms": summarize(latencies),
+        "stages_ms": {key: summarize(vals) for key, vals in sorted(stages.items())},
+    }
+
+
+def compare_to_baseline(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Regressions beyond tolerance (fraction) at each offered rate present in both runs."""
+    base_levels = {float(level["offered_rps"]): level for level in baseline.get("levels", [])}
+    failures = []
+    for level in results.get("levels", []):
+        base = base_levels.get(float(level["offered_rps"]))
+        if base is None:
+            continue
+        rate = level["offered_rps"]
+        floor = base["tickets_per_s"] * (1.0 - tolerance)
+        if level["tickets_per_s"] < floor:
+            failures.append(f"{rate} rps: throughput {level['tickets_per_s']}/s < {floor:.2f}/s (baseline {base['tickets_per_s']}/s)")
+        for p in GATED_PERCENTILES:
+            ceiling = base["latency_ms"][p] * (1.0 + tolerance)
+            if level["latency_ms"][p] > ceiling:
+                failures.append(f"{rate} rps: {p} {level['latency_ms'][p]} ms > {ceiling:.1f} ms (baseline {base['latency_ms'][p]} ms)")
+    return failures
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_server(port: int) -> subprocess.Popen:
+    env = dict(os.environ)
+    # Measure the model, not the result cache; keep benchmark tickets out of the triage history
+    env.setdefault("TRIAGE_CACHE", "0")
+    env.setdefault("TRIAGE_STORE_PATH", "")
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=str(REPO_ROOT / "python"),
+        env=env,
+    )
+
+
+async def _wait_ready(client: Any, timeout_s: float) -> Dict[str, Any]:
+    import httpx
+
+    deadline = time.monotonic() + timeout_s
+    while True:
+        try:
+            resp: Optional[Any] = await client.get("/health")
+        except httpx.TransportError:  # server still starting
+            resp = None
+        if resp is not None and resp.status_code == 200:
+            return resp.json()
+        if resp is not None and resp.json().get("state") == "error":
+            raise SystemExit(f"Model failed to load: {resp.json().get('error')}")
+        if time.monotonic() > deadline:
+            raise SystemExit(f"Server not ready after {timeout_s:.0f}s")
+        await asyncio.sleep(0.5)
+
+
+async def _bench(url: str, rates: List[float], args: argparse.Namespace) -> Dict[str, Any]:
+    import httpx
+
+    with open(GOLDEN_TICKETS_PATH) as f:
+        tickets = json.load(f)
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=256)
+    async with httpx.AsyncClient(base_url=url, timeout=args.timeout, limits=limits) as client:
+        health = await _wait_ready(client, args.ready_timeout)
+        if args.warmup > 0:
+            await run_level(client, tickets, rates[0], args.warmup, args.threshold, seed=-1, deadline_ms=args.deadline_ms)
+        levels = []
+        for rate in rates:
+            level = await run_level(client, tickets, rate, args.duration, args.threshold, seed=args.seed, deadline_ms=args.deadline_ms)
+            levels.append(level)
+            lat = level["latency_ms"]
+            print(
+                f"[load] {rate:>6.1f} rps offered  {level['tickets_per_s']:>6.2f}/s served  "
+                f"p50 {lat['p50']:.0f}  p95 {lat['p95']:.0f}  p99 {lat['p99']:.0f} ms  "
+                f"in-flight {level['in_flight_mean']} (peak {level['in_flight_peak']})  errors {sum(level['errors'].values())}  degraded {level['degraded']}",
+                file=sys.stderr,
+            )
+    return {
+        "model": health.get("model"),
+        "backend": health.get("backend"),
+        "threshold": args.threshold,
+        "duration_s": args.duration,
+        "levels": levels,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Open-loop /analyze load test with a baseline regression gate")
+    parser.add_argument("--url", help="Benchmark a running server instead of starting uvicorn")
+    parser.add_argument("--rates", default="2,4,8,16", help="Comma-separated offered loads (tickets/sec), one level each")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of arrivals per level")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Seconds of unrecorded load before the first level")
+    parser.add_argument("--threshold", type=float, default=0.6)
+    parser.add_argument("--seed", type=int, default=0, help="Arrival schedule seed (same seed = same schedule)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout (s)")
+    parser.add_argument("--deadline-ms", type=float, help="Send X-Triage-Deadline-Ms with every request")
+    parser.add_argument("--ready-timeout", type=float, default=600.0, help="Max wait for the model to load (s)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="Write this run as the new baseline instead of gating")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed regression vs baseline (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    rates = [float(r) for r in args.rates.split(",") if r.strip()]
+    proc: Optional[subprocess.Popen] = None
+    url = args.url
+    if url is None:
+        port = _free_port()
+        proc = _start_server(port)
+        url = f"http://127.0.0.1:{port}"
+    try:
+        results = asyncio.run(_bench(url, rates, args))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+    RESULTS_PATH.write_text(json.dumps(results, indent=2))
+    print(f"Wrote {RESULTS_PATH}")
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Saved baseline {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one", file=sys.stderr)
+        return 0
+    failures = compare_to_baseline(results, json.loads(args.baseline.read_text()), args.tolerance)
+    for failure in failures:
+        print(f"REGRESSION {failure}", file=sys.stderr)
+    if failures:
+        return 1
+    print(f"No regressions beyond {args.tolerance:.0%} of baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Multi-process serving with one shared copy of the model weights.
+
+The parent loads GLiNER2 once, moves every tensor into shared memory
+(`share_memory()`), binds the listening socket, then forks N uvicorn workers.
+Workers inherit the weights read-only through the shared mapping, so resident
+memory stays close to one model copy while requests spread across cores. Each
+worker pins its own torch thread count.
+
+Usage (from python/):
+  python serve.py --workers 4 --threads-per-worker 2 --port 8000
+Env: TRIAGE_WORKERS, TRIAGE_THREADS_PER_WORKER, HOST, PORT. Linux/macOS only (fork).
+With more than one worker, background draft job status is shared through
+DRAFT_JOB_DB (default python/.data/draft_jobs.sqlite3, recreated at startup).
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+from pathlib import Path
+from typing import Dict
+
+_server_dir = Path(__file__).resolve().parent
+if str(_server_dir) not in sys.path:
+    sys.path.insert(0, str(_server_dir))
+
+
+def _bind(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _load_shared_model():
+    import torch
+
+    import server
+
+    # Keep the parent single-threaded: forking after the intra-op pool spins up is unsafe.
+    torch.set_num_threads(1)
+    t0 = time.perf_counter()
+    model, load_ms = server.load_extractor(server.MODEL_DIR or server.MODEL_ID, server.TRIAGE_BACKEND)
+    model.share_memory()
+    for param in model.parameters():
+        param.requires_grad_(False)
+    server._model_state["load_ms"].update(load_ms)
+    print(
+        f"[serve] loaded {server.MODEL_ID} ({server.TRIAGE_BACKEND}) into shared memory in {time.perf_counter() - t0:.1f}s",
+        file=sys.stderr,
+    )
+    return model
+
+
+def _run_worker(index: int, sock: socket.socket, threads: int) -> None:
+    import torch
+    import uvicorn
+
+    import server
+
+    from backends import OnnxEncoder
+
+    torch.set_num_threads(threads)
+    # server was imported by the parent, so its env-derived settings are already read: set the module value,
+    # which the scheduler thread (TRIAGE_SCHEDULER=1) pins itself to when it starts in this worker.
+    server.TRIAGE_TORCH_THREADS = threads
+    encoder = getattr(server.extractor, "encoder", None)
+    if isinstance(encoder, OnnxEncoder):
+        # ONNX Runtime sessions hold their own weights and thread pool: each worker opens its own session.
+        encoder.reset_session(threads)
+    config = uvicorn.Config(server.app, log_level="info")
+    print(f"[serve] worker {index} pid={os.getpid()} torch_threads={threads}", file=sys.stderr)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def _spawn(index: int, sock: socket.socket, threads: int) -> int:
+    pid = os.fork()
+    if pid == 0:
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        code = 0
+        try:
+            _run_worker(index, sock, threads)
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+        finally:
+            os._exit(code)
+    return pid
+
+
+def main() -> int:
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.environ.get("HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("TRIAGE_WORKERS", "0")) or max(1, cpus // 2))
+    parser.add_argument("--threads-per-worker", type=int, default=int(os.environ.get("TRIAGE_THREADS_PER_WORKER", "0")))
+    args = parser.parse_args()
+    threads = args.threads_per_worker or max(1, cpus // args.workers)
+    if args.workers > 1 and not os.environ.get("DRAFT_JOB_DB"):
+        # Background draft jobs run in the worker that accepted them, but polls land on any worker:
+        # share their status through one SQLite file (read by server at import, so set it first).
+        job_db = _server_dir / ".data" / "draft_jobs.sqlite3"
+        for stale in (job_db, job_db.with_name(job_db.name + "-wal"), job_db.with_name(job_db.name + "-shm")):
+            stale.unlink(missing_ok=True)  # jobs from a previous run died with their workers
+        os.environ["DRAFT_JOB_DB"] = str(job_db)
+
+    import server
+
+    server.extractor = _load_shared_model()
+    sock = _bind(args.host, args.port)
+    print(f"[serve] http://{args.host}:{args.port} workers={args.workers} threads/worker={threads}", file=sys.stderr)
+
+    children: Dict[int, int] = {_spawn(i, sock, threads): i for i in range(args.workers)}
+    stopping = False
+
+    def _stop(signum, _frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, _stop)
+    signal.signal(signal.SIGTERM, _stop)
+
+    # Supervise: restart workers that die unexpectedly, exit once all have stopped on shutdown.
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        index = children.pop(pid, None)
+        if index is None:
+            continue
+        if not stopping:
+            print(f"[serve] worker {index} (pid {pid}) exited with {status}; restarting", file=sys.stderr)
+            children[_spawn(index, sock, threads)] = index
+    sock.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
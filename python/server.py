@@ -1,12 +1,21 @@
 from __future__ import annotations
 
+import asyncio
+import itertools
 import json
 import os
+import re
+import threading
 import time
+import weakref
+from contextlib import aclosing, asynccontextmanager, contextmanager
+from functools import partial
 from pathlib import Path
-from typing import Any, Dict, List, Optional
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, Field
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Literal, Optional
+from fastapi import FastAPI, Header, HTTPException, Query
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field, PrivateAttr, model_validator
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
 
 from dotenv import load_dotenv
 
@@ -16,29 +25,316 @@ load_dotenv(_load_env)
 
 from gliner2 import GLiNER2
 
-app = FastAPI(title="GLiNER2 Local Demo API")
+import prefilter
+import presets
+import score_sweep
+import ticket_text
+from admission import Admission, Overloaded
+from backends import BACKENDS, load_extractor
+from draft_jobs import FINISHED, DraftJobQueue, Job, JobQueueFull, JobTable
+from draft_llm import DraftCompletion, DraftLLM
+from metrics import Registry, process_rss_bytes
+from presets import CompiledSchemas
+from profiling import Profiler
+from result_cache import PersistentResultCache, ResultCache, content_key
+from scheduler import InferenceScheduler, SchedulerFull, SchedulerStopped
+from triage_memory import TriageMemory
+from triage_store import TriageStore
+
+
+@asynccontextmanager
+async def _lifespan(_app: FastAPI):
+    # Start accepting traffic immediately; the model loads and warms up in the background.
+    _start_model_loader()
+    _start_scheduler()
+    _start_store()
+    draft_jobs.start()
+    cancel_watch = asyncio.create_task(_watch_job_cancels()) if draft_job_table is not None else None
+    yield
+    _stop_scheduler()
+    _stop_store()
+    if cancel_watch is not None:
+        cancel_watch.cancel()
+    await draft_jobs.stop()
+    await draft_llm.aclose()
+
+
+app = FastAPI(title="GLiNER2 Local Demo API", lifespan=_lifespan)
+
+# Prometheus metrics on GET /metrics (metrics.py): per process, so per serve.py worker
+metrics_registry = Registry()
+m_stage_seconds = metrics_registry.histogram("triage_stage_seconds", "Model time per analyze stage (batched tickets: amortized per ticket)", ["stage", "preset"])
+m_triage_requests = metrics_registry.counter("triage_requests_total", "Triaged tickets by preset, routed queue and cache status", ["preset", "queue", "cache"])
+m_cascade_stages = metrics_registry.counter("triage_cascade_stages_total", "Cascade-mode stages by who decided them (rules skip the model)", ["preset", "stage", "decided_by"])
+m_skipped_stages = metrics_registry.counter("triage_skipped_stages_total", "Stages dropped by the degradation ladder (load) or a request deadline", ["stage", "reason"])
+m_triage_shed = metrics_registry.counter("triage_shed_total", "/analyze requests rejected with 503 by admission control", ["reason"])
+m_triage_errors = metrics_registry.counter("triage_errors_total", "Failed triage requests by preset and HTTP status", ["preset", "status"])
+m_draft_seconds = metrics_registry.histogram("draft_llm_seconds", "Draft LLM call latency (cache hits excluded)", ["mode"])
+m_draft_ttft_seconds = metrics_registry.histogram("draft_llm_ttft_seconds", "Streamed draft time to first token")
+m_draft_requests = metrics_registry.counter("draft_requests_total", "Drafts by preset, routed queue and whether the draft cache served them", ["preset", "queue", "cached"])
+m_draft_errors = metrics_registry.counter("draft_errors_total", "Failed draft LLM calls by preset and routed queue", ["preset", "queue"])
+m_draft_speculation = metrics_registry.counter("draft_speculation_total", "/triage speculative drafts by outcome once the extracted fields are known", ["outcome"])
+m_draft_tokens = metrics_registry.counter("draft_tokens_total", "Draft LLM tokens", ["direction"])
+m_http_requests = metrics_registry.counter("http_requests_total", "HTTP responses on the triage and draft endpoints", ["path", "status"])
+m_in_flight = metrics_registry.gauge("http_requests_in_flight", "Requests currently being served (until the last body chunk)", ["path"])
+metrics_registry.gauge(
+    "draft_llm_in_flight", "Draft LLM calls holding a concurrency slot",
+    collect=lambda g: g.set(draft_llm.in_flight),
+)
+metrics_registry.gauge(
+    "triage_admission_waiting", "/analyze requests queued for a run slot",
+    collect=lambda g: g.set(admission.waiting if admission is not None else 0),
+)
+metrics_registry.gauge(
+    "draft_jobs_queued", "Background draft jobs waiting for a worker",
+    collect=lambda g: g.set(draft_jobs.depth()),
+)
+metrics_registry.gauge(
+    "triage_model_load_seconds", "Model load and warmup time by phase",
+    ["phase"],
+    collect=lambda g: [g.set(ms / 1000.0, phase=phase) for phase, ms in list(_model_state["load_ms"].items())],
+)
+metrics_registry.gauge(
+    "triage_model_ready", "1 once the model is loaded and warmed",
+    collect=lambda g: g.set(1.0 if _model_state["status"] == "ready" else 0.0),
+)
+metrics_registry.gauge(
+    "process_resident_memory_bytes", "Resident set size of this process",
+    collect=lambda g: g.set(process_rss_bytes()),
+)
+METRICS_PATHS = {"/analyze", "/analyze/batch", "/analyze/stream", "/draft", "/draft/stream", "/triage"}
+
+
+class _HttpMetricsMiddleware:
+    """In-flight gauge and status counter for METRICS_PATHS; streamed responses count until their last chunk."""
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        path = scope.get("path") if scope["type"] == "http" else None
+        if path not in METRICS_PATHS:
+            await self.app(scope, receive, send)
+            return
+        status = {"code": 500}
+
+        async def _send(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        m_in_flight.inc(path=path)
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            m_in_flight.dec(path=path)
+            m_http_requests.inc(path=path, status=str(status["code"]))
+
+
+app.add_middleware(_HttpMetricsMiddleware)
 
 MODEL_ID = "fastino/gliner2-base-v1"
+# Local checkpoint directory (e.g. a pre-downloaded snapshot) to load instead of the Hugging Face hub id
+MODEL_DIR = os.environ.get("TRIAGE_MODEL_DIR")
+# Inference backend (backends.py): torch (fp32 eager), int8 (dynamic quantization) or onnx (ONNX Runtime encoder)
+TRIAGE_BACKEND = os.environ.get("TRIAGE_BACKEND", "torch")
+if TRIAGE_BACKEND not in BACKENDS:
+    raise RuntimeError(f"TRIAGE_BACKEND must be one of {', '.join(BACKENDS)}, got {TRIAGE_BACKEND!r}")
 extractor: Optional[GLiNER2] = None
 
+# Model lifecycle reported on /health: loading -> warming -> ready (or error), with load-time breakdown
+WARMUP_TEXT = "Warmup: Acme Corp on the Pro plan sees login errors (ERROR_CODE=500) in prod us-east-1."
+_model_state: Dict[str, Any] = {"status": "loading", "error": None, "load_ms": {}}
+_model_lock = threading.Lock()
+
 # LLM: optional, used for draft reply step (set in .env or environment)
 # gpt-4o-mini is OpenAI's cheapest standard model; override with OPENAI_MODEL if needed
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
 OPENAI_MODEL = os.environ.get("OPENAI_MODEL", "gpt-4o-mini")
+# One pooled async client for every draft; OPENAI_BASE_URL points it at any OpenAI-compatible server
+DRAFT_MAX_CONCURRENCY = int(os.environ.get("DRAFT_MAX_CONCURRENCY", "8"))
+DRAFT_TIMEOUT_S = float(os.environ.get("DRAFT_TIMEOUT_S", "60"))
+draft_llm = DraftLLM(
+    OPENAI_API_KEY,
+    OPENAI_MODEL,
+    base_url=os.environ.get("OPENAI_BASE_URL") or None,
+    max_concurrency=DRAFT_MAX_CONCURRENCY,
+    timeout_s=DRAFT_TIMEOUT_S,
+)
+# Draft cache: sha256(rendered prompt + model) -> draft text; DRAFT_CACHE_PATH also persists it to a JSONL file
+DRAFT_CACHE = os.environ.get("DRAFT_CACHE", "1") == "1"
+DRAFT_CACHE_PATH = os.environ.get("DRAFT_CACHE_PATH")
+DRAFT_CACHE_MAX_BYTES = int(os.environ.get("DRAFT_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+DRAFT_CACHE_MAX_ENTRIES = int(os.environ.get("DRAFT_CACHE_MAX_ENTRIES", "5000"))
+DRAFT_CACHE_TTL_S = float(os.environ.get("DRAFT_CACHE_TTL_S", "86400"))
+_draft_cache_bounds = dict(max_bytes=DRAFT_CACHE_MAX_BYTES, max_entries=DRAFT_CACHE_MAX_ENTRIES, ttl_s=DRAFT_CACHE_TTL_S)
+draft_cache: Optional[ResultCache] = (
+    (PersistentResultCache(Path(DRAFT_CACHE_PATH), **_draft_cache_bounds) if DRAFT_CACHE_PATH else ResultCache(**_draft_cache_bounds))
+    if DRAFT_CACHE
+    else None
+)
+
+# Background draft jobs ("background": true): bounded worker pool, 429 + Retry-After past DRAFT_JOB_MAX_QUEUE waiting
+DRAFT_JOB_WORKERS = int(os.environ.get("DRAFT_JOB_WORKERS", str(DRAFT_MAX_CONCURRENCY)))
+DRAFT_JOB_MAX_QUEUE = int(os.environ.get("DRAFT_JOB_MAX_QUEUE", "64"))
+DRAFT_JOB_TTL_S = float(os.environ.get("DRAFT_JOB_TTL_S", "600"))
+# Job status shared across serve.py workers (SQLite), so polls and cancels work on any worker; serve.py sets it
+DRAFT_JOB_DB = os.environ.get("DRAFT_JOB_DB")
+draft_job_table: Optional[JobTable] = JobTable(Path(DRAFT_JOB_DB), ttl_s=DRAFT_JOB_TTL_S) if DRAFT_JOB_DB else None
+draft_jobs = DraftJobQueue(
+    lambda req: _draft(req),
+    workers=DRAFT_JOB_WORKERS,
+    max_queue=DRAFT_JOB_MAX_QUEUE,
+    ttl_s=DRAFT_JOB_TTL_S,
+    on_change=lambda job: _publish_job(job),
+)
+
+# Triage mode: "staged" runs the four model calls separately; "fused" builds one combined
+# schema and decodes all heads from a single encoder pass; "cascade" runs the preset's regex
+# prefilter first (prefilter.py) and only sends the stages it is unsure about to the model.
+# Per-request "mode" overrides this.
+TRIAGE_MODE = os.environ.get("TRIAGE_MODE", "staged")
+# Cascade: a task is decided by rules when its top label scores >= MIN_SCORE and leads the runner-up by MIN_MARGIN
+TRIAGE_CASCADE_MIN_SCORE = float(os.environ.get("TRIAGE_CASCADE_MIN_SCORE", "1.0"))
+TRIAGE_CASCADE_MIN_MARGIN = float(os.environ.get("TRIAGE_CASCADE_MIN_MARGIN", "0.75"))
+
+# Micro-batching scheduler: when enabled, one worker thread owns the model and batches
+# concurrent /analyze requests (collect for TRIAGE_BATCH_WINDOW_MS or up to TRIAGE_MAX_BATCH).
+TRIAGE_SCHEDULER = os.environ.get("TRIAGE_SCHEDULER", "0") == "1"
+TRIAGE_BATCH_WINDOW_MS = float(os.environ.get("TRIAGE_BATCH_WINDOW_MS", "5"))
+TRIAGE_MAX_BATCH = int(os.environ.get("TRIAGE_MAX_BATCH", "16"))
+TRIAGE_MAX_QUEUE = int(os.environ.get("TRIAGE_MAX_QUEUE", "1024"))
+TRIAGE_TORCH_THREADS = int(os.environ.get("TRIAGE_TORCH_THREADS", "0")) or None
+scheduler: Optional[InferenceScheduler] = None
+
+# Admission control for /analyze (admission.py): TRIAGE_MAX_CONCURRENT tickets run at once (default: one
+# scheduler batch, or 4) and up to TRIAGE_ADMIT_QUEUE more wait; past that, 503 + Retry-After. Degradation
+# ladder: with TRIAGE_DEGRADE_AT="16,32" tickets queued, admitted tickets skip extract_json, then entities
+# too. Deadline per request (X-Triage-Deadline-Ms header or deadlineMs; TRIAGE_DEADLINE_MS default, 0 = none):
+# shed if it passes while queued, and entities / extract_json are skipped when they would overrun it.
+TRIAGE_ADMISSION = os.environ.get("TRIAGE_ADMISSION", "1") == "1"
+TRIAGE_MAX_CONCURRENT = int(os.environ.get("TRIAGE_MAX_CONCURRENT", str(TRIAGE_MAX_BATCH if TRIAGE_SCHEDULER else 4)))
+TRIAGE_ADMIT_QUEUE = int(os.environ.get("TRIAGE_ADMIT_QUEUE", "64"))
+TRIAGE_DEGRADE_AT = [int(n) for n in os.environ.get("TRIAGE_DEGRADE_AT", "16,32").split(",") if n.strip()]
+TRIAGE_DEADLINE_MS = float(os.environ.get("TRIAGE_DEADLINE_MS", "0"))
+admission: Optional[Admission] = (
+    Admission(max_concurrency=TRIAGE_MAX_CONCURRENT, max_queue=TRIAGE_ADMIT_QUEUE, degrade_at=TRIAGE_DEGRADE_AT)
+    if TRIAGE_ADMISSION
+    else None
+)
+
+# Triage result cache: /analyze is deterministic for (text, schemas, threshold, mode), so identical
+# re-triages are served from an LRU+TTL cache bounded by bytes. Identical in-flight requests coalesce.
+TRIAGE_CACHE = os.environ.get("TRIAGE_CACHE", "1") == "1"
+TRIAGE_CACHE_MAX_BYTES = int(os.environ.get("TRIAGE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+TRIAGE_CACHE_MAX_ENTRIES = int(os.environ.get("TRIAGE_CACHE_MAX_ENTRIES", "10000"))
+TRIAGE_CACHE_TTL_S = float(os.environ.get("TRIAGE_CACHE_TTL_S", "3600"))
+triage_cache: Optional[ResultCache] = (
+    ResultCache(
+        max_bytes=TRIAGE_CACHE_MAX_BYTES,
+        max_entries=TRIAGE_CACHE_MAX_ENTRIES,
+        ttl_s=TRIAGE_CACHE_TTL_S,
+        size_of=lambda r: len(r.model_dump_json()),
+    )
+    if TRIAGE_CACHE
+    else None
+)
+
+# Memory: recent triage results per queue, indexed for "similar ticket" context in draft (triage_memory.py)
+TRIAGE_MEMORY_PER_QUEUE = int(os.environ.get("TRIAGE_MEMORY_PER_QUEUE", "10000"))
+TRIAGE_MEMORY_DIM = int(os.environ.get("TRIAGE_MEMORY_DIM", "256"))
+triage_memory = TriageMemory(per_queue=TRIAGE_MEMORY_PER_QUEUE, dim=TRIAGE_MEMORY_DIM)
+
+# Durable triage history (triage_store.py); "" disables. The memory is rebuilt from it on startup.
+TRIAGE_STORE_PATH = os.environ.get("TRIAGE_STORE_PATH", str(Path(__file__).resolve().parent / ".data" / "triage.sqlite3"))
+triage_store: Optional[TriageStore] = TriageStore(Path(TRIAGE_STORE_PATH)) if TRIAGE_STORE_PATH else None
+_memory_state: Dict[str, Any] = {"status": "cold" if triage_store else "disabled", "warm_rows": 0, "warm_ms": 0.0}
+
+
+# rawScores requests extract entities once at this floor (or the request threshold if lower) and return every
+# span's confidence, so any threshold >= the floor can be applied afterwards without re-running the model
+TRIAGE_RAW_SCORE_FLOOR = float(os.environ.get("TRIAGE_RAW_SCORE_FLOOR", "0.3"))
 
-# Memory: last N triage results for "similar ticket" context in draft
-MEMORY_MAX = 20
-_triage_memory: List[Dict[str, Any]] = []
+# Long tickets (ticket_text.py): quoted replies and signatures are stripped before the model sees the text.
+# Text over TRIAGE_WINDOW_WORDS words is split into overlapping windows that run as one batch per stage
+# and are merged back. At most TRIAGE_MAX_WINDOWS windows are kept per ticket, which bounds model time.
+TRIAGE_CLEAN_TEXT = os.environ.get("TRIAGE_CLEAN_TEXT", "1") == "1"
+TRIAGE_WINDOW_WORDS = int(os.environ.get("TRIAGE_WINDOW_WORDS", "200"))
+TRIAGE_WINDOW_OVERLAP = int(os.environ.get("TRIAGE_WINDOW_OVERLAP", "40"))
+TRIAGE_MAX_WINDOWS = int(os.environ.get("TRIAGE_MAX_WINDOWS", "8"))
+
+# Opt-in profiling (profiling.py): "X-Triage-Profile: torch|sample" on /analyze, or POST /admin/profile
+# for a time window. Off by default; when off the header is ignored and the /profiles endpoints 404.
+TRIAGE_PROFILING = os.environ.get("TRIAGE_PROFILING", "0") == "1"
+TRIAGE_PROFILE_DIR = os.environ.get("TRIAGE_PROFILE_DIR", str(Path(__file__).resolve().parent / ".profiles"))
+TRIAGE_PROFILE_KEEP = int(os.environ.get("TRIAGE_PROFILE_KEEP", "50"))
+profiler: Optional[Profiler] = Profiler(Path(TRIAGE_PROFILE_DIR), keep=TRIAGE_PROFILE_KEEP) if TRIAGE_PROFILING else None
 
 
 class AnalyzeRequest(BaseModel):
     text: str = Field(min_length=1)
     threshold: float = Field(default=0.6, ge=0.0, le=1.0)
-    entityLabels: List[str]
-    severitySchema: Dict[str, List[str]]  # e.g. {"severity": ["sev0","sev1","sev2","sev3"]}
-    intentSchema: Dict[str, List[str]]    # e.g. {"intent": ["bug","how_to",...]}
-    jsonSchema: Dict[str, List[str]]      # GLiNER2 extract_json schema
+    # Schemas default to the server-side preset registry (presets.py); send them inline only for custom presets.
+    entityLabels: Optional[List[str]] = None
+    severitySchema: Optional[Dict[str, List[str]]] = None  # e.g. {"severity": ["sev0","sev1","sev2","sev3"]}
+    intentSchema: Optional[Dict[str, List[str]]] = None    # e.g. {"intent": ["bug","how_to",...]}
+    jsonSchema: Optional[Dict[str, List[str]]] = None      # GLiNER2 extract_json schema
     preset: str
+    mode: Literal["staged", "fused", "cascade"] = Field(default_factory=lambda: TRIAGE_MODE)
+    rawScores: bool = False  # also return entity_scores (every span >= score_floor) for re-filtering; runs staged
+    deadlineMs: Optional[float] = Field(default=None, gt=0)  # time budget for /analyze (or X-Triage-Deadline-Ms)
+
+    _compiled: Optional[CompiledSchemas] = PrivateAttr(default=None)
+    _windows: Optional[List[str]] = PrivateAttr(default=None)
+    _skip: List[str] = PrivateAttr(default_factory=list)
+    _deadline: Optional[float] = PrivateAttr(default=None)
+
+    @model_validator(mode="after")
+    def _fill_from_preset(self) -> "AnalyzeRequest":
+        missing = [k for k in ("entityLabels", "severitySchema", "intentSchema", "jsonSchema") if getattr(self, k) is None]
+        if missing:
+            preset = presets.PRESETS.get(self.preset)
+            if preset is None:
+                raise ValueError(f"unknown preset {self.preset!r}; send {', '.join(missing)} inline")
+            defaults = preset.as_payload()
+            for key in missing:
+                setattr(self, key, defaults[key])
+        # Registered presets resolve to their precompiled schemas; custom inline schemas are validated here.
+        self._compiled = presets.resolve(
+            self.preset, self.entityLabels, self.severitySchema, self.intentSchema, self.jsonSchema
+        )
+        if self.rawScores:
+            self.mode = "staged"  # the fused head has no per-span confidences to return
+        return self
+
+    def score_floor(self) -> float:
+        return min(self.threshold, TRIAGE_RAW_SCORE_FLOOR)
+
+    def compiled(self) -> CompiledSchemas:
+        return self._compiled
+
+    def windows(self) -> List[str]:
+        """What the model reads: the cleaned ticket, split into overlapping windows if it is long."""
+        if self._windows is None:
+            text = ticket_text.clean(self.text) if TRIAGE_CLEAN_TEXT else self.text.strip()
+            self._windows = ticket_text.split_windows(text, TRIAGE_WINDOW_WORDS, TRIAGE_WINDOW_OVERLAP, TRIAGE_MAX_WINDOWS)
+        return self._windows
+
+    def degrade(self, skip: List[str]) -> None:
+        """Skip these stages (the admission ladder). Fused mode has no per-stage calls to drop, so it runs staged."""
+        self._skip = list(skip)
+        if skip and self.mode == "fused":
+            self.mode = "staged"
+
+    def skips(self) -> List[str]:
+        return self._skip
+
+    def deadline(self) -> Optional[float]:
+        """time.perf_counter() by which the triage should be done, or None."""
+        return self._deadline
+
+    def start_deadline(self, budget_ms: Optional[float]) -> None:
+        self._deadline = time.perf_counter() + budget_ms / 1000.0 if budget_ms else None
 
 
 class AnalyzeResponse(BaseModel):
@@ -48,12 +344,36 @@ class AnalyzeResponse(BaseModel):
     intent: Any
     ticket_fields: Any
     routing: Dict[str, Any]
+    timings_ms: Dict[str, float]  # per-stage ms, plus "chunks" (windows the ticket ran as)
+    scheduler: Optional[Dict[str, float]] = None  # batch_size, queue_wait_ms, queue_depth when batched
+    cache: Optional[str] = None  # "hit" | "miss" | "coalesced" when the triage cache is enabled
+    profile: Optional[Dict[str, Any]] = None  # kind, file, url when this request was profiled
+    entity_scores: Optional[Dict[str, List[Dict[str, Any]]]] = None  # rawScores: label -> [{text, confidence}]
+    score_floor: Optional[float] = None  # rawScores: entity_scores hold every span scoring >= this
+    decided_by: Optional[Dict[str, str]] = None  # cascade mode: stage -> "rules" | "model"
+    skipped_stages: Optional[List[str]] = None  # extract_json / entities dropped under load or to meet the deadline
+
+
+class AnalyzeBatchRequest(BaseModel):
+    tickets: List[AnalyzeRequest] = Field(min_length=1, max_length=1000)
+    batchSize: int = Field(default=16, ge=1, le=128)  # tickets per padded forward pass
+
+
+class AnalyzeBatchResponse(BaseModel):
+    results: List[AnalyzeResponse]  # same order as request tickets
+    batches: List[Dict[str, Any]]   # one entry per forward-pass batch: size, preset, timings_ms
     timings_ms: Dict[str, float]
 
 
+class ProfileRequest(BaseModel):
+    kind: Literal["torch", "sample"] = "sample"
+    seconds: float = Field(default=10.0, gt=0.0, le=300.0)
+
+
 class DraftRequest(BaseModel):
     text: str = Field(min_length=1, description="Original ticket text")
     triage: Dict[str, Any] = Field(description="Full triage output from /analyze")
+    background: bool = Field(default=False, description="Queue as a job: 202 + job id, poll GET /draft/jobs/{id}")
 
 
 class DraftResponse(BaseModel):
@@ -61,55 +381,246 @@ class DraftResponse(BaseModel):
     tokens_in: int
     tokens_out: int
     latency_ms: float
+    cached: bool = False  # true: identical prompt + model served from the draft cache (0 tokens)
     context_used: bool = False
     context_preview: Optional[str] = None
     context_queue: Optional[str] = None
 
 
-@app.on_event("startup")
+class TriageRequest(AnalyzeRequest):
+    # /triage: analysis plus a draft reply that starts as soon as routing is known
+    draftPriorities: Optional[List[str]] = None  # draft only for these routed priorities, e.g. ["P0", "P1"]; None = always
+    draftPolicy: Literal["restart", "keep"] = "restart"  # extracted fields changed the prompt: redo the draft, or keep the early one
+
+
 def _load_model() -> None:
+    """Load (unless serve.py already preloaded a shared copy) and warm up the model; blocks until ready."""
     global extractor
-    # Load once, reuse for all requests.
-    extractor = GLiNER2.from_pretrained(MODEL_ID)
+    with _model_lock:
+        if _model_state["status"] == "ready":
+            return
+        try:
+            if extractor is None:
+                _model_state["status"] = "loading"
+                extractor, load_ms = load_extractor(MODEL_DIR or MODEL_ID, TRIAGE_BACKEND)
+                _model_state["load_ms"].update(load_ms)
+            presets.use_model(extractor)  # structures follow the checkpoint's record mode, as extract_json does
+            _model_state["status"] = "warming"
+            _warmup()
+            _model_state["load_ms"]["total"] = sum(
+                v for k, v in _model_state["load_ms"].items() if k != "total"
+            )
+            _model_state["status"] = "ready"
+        except Exception as exc:
+            _model_state["status"] = "error"
+            _model_state["error"] = f"{type(exc).__name__}: {exc}"
+            raise
+
+
+def _warmup() -> None:
+    """One pass per preset and stage so the first real request doesn't pay allocation/JIT costs."""
+    for preset in presets.PRESETS.values():
+        t0 = time.perf_counter()
+        compiled = preset.compiled
+        for schema in (compiled.entities, compiled.severity, compiled.intent, compiled.ticket_fields):
+            extractor.extract(WARMUP_TEXT, schema)
+        if TRIAGE_MODE == "fused":
+            extractor.extract(WARMUP_TEXT, compiled.fused(0.6))
+        _model_state["load_ms"][f"warmup_{preset.id}"] = (time.perf_counter() - t0) * 1000.0
+
+
+def _start_model_loader() -> None:
+    def _run() -> None:
+        try:
+            _load_model()
+        except Exception:
+            pass  # reported via /health
+
+    threading.Thread(target=_run, name="model-loader", daemon=True).start()
+
+
+def _warm_memory() -> None:
+    """Rebuild the similar-ticket memory from the store, then start persisting new triage."""
+    _memory_state["status"] = "warming"
+    t0 = time.perf_counter()
+    try:
+        rows = triage_store.recent(TRIAGE_MEMORY_PER_QUEUE)
+        _memory_state["warm_rows"] = triage_memory.extend(rows)
+        _memory_state["status"] = "warm"
+    except Exception as exc:
+        _memory_state["status"] = "error"
+        _memory_state["error"] = f"{type(exc).__name__}: {exc}"
+    _memory_state["warm_ms"] = (time.perf_counter() - t0) * 1000.0
+    # Rows appended while warming stay queued and are written once the writer starts, so none are replayed twice.
+    triage_store.start()
+
+
+def _start_store() -> None:
+    if triage_store is not None:
+        threading.Thread(target=_warm_memory, name="memory-warm", daemon=True).start()
+
+
+def _stop_store() -> None:
+    if triage_store is not None:
+        triage_store.stop()
+
+
+def _require_model() -> None:
+    """503 (retryable) while the model is loading or warming; 500 if loading failed."""
+    status = _model_state["status"]
+    if status == "ready":
+        return
+    if status == "error":
+        raise HTTPException(status_code=500, detail=f"Model not loaded: {_model_state['error']}")
+    raise HTTPException(status_code=503, detail=f"Model not loaded ({status})", headers={"Retry-After": "5"})
+
+
+def _start_scheduler() -> None:
+    global scheduler
+    if TRIAGE_SCHEDULER and scheduler is None:
+        scheduler = InferenceScheduler(
+            run_batch=_analyze_batch,
+            key=_schema_key,
+            max_batch=TRIAGE_MAX_BATCH,
+            max_wait_ms=TRIAGE_BATCH_WINDOW_MS,
+            max_queue=TRIAGE_MAX_QUEUE,
+            torch_threads=TRIAGE_TORCH_THREADS,
+        )
+        scheduler.start()
+
+
+def _stop_scheduler() -> None:
+    global scheduler
+    if scheduler is not None:
+        scheduler.stop()
+        scheduler = None
 
 
 @app.get("/health")
-def health() -> Dict[str, str]:
-    return {"status": "ok", "model": MODEL_ID}
+def health() -> JSONResponse:
+    """Readiness: 200 once the model is loaded and warmed, 503 while loading/warming or on load error."""
+    body = {
+        "status": "ok" if _model_state["status"] == "ready" else _model_state["status"],
+        "state": _model_state["status"],
+        "model": MODEL_DIR or MODEL_ID,
+        "backend": TRIAGE_BACKEND,
+        "pid": os.getpid(),
+        "load_ms": _model_state["load_ms"],
+    }
+    if _model_state["error"]:
+        body["error"] = _model_state["error"]
+    return JSONResponse(body, status_code=200 if _model_state["status"] == "ready" else 503)
+
+
+@app.get("/presets")
+def list_presets() -> Dict[str, Any]:
+    return {
+        pid: {"name": p.name, "description": p.description, **p.as_payload()}
+        for pid, p in presets.PRESETS.items()
+    }
+
+
+@app.get("/cache/stats")
+def cache_stats() -> Dict[str, Any]:
+    if triage_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **triage_cache.stats()}
+
+
+@app.get("/admission/stats")
+def admission_stats() -> Dict[str, Any]:
+    if admission is None:
+        return {"enabled": False}
+    return {"enabled": True, **admission.stats()}
+
+
+@app.get("/memory/stats")
+def memory_stats() -> Dict[str, Any]:
+    body = {**triage_memory.stats(), "warm_start": _memory_state}
+    if triage_store is not None:
+        body["store"] = triage_store.stats()
+    return body
+
+
+@app.get("/metrics")
+def metrics() -> Response:
+    """Prometheus text exposition of this process's metrics."""
+    return Response(metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def _require_profiler() -> Profiler:
+    if profiler is None:
+        raise HTTPException(status_code=404, detail="Profiling is disabled; set TRIAGE_PROFILING=1")
+    return profiler
+
+
+@app.post("/admin/profile")
+def start_profile(req: ProfileRequest) -> JSONResponse:
+    """sample: flamegraph of every thread for `seconds`; torch: trace each /analyze request for `seconds`."""
+    prof = _require_profiler()
+    if req.kind == "torch":
+        return JSONResponse(prof.arm("torch", req.seconds))
+    try:
+        body = prof.sample_window(req.seconds)
+    except RuntimeError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    body["url"] = f"/profiles/{body['file']}"
+    return JSONResponse(body, status_code=202)
+
+
+@app.get("/profiles")
+def list_profiles() -> Dict[str, Any]:
+    prof = _require_profiler()
+    files = sorted(prof.list(), key=lambda p: p.stat().st_mtime, reverse=True)
+    return {"profiles": [{"file": p.name, "bytes": p.stat().st_size, "url": f"/profiles/{p.name}"} for p in files]}
+
+
+@app.get("/profiles/{name}")
+def get_profile(name: str) -> FileResponse:
+    path = _require_profiler().resolve(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"no profile {name!r}")
+    return FileResponse(path, media_type="application/json" if name.endswith(".json") else "text/plain")
 
 
 def _find_similar_ticket(current_ticket: str, routing: Dict[str, Any]) -> Optional[str]:
-    """Return snippet of a similar past ticket (same queue), or None."""
+    """Return snippet of the most similar past ticket (same queue, different text), or None."""
     queue = (routing or {}).get("next_queue") or ""
-    current_strip = (current_ticket or "").strip()[:200]
-    for entry in reversed(_triage_memory):
-        if (entry.get("ticket") or "").strip()[:200] == current_strip:
-            continue
-        if (entry.get("routing") or {}).get("next_queue") == queue:
-            t = (entry.get("ticket") or "")[:500]
-            if t:
-                return t
-    return None
+    return triage_memory.snippet(current_ticket or "", queue)
 
 
-def _call_llm_draft(ticket: str, triage: Dict[str, Any]) -> tuple[str, int, int, float, Optional[str]]:
-    """Call OpenAI to generate a short draft reply. Returns (draft, tokens_in, tokens_out, latency_ms, similar_ticket_snippet_or_none)."""
-    if not OPENAI_API_KEY:
-        raise HTTPException(
-            status_code=503,
-            detail="OPENAI_API_KEY not set; cannot generate draft reply.",
-        )
-    from openai import OpenAI
-    client = OpenAI(api_key=OPENAI_API_KEY)
+def _new_fields(value: Any, known: str) -> Any:
+    """Extracted field values that are neither empty nor already in `known` (lowercased ticket + triage).
+
+    extract_json is extractive, so most values are spans of the ticket or repeat a triage label.
+    """
+    if isinstance(value, dict):
+        kept = {k: _new_fields(v, known) for k, v in value.items()}
+        return {k: v for k, v in kept.items() if v not in (None, "", [], {})}
+    if isinstance(value, list):
+        return [v for v in (_new_fields(item, known) for item in value) if v not in (None, "", [], {})]
+    text = " ".join(str(value).split()).lower() if value is not None else ""
+    if text and re.search(rf"(?<!\w){re.escape(text)}(?!\w)", known):
+        return None
+    return value
+
+
+def _fields_add_nothing(ticket: str, triage: Dict[str, Any]) -> bool:
+    """/triage speculation: whether a draft written without the extracted fields missed nothing they say."""
+    labels = [triage.get("routing") or {}, triage.get("severity") or {}, triage.get("intent") or {}]
+    known = " ".join(f"{ticket} {json.dumps(labels, default=str)}".split()).lower()
+    return not _new_fields(triage.get("ticket_fields") or {}, known)
+
+
+def _render_draft_prompt(ticket: str, triage: Dict[str, Any], similar_snippet: Optional[str]) -> str:
     routing = triage.get("routing") or {}
     ticket_fields = triage.get("ticket_fields") or {}
     severity = triage.get("severity") or {}
     intent = triage.get("intent") or {}
-    similar_snippet = _find_similar_ticket(ticket, routing)
     similar_block = ""
     if similar_snippet:
         similar_block = "\n\nSimilar past ticket (for context only):\n---\n" + similar_snippet + "\n---"
-    prompt = f"""You are a support agent. Using the triage below and the customer ticket, write a short professional draft reply (2-4 sentences). Be empathetic and action-oriented.
+    return f"""You are a support agent. Using the triage below and the customer ticket, write a short professional draft reply (2-4 sentences). Be empathetic and action-oriented.
 
 Triage:
 - Route: {routing.get('next_queue', 'N/A')}, Priority: {routing.get('priority', 'N/A')}
@@ -124,18 +635,80 @@ Customer ticket:
 ---
 
 Draft reply:"""
+
+
+def _draft_prompt(ticket: str, triage: Dict[str, Any]) -> tuple[str, Optional[str]]:
+    """Render the draft prompt. Returns (prompt, similar_ticket_snippet_or_none)."""
+    similar_snippet = _find_similar_ticket(ticket, triage.get("routing") or {})
+    return _render_draft_prompt(ticket, triage, similar_snippet), similar_snippet
+
+
+def _require_llm() -> None:
+    if not draft_llm.configured:
+        raise HTTPException(
+            status_code=503,
+            detail="OPENAI_API_KEY not set; cannot generate draft reply.",
+        )
+
+
+def _draft_cache_key(prompt: str) -> str:
+    return content_key(prompt, draft_llm.model)
+
+
+def _cached_draft(key: str) -> Optional[DraftCompletion]:
+    if draft_cache is None:
+        return None
     t0 = time.perf_counter()
-    resp = client.chat.completions.create(
-        model=OPENAI_MODEL,
-        messages=[{"role": "user", "content": prompt}],
-    )
-    t1 = time.perf_counter()
-    choice = resp.choices[0] if resp.choices else None
-    draft = (choice.message.content or "").strip() if choice else ""
-    usage = resp.usage
-    tokens_in = (usage.prompt_tokens or 0) if usage else 0
-    tokens_out = (usage.completion_tokens or 0) if usage else 0
-    return draft, tokens_in, tokens_out, (t1 - t0) * 1000.0, similar_snippet
+    hit = draft_cache.get(key)
+    if hit is None:
+        return None
+    return DraftCompletion(draft=hit["draft"], tokens_in=0, tokens_out=0, latency_ms=(time.perf_counter() - t0) * 1000.0, cached=True)
+
+
+async def _store_draft(key: str, draft: str) -> None:
+    """Cache a completed draft. The persistent cache appends to (and may compact) its file, so that runs on a thread."""
+    if isinstance(draft_cache, PersistentResultCache):
+        await asyncio.to_thread(draft_cache.put, key, {"draft": draft})
+    elif draft_cache is not None:
+        draft_cache.put(key, {"draft": draft})
+
+
+def _draft_labels(triage: Dict[str, Any]) -> Dict[str, str]:
+    return {"preset": str(triage.get("preset") or ""), "queue": str((triage.get("routing") or {}).get("next_queue") or "")}
+
+
+def _observe_draft(completion: DraftCompletion, labels: Dict[str, str], mode: str) -> None:
+    m_draft_requests.inc(cached=str(completion.cached).lower(), **labels)
+    if completion.cached:
+        return
+    m_draft_seconds.observe(completion.latency_ms / 1000.0, mode=mode)
+    if completion.ttft_ms is not None:
+        m_draft_ttft_seconds.observe(completion.ttft_ms / 1000.0)
+    m_draft_tokens.inc(completion.tokens_in, direction="in")
+    m_draft_tokens.inc(completion.tokens_out, direction="out")
+
+
+async def _complete_draft(prompt: str, labels: Dict[str, str]) -> DraftCompletion:
+    """Complete one rendered prompt from the draft cache or the pooled LLM client."""
+    key = _draft_cache_key(prompt)
+    completion = _cached_draft(key)
+    if completion is None:
+        try:
+            completion = await draft_llm.complete(prompt)
+        except Exception:
+            m_draft_errors.inc(**labels)
+            raise
+        if completion.draft:
+            await _store_draft(key, completion.draft)
+    _observe_draft(completion, labels, "complete")
+    return completion
+
+
+async def _call_llm_draft(ticket: str, triage: Dict[str, Any]) -> tuple[DraftCompletion, Optional[str]]:
+    """Generate a short draft reply on the pooled client (or the draft cache). Returns (completion, similar_ticket_snippet_or_none)."""
+    _require_llm()
+    prompt, similar_snippet = _draft_prompt(ticket, triage)
+    return await _complete_draft(prompt, _draft_labels(triage)), similar_snippet
 
 
 def _route(severity: str, intent: str) -> Dict[str, Any]:
@@ -158,56 +731,711 @@ def _route(severity: str, intent: str) -> Dict[str, Any]:
     return {"next_queue": queue, "priority": priority}
 
 
-@app.post("/draft", response_model=DraftResponse)
-def draft(req: DraftRequest) -> DraftResponse:
-    draft_text, tokens_in, tokens_out, latency_ms, similar_snippet = _call_llm_draft(req.text.strip(), req.triage)
-    routing = (req.triage or {}).get("routing") or {}
+def _draft_context(similar_snippet: Optional[str], routing: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "context_used": bool(similar_snippet),
+        "context_preview": (similar_snippet[:220] + "…") if similar_snippet and len(similar_snippet) > 220 else (similar_snippet or None),
+        "context_queue": routing.get("next_queue") if similar_snippet else None,
+    }
+
+
+def _draft_response(completion: DraftCompletion, similar_snippet: Optional[str], routing: Dict[str, Any]) -> DraftResponse:
     return DraftResponse(
-        draft=draft_text,
-        tokens_in=tokens_in,
-        tokens_out=tokens_out,
-        latency_ms=latency_ms,
-        context_used=bool(similar_snippet),
-        context_preview=(similar_snippet[:220] + "…") if similar_snippet and len(similar_snippet) > 220 else (similar_snippet or None),
-        context_queue=routing.get("next_queue") if similar_snippet else None,
+        draft=completion.draft,
+        tokens_in=completion.tokens_in,
+        tokens_out=completion.tokens_out,
+        latency_ms=completion.latency_ms,
+        cached=completion.cached,
+        **_draft_context(similar_snippet, routing),
     )
 
 
-@app.post("/analyze", response_model=AnalyzeResponse)
-def analyze(req: AnalyzeRequest) -> AnalyzeResponse:
-    global extractor
-    if extractor is None:
-        raise HTTPException(status_code=500, detail="Model not loaded")
+async def _draft(req: DraftRequest) -> DraftResponse:
+    completion, similar_snippet = await _call_llm_draft(req.text.strip(), req.triage)
+    return _draft_response(completion, similar_snippet, (req.triage or {}).get("routing") or {})
+
+
+def _job_payload(job: Job) -> Dict[str, Any]:
+    timings_ms = job.timings_ms()
+    timings_ms["llm"] = job.result.latency_ms if job.result is not None else None
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "result": job.result.model_dump() if job.result is not None else None,
+        "error": job.error,
+        "timings_ms": timings_ms,
+    }
 
-    text = req.text.strip()
 
+_job_versions = itertools.count(1)
+_job_writes: Dict[str, asyncio.Future] = {}  # latest pending shared-table write per job
+
+
+def _publish_job(job: Job) -> None:
+    """Mirror a job's status into the shared table on a worker thread; the version keeps a late write from rolling it back."""
+    if draft_job_table is None:
+        return
+    payload = _job_payload(job)
+    write = asyncio.get_running_loop().run_in_executor(None, draft_job_table.save, job.id, next(_job_versions), job.status, payload)
+    _job_writes[job.id] = write
+    write.add_done_callback(lambda done, job_id=job.id: _job_writes.pop(job_id) if _job_writes.get(job_id) is done else None)
+
+
+async def _watch_job_cancels() -> None:
+    """Cancel this worker's jobs when a DELETE for them landed on another worker."""
+    while True:
+        await asyncio.sleep(0.2)
+        ids = [job.id for job in draft_jobs.unfinished()]
+        for job_id in await asyncio.to_thread(draft_job_table.cancel_requested, ids) if ids else []:
+            job = draft_jobs.get(job_id)
+            if job is not None:
+                draft_jobs.cancel(job)
+
+
+async def _shared_job(job_id: str, wait: float) -> Dict[str, Any]:
+    """A job owned by another worker, from the shared table; long-polls it like draft_jobs.wait()."""
+    deadline = time.perf_counter() + wait
+    while True:
+        row = await asyncio.to_thread(draft_job_table.load, job_id) if draft_job_table is not None else None
+        if row is None:
+            raise HTTPException(status_code=404, detail=f"unknown or expired draft job {job_id!r}")
+        status, payload = row
+        if status in FINISHED or time.perf_counter() >= deadline:
+            return payload
+        await asyncio.sleep(min(0.1, max(0.0, deadline - time.perf_counter())))
+
+
+@app.post("/draft", response_model=DraftResponse)
+async def draft(req: DraftRequest) -> Any:
+    if not req.background:
+        return await _draft(req)
+    _require_llm()
+    try:
+        job = draft_jobs.submit(req)
+    except JobQueueFull as exc:
+        raise HTTPException(status_code=429, detail=str(exc), headers={"Retry-After": str(exc.retry_after_s)})
+    write = _job_writes.get(job.id)
+    if write is not None:
+        await asyncio.wait([write])  # the first poll may land on another worker: the job must be in the table first
+    return JSONResponse(_job_payload(job), status_code=202, headers={"Location": f"/draft/jobs/{job.id}"})
+
+
+@app.get("/draft/jobs/{job_id}")
+async def draft_job(job_id: str, wait: float = Query(default=0.0, ge=0.0, le=30.0)) -> Dict[str, Any]:
+    """Job status and, once done, the draft. `wait` long-polls up to that many seconds for completion."""
+    job = draft_jobs.get(job_id)
+    if job is None:
+        return await _shared_job(job_id, wait)
+    return _job_payload(await draft_jobs.wait(job, wait))
+
+
+@app.delete("/draft/jobs/{job_id}")
+async def cancel_draft_job(job_id: str) -> Dict[str, Any]:
+    job = draft_jobs.get(job_id)
+    if job is not None:
+        if not draft_jobs.cancel(job):
+            raise HTTPException(status_code=409, detail=f"draft job already {job.status}")
+        return _job_payload(job)
+    # Owned by another worker: flag it, then give the owner's cancel watcher a moment to act
+    status = await asyncio.to_thread(draft_job_table.request_cancel, job_id) if draft_job_table is not None else None
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"unknown or expired draft job {job_id!r}")
+    if status in FINISHED:
+        raise HTTPException(status_code=409, detail=f"draft job already {status}")
+    return await _shared_job(job_id, 1.0)
+
+
+@app.get("/draft/stats")
+def draft_stats() -> Dict[str, Any]:
+    cache = {"enabled": True, **draft_cache.stats()} if draft_cache is not None else {"enabled": False}
+    return {"jobs": draft_jobs.stats(), "llm": draft_llm.stats(), "cache": cache}
+
+
+async def _draft_stream_events(ticket: str, triage: Dict[str, Any]) -> AsyncIterator[bytes]:
+    """NDJSON: context, token (one per delta), then done with usage, latency_ms and ttft_ms."""
     t0 = time.perf_counter()
-    ent = extractor.extract_entities(text, req.entityLabels, threshold=req.threshold)
+    prompt, similar_snippet = _draft_prompt(ticket, triage)
+    yield _stream_event("context", _draft_context(similar_snippet, triage.get("routing") or {}), None, t0)
+    labels = _draft_labels(triage)
+    key = _draft_cache_key(prompt)
+    cached = _cached_draft(key)
+    if cached is not None:
+        _observe_draft(cached, labels, "stream")
+        yield _stream_event("token", cached.draft, None, t0)
+        yield _stream_event("done", {
+            "tokens_in": 0,
+            "tokens_out": 0,
+            "latency_ms": cached.latency_ms,
+            "ttft_ms": cached.latency_ms,
+            "cached": True,
+        }, cached.latency_ms, t0)
+        return
+    try:
+        # aclosing: a client that disconnects mid-draft closes the LLM stream now, not at garbage collection
+        async with aclosing(draft_llm.stream(prompt)) as tokens:
+            async for item in tokens:
+                if isinstance(item, DraftCompletion):
+                    _observe_draft(item, labels, "stream")
+                    if item.draft:
+                        await _store_draft(key, item.draft)
+                    yield _stream_event("done", {
+                        "tokens_in": item.tokens_in,
+                        "tokens_out": item.tokens_out,
+                        "latency_ms": item.latency_ms,
+                        "ttft_ms": item.ttft_ms,
+                        "cached": False,
+                    }, item.latency_ms, t0)
+                else:
+                    yield _stream_event("token", item, None, t0)
+    except Exception as exc:
+        m_draft_errors.inc(**labels)
+        yield _stream_event("error", {"status": getattr(exc, "status_code", None) or 502, "detail": str(exc)}, None, t0)
+
+
+@app.post("/draft/stream")
+async def draft_stream(req: DraftRequest) -> StreamingResponse:
+    """Stream the draft reply token by token (NDJSON); done reports ttft_ms next to latency_ms."""
+    _require_llm()
+    return StreamingResponse(_draft_stream_events(req.text.strip(), req.triage or {}), media_type="application/x-ndjson")
+
+
+def _label(result: Any) -> str:
+    """First value of a classify_text result, e.g. {"severity": "sev1"} -> "sev1"."""
+    return str(next(iter(result.values()))) if isinstance(result, dict) and result else ""
+
+
+def _remember(text: str, routing: Dict[str, Any], severity_val: str, intent_val: str) -> None:
+    """Memory: record triage for "similar ticket" use in draft."""
+    triage_memory.add(text, routing, severity_val, intent_val)
+    if triage_store is not None:
+        triage_store.append(text, routing, severity_val, intent_val)
+
+
+# timings_ms keys that are counts, not stage durations
+_TIMING_COUNT_KEYS = {"batch_size", "chunks"}
+
+
+def _observe_stages(preset: str, timings_ms: Dict[str, float]) -> None:
+    """Stage histograms for one ticket that ran the model (cache hits are not observed)."""
+    for stage, ms in timings_ms.items():
+        if stage not in _TIMING_COUNT_KEYS:
+            m_stage_seconds.observe(ms / 1000.0, stage=stage, preset=preset)
+            if admission is not None:
+                admission.observe(stage, ms)
+
+
+def _count_triage(preset: str, routing: Dict[str, Any], cache: Optional[str]) -> None:
+    m_triage_requests.inc(preset=preset, queue=(routing or {}).get("next_queue") or "", cache=cache or "off")
+
+
+@contextmanager
+def _counting_errors(preset: str) -> Iterator[None]:
+    """Count a failed triage request under its preset and HTTP status, then re-raise."""
+    try:
+        yield
+    except HTTPException as exc:
+        m_triage_errors.inc(preset=preset, status=str(exc.status_code))
+        raise
+    except Exception:
+        m_triage_errors.inc(preset=preset, status="500")
+        raise
+
+
+def _schema_key(req: AnalyzeRequest) -> str:
+    """Tickets with the same key share labels/schemas/threshold and can run in one forward pass."""
+    return json.dumps(
+        [req.preset, req.mode, req.threshold, req.rawScores, req.entityLabels, req.severitySchema, req.intentSchema, req.jsonSchema],
+        sort_keys=True,
+    )
+
+
+def _entity_kwargs(req: AnalyzeRequest) -> Dict[str, Any]:
+    """extract() options for the entities stage: the request threshold, or the score floor with confidences."""
+    if req.rawScores:
+        return {"threshold": req.score_floor(), "include_confidence": True}
+    return {"threshold": req.threshold}
+
+
+def _split_entities(req: AnalyzeRequest, ent: Any) -> tuple[Any, Dict[str, Any]]:
+    """(entities at the request threshold, extra response fields) for one entities-stage result."""
+    if not req.rawScores or ent is None:
+        return ent, {}
+    scores = score_sweep.entity_scores(ent)
+    return score_sweep.filter_entities(scores, req.threshold), {"entity_scores": scores, "score_floor": req.score_floor()}
+
+
+def _merge_entities(req: AnalyzeRequest) -> Callable[[List[Any]], Any]:
+    return partial(ticket_text.merge_entities, keep_confidence=req.rawScores)
+
+
+def _merge_fused(req: AnalyzeRequest, parts: List[Any]) -> Dict[str, Any]:
+    """Merge per-window fused results head by head into one fused result (confidences dropped)."""
+    tasks = {**req.severitySchema, **req.intentSchema}
+    return {
+        **ticket_text.merge_entities([{"entities": p.get("entities", {})} for p in parts]),
+        **ticket_text.merge_classification([{task: p.get(task) for task in tasks} for p in parts]),
+        **ticket_text.merge_structures([{parent: p.get(parent, []) for parent in req.jsonSchema} for p in parts]),
+    }
+
+
+def _extract_windows(
+    windows: List[List[str]], schema: Any, merge: Callable[[List[Any]], Any], scored: bool = False, **kwargs: Any
+) -> List[Any]:
+    """Run every ticket's windows through one batch_extract and merge them back to one result per ticket.
+
+    A ticket with a single window keeps its result as-is. Stages with classification heads (scored=True)
+    ask for confidences whenever a ticket is split, so merge can weigh the windows. In that case every
+    ticket is merged, which also drops the confidences again.
+    """
+    flat = [w for ws in windows for w in ws]
+    split = len(flat) > len(windows)
+    if scored and split:
+        kwargs["include_confidence"] = True
+    if len(flat) == 1:
+        raw = [extractor.extract(flat[0], schema, **kwargs)]
+    else:
+        # One padded pass per ticket batch; a long ticket's windows share a pass (max_windows caps its size)
+        raw = extractor.batch_extract(flat, schema, batch_size=max(len(windows), TRIAGE_MAX_WINDOWS), **kwargs)
+    results, i = [], 0
+    for ws in windows:
+        part = raw[i:i + len(ws)]
+        i += len(ws)
+        results.append(merge(part) if len(ws) > 1 or (scored and split) else part[0])
+    return results
+
+
+def _model_stage(
+    windows: List[List[str]], decided: List[Any], schema: Any, merge: Callable[[List[Any]], Any], scored: bool = False, **kwargs: Any
+) -> List[Any]:
+    """Stage results per ticket: the cascade's where it decided (not None), else one _extract_windows batch for the rest."""
+    need = [i for i, d in enumerate(decided) if d is None]
+    results = list(decided)
+    if need:
+        for i, result in zip(need, _extract_windows([windows[i] for i in need], schema, merge, scored, **kwargs)):
+            results[i] = result
+    return results
+
+
+def _cascade(req: AnalyzeRequest) -> Optional[prefilter.Decision]:
+    """The prefilter's decision for a cascade-mode ticket; None in other modes. Tickets without rules decide nothing."""
+    if req.mode != "cascade":
+        return None
+    rules = prefilter.rules_for(req.preset, req.compiled())
+    if rules is None:
+        return prefilter.Decision()
+    return rules.decide("\n".join(req.windows()), TRIAGE_CASCADE_MIN_SCORE, TRIAGE_CASCADE_MIN_MARGIN)
+
+
+def _count_cascade(preset: str, decided_by: Optional[Dict[str, str]]) -> None:
+    for stage, by in (decided_by or {}).items():
+        m_cascade_stages.inc(preset=preset, stage=stage, decided_by=by)
+
+
+_SKIPPED = object()  # _model_stage placeholder for a ticket that drops the stage
+
+
+def _stage_wanted(req: AnalyzeRequest, stage: str, skipped: List[str]) -> bool:
+    """False, with the stage added to `skipped`, when the admission ladder dropped it or it would overrun the deadline."""
+    if stage in req.skips():
+        reason = "load"
+    elif admission is not None and not admission.fits(stage, req.deadline()):
+        reason = "deadline"
+    else:
+        return True
+    skipped.append(stage)
+    m_skipped_stages.inc(stage=stage, reason=reason)
+    return False
+
+
+def _optional_stage(reqs: List[AnalyzeRequest], decided: List[Any], skipped: List[List[str]], stage: str) -> List[Any]:
+    """decided, with _SKIPPED for the undecided tickets that drop `stage` (see _stage_wanted)."""
+    return [d if d is not None or _stage_wanted(r, stage, s) else _SKIPPED for r, d, s in zip(reqs, decided, skipped)]
+
+
+def _cache_key(req: AnalyzeRequest) -> str:
+    """Content address of a triage: the stripped ticket text (windows() derives from it) plus everything that shapes the output."""
+    return content_key(req.text.strip(), _schema_key(req))
+
+
+def _split_fused(req: AnalyzeRequest, result: Dict[str, Any]) -> tuple[Any, Any, Any, Any]:
+    """Split a fused extract() result back into the (entities, severity, intent, ticket_fields) shapes."""
+    ent = {"entities": result.get("entities", {})}
+    sev = {task: result.get(task) for task in req.severitySchema}
+    itn = {task: result.get(task) for task in req.intentSchema}
+    j = {parent: result.get(parent, []) for parent in req.jsonSchema}
+    return ent, sev, itn, j
+
+
+_encoder_timing = threading.local()  # .timer: the _EncoderTimer active on this thread, if any
+_hooked_encoders: "weakref.WeakSet[Any]" = weakref.WeakSet()
+_hook_lock = threading.Lock()
+
+
+def _encoder_pre(*_: Any) -> None:
+    timer = getattr(_encoder_timing, "timer", None)
+    if timer is not None:
+        timer._pre()
+
+
+def _encoder_post(*_: Any) -> None:
+    timer = getattr(_encoder_timing, "timer", None)
+    if timer is not None:
+        timer._post()
+
+
+class _EncoderTimer:
+    """Times encoder forward passes via module hooks, splitting a call into preprocess/encode/decode.
+
+    The hooks are installed once per encoder and credit only the timer active on the calling
+    thread, so concurrent fused requests in the threadpool never time each other's passes.
+    """
+
+    def __init__(self, model: Any) -> None:
+        self.encoder = getattr(model, "encoder", None)
+        self.first_start: Optional[float] = None
+        self.encode_s = 0.0
+        self._start = 0.0
+        self._outer: Optional["_EncoderTimer"] = None
+
+    def _pre(self) -> None:
+        self._start = time.perf_counter()
+        if self.first_start is None:
+            self.first_start = self._start
+
+    def _post(self) -> None:
+        self.encode_s += time.perf_counter() - self._start
+
+    def __enter__(self) -> "_EncoderTimer":
+        if self.encoder is not None and hasattr(self.encoder, "register_forward_hook"):
+            with _hook_lock:
+                if self.encoder not in _hooked_encoders:
+                    self.encoder.register_forward_pre_hook(_encoder_pre)
+                    self.encoder.register_forward_hook(_encoder_post)
+                    _hooked_encoders.add(self.encoder)
+        self._outer = getattr(_encoder_timing, "timer", None)
+        _encoder_timing.timer = self
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        _encoder_timing.timer = self._outer
+
+    def timings_ms(self, t0: float, t1: float) -> Dict[str, float]:
+        total = t1 - t0
+        preprocess = (self.first_start - t0) if self.first_start is not None else 0.0
+        return {
+            "preprocess": preprocess * 1000.0,
+            "encode": self.encode_s * 1000.0,
+            "decode": (total - preprocess - self.encode_s) * 1000.0,
+            "total": total * 1000.0,
+        }
+
+
+def _analyze_fused(reqs: List[AnalyzeRequest]) -> tuple[List[tuple[Any, Any, Any, Any]], Dict[str, float]]:
+    """Run all four heads for tickets sharing one schema from a single encoder pass per batch."""
+    head = reqs[0]
+    schema = head.compiled().fused(head.threshold)
+    t0 = time.perf_counter()
+    with _EncoderTimer(extractor) as timer:
+        raw = _extract_windows([r.windows() for r in reqs], schema, partial(_merge_fused, head), scored=True)
     t1 = time.perf_counter()
+    return [_split_fused(head, r) for r in raw], timer.timings_ms(t0, t1)
+
+
+def _analyze_batch(reqs: List[AnalyzeRequest]) -> tuple[List[AnalyzeResponse], Dict[str, float]]:
+    """Run all four stages over tickets sharing one schema, one padded batch per stage.
+
+    Long tickets run as several windows in the same batch and are merged back (_extract_windows).
+    Per-ticket timings_ms are the batch stage times amortized over the batch size.
+    """
+    head = reqs[0]
+    texts = [r.text.strip() for r in reqs]
+    windows = [r.windows() for r in reqs]
+    n = len(texts)
+    tp = time.perf_counter()
+    decisions = [_cascade(r) for r in reqs]  # None unless mode is "cascade"
+    skipped: List[List[str]] = [[] for _ in reqs]
+
+    if head.mode == "fused":
+        outputs, batch_timings = _analyze_fused(reqs)
+        ents, sevs, itns, js = (list(x) for x in zip(*outputs))
+    else:
+        compiled = head.compiled()
+        # Stages the cascade decided skip the model (staged mode decides nothing)
+        decided = {
+            stage: [getattr(d, stage) if d is not None else None for d in decisions]
+            for stage in ("entities", "severity", "intent")
+        }
+        # Routing inputs first; tickets degraded by admission (or short on deadline) skip entities / extract_json
+        t0 = time.perf_counter()
+        sevs = _model_stage(windows, decided["severity"], compiled.severity, ticket_text.merge_classification, scored=True)
+        t1 = time.perf_counter()
+
+        itns = _model_stage(windows, decided["intent"], compiled.intent, ticket_text.merge_classification, scored=True)
+        t2 = time.perf_counter()
+
+        ent_decided = _optional_stage(reqs, decided["entities"], skipped, "entities")
+        ents = _model_stage(windows, ent_decided, compiled.entities, _merge_entities(head), **_entity_kwargs(head))
+        t3 = time.perf_counter()
+
+        js = _model_stage(windows, _optional_stage(reqs, [None] * n, skipped, "extract_json"), compiled.ticket_fields, ticket_text.merge_structures)
+        t4 = time.perf_counter()
+        ents, js = ([None if x is _SKIPPED else x for x in xs] for xs in (ents, js))
+
+        batch_timings = {
+            "severity": (t1 - t0) * 1000.0,
+            "intent": (t2 - t1) * 1000.0,
+            "entities": (t3 - t2) * 1000.0,
+            "extract_json": (t4 - t3) * 1000.0,
+            "total": (t4 - t0) * 1000.0,
+        }
+        if head.mode == "cascade":
+            batch_timings["prefilter"] = (t0 - tp) * 1000.0
+            batch_timings["total"] = (t4 - tp) * 1000.0
+    per_ticket = {k: v / n for k, v in batch_timings.items()}
+
+    results: List[AnalyzeResponse] = []
+    for text, ws, decision, skip, ent, sev, itn, j in zip(texts, windows, decisions, skipped, ents, sevs, itns, js):
+        ent, raw = _split_entities(head, ent)
+        severity_val, intent_val = _label(sev), _label(itn)
+        routing = _route(severity_val, intent_val)
+        _remember(text, routing, severity_val, intent_val)
+        timings_ms = {k: v for k, v in per_ticket.items() if k not in skip}
+        _observe_stages(head.preset, timings_ms)
+        decided_by = decision.decided_by() if decision is not None else None
+        _count_cascade(head.preset, decided_by)
+        results.append(AnalyzeResponse(
+            preset=head.preset,
+            entities=ent,
+            severity=sev,
+            intent=itn,
+            ticket_fields=j,
+            routing=routing,
+            timings_ms=dict(timings_ms, batch_size=float(n), chunks=float(len(ws))),
+            decided_by=decided_by,
+            skipped_stages=skip or None,
+            **raw,
+        ))
+    return results, batch_timings
+
+
+def _on_model_thread(fn: Any, *args: Any) -> Any:
+    """Run fn on the scheduler's model thread when it is running, else inline."""
+    if scheduler is None or not scheduler.running:
+        return fn(*args)
+    try:
+        return scheduler.call(lambda: fn(*args)).result()
+    except (SchedulerFull, SchedulerStopped) as exc:
+        raise HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": "1"})
+
+
+@app.post("/analyze/batch", response_model=AnalyzeBatchResponse)
+async def analyze_batch(
+    req: AnalyzeBatchRequest,
+    x_triage_deadline_ms: Optional[float] = Header(default=None, gt=0),
+) -> AnalyzeBatchResponse:
+    presets_in_batch = {t.preset for t in req.tickets}
+    for ticket in req.tickets:
+        ticket.start_deadline(x_triage_deadline_ms or ticket.deadlineMs or TRIAGE_DEADLINE_MS)
+    with _counting_errors(presets_in_batch.pop() if len(presets_in_batch) == 1 else "mixed"):
+        response = await _analyze_batch_request(req)
+    for ticket, result in zip(req.tickets, response.results):
+        _count_triage(ticket.preset, result.routing, result.cache)
+    return response
+
+
+async def _analyze_batch_request(req: AnalyzeBatchRequest) -> AnalyzeBatchResponse:
+    """Cache hits answer at once; each forward-pass batch holds one admission slot per ticket while it runs."""
+    _require_model()
+
+    t0 = time.perf_counter()
+    results: List[Optional[AnalyzeResponse]] = [None] * len(req.tickets)
+    batches: List[Dict[str, Any]] = []
+
+    # Group by schema so each forward pass shares one label prompt; keep original order for the response.
+    groups: Dict[str, List[int]] = {}
+    for i, ticket in enumerate(req.tickets):
+        cached = triage_cache.get(_cache_key(ticket)) if triage_cache is not None else None
+        if cached is not None:
+            results[i] = cached.model_copy(update={"cache": "hit", "scheduler": None})
+            _remember(ticket.text.strip(), cached.routing, _label(cached.severity), _label(cached.intent))
+            continue
+        groups.setdefault(_schema_key(ticket), []).append(i)
+
+    for indexes in groups.values():
+        for start in range(0, len(indexes), req.batchSize):
+            chunk = indexes[start:start + req.batchSize]
+            tickets = [req.tickets[i] for i in chunk]
+            try:
+                async with _admitted(tickets):
+                    chunk_results, batch_timings = await run_in_threadpool(_on_model_thread, _analyze_batch, tickets)
+            except Overloaded as exc:
+                raise _shed(exc)
+            for i, result in zip(chunk, chunk_results):
+                if triage_cache is not None:
+                    if not result.skipped_stages:
+                        triage_cache.put(_cache_key(req.tickets[i]), result)
+                    result = result.model_copy(update={"cache": "miss"})
+                results[i] = result
+            batches.append({
+                "size": len(chunk),
+                "preset": req.tickets[chunk[0]].preset,
+                "indexes": chunk,
+                "chunks": sum(len(req.tickets[i].windows()) for i in chunk),
+                "timings_ms": batch_timings,
+            })
+    total_ms = (time.perf_counter() - t0) * 1000.0
+
+    return AnalyzeBatchResponse(
+        results=results,
+        batches=batches,
+        timings_ms={
+            "total": total_ms,
+            "per_ticket": total_ms / len(req.tickets),
+            "tickets_per_sec": len(req.tickets) / (total_ms / 1000.0) if total_ms > 0 else 0.0,
+        },
+    )
+
+
+@app.post("/analyze", response_model=AnalyzeResponse)
+async def analyze(
+    req: AnalyzeRequest,
+    x_triage_profile: Optional[str] = Header(default=None),
+    x_triage_deadline_ms: Optional[float] = Header(default=None, gt=0),
+) -> AnalyzeResponse:
+    req.start_deadline(x_triage_deadline_ms or req.deadlineMs or TRIAGE_DEADLINE_MS)
+    with _counting_errors(req.preset):
+        _require_model()
+
+        kind = profiler.requested_kind(x_triage_profile) if profiler is not None else None
+        if kind is not None:
+            try:
+                async with _admitted([req]):
+                    result = await run_in_threadpool(_analyze_profiled, req, kind)
+            except Overloaded as exc:
+                raise _shed(exc)
+        else:
+            result = await _analyze_admitted(req)
+    _count_triage(req.preset, result.routing, result.cache)
+    return result
+
+
+async def _analyze_admitted(req: AnalyzeRequest) -> AnalyzeResponse:
+    """Cache hits answer at once; other tickets wait on the event loop for an admission slot, then run in the threadpool."""
+    key = _cache_key(req) if triage_cache is not None else None
+    hit = triage_cache.get(key, count_miss=False) if key is not None else None
+    if hit is not None:
+        return _served_from_cache(req, hit, "hit")
+    try:
+        async with _admitted([req]):
+            return await run_in_threadpool(_analyze_cached, req, key)
+    except Overloaded as exc:
+        raise _shed(exc)
+
+
+@asynccontextmanager
+async def _admitted(reqs: List[AnalyzeRequest]) -> AsyncIterator[None]:
+    """Hold one admission slot per ticket for the block and apply its ladder rung to each (raises Overloaded).
+
+    The earliest deadline among reqs bounds the wait. A no-op without admission control, or with no
+    tickets (nothing to run on the model).
+    """
+    if admission is None or not reqs:
+        yield
+        return
+    deadlines = [r.deadline() for r in reqs if r.deadline() is not None]
+    async with admission.admit(min(deadlines, default=None), weight=len(reqs)) as skip:
+        for req in reqs:
+            req.degrade(skip)
+        yield
+
+
+def _shed(exc: Overloaded) -> HTTPException:
+    m_triage_shed.inc(reason=exc.reason)
+    return HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": str(exc.retry_after_s)})
+
+
+def _analyze_cached(req: AnalyzeRequest, key: Optional[str]) -> AnalyzeResponse:
+    if key is None:
+        return _analyze_scheduled(req)
+    # Results missing skipped stages are returned but not cached
+    result, status = triage_cache.get_or_compute(key, lambda: _analyze_scheduled(req), keep=lambda r: not r.skipped_stages)
+    if status != "miss":
+        return _served_from_cache(req, result, status)
+    return result.model_copy(update={"cache": status})
 
-    sev = extractor.classify_text(text, req.severitySchema)
-    t2 = time.perf_counter()
 
-    itn = extractor.classify_text(text, req.intentSchema)
-    t3 = time.perf_counter()
+def _served_from_cache(req: AnalyzeRequest, result: AnalyzeResponse, status: str) -> AnalyzeResponse:
+    # Served without running the model: still record the triage for draft memory.
+    _remember(req.text.strip(), result.routing, _label(result.severity), _label(result.intent))
+    return result.model_copy(update={"scheduler": None, "cache": status})
 
-    j = extractor.extract_json(text, req.jsonSchema)
-    t4 = time.perf_counter()
 
-    severity_val = next(iter(sev.values())) if isinstance(sev, dict) and sev else ""
-    intent_val = next(iter(itn.values())) if isinstance(itn, dict) and itn else ""
+def _analyze_profiled(req: AnalyzeRequest, kind: str) -> AnalyzeResponse:
+    """Run one ticket inline (no cache, no scheduler) under the profiler, response serialization included."""
+    with profiler.capture(kind, req.preset) as info:
+        result = _analyze_one(req)
+        result.model_dump_json()
+    if "file" in info:
+        info["url"] = f"/profiles/{info['file']}"
+    return result.model_copy(update={"profile": info})
 
-    routing = _route(str(severity_val), str(intent_val))
 
-    # Memory: append triage for "similar ticket" use in draft
-    global _triage_memory
-    _triage_memory.append({
-        "ticket": text,
-        "routing": routing,
-        "intent": str(intent_val),
-        "severity": str(severity_val),
-    })
-    _triage_memory = _triage_memory[-MEMORY_MAX:]
+def _analyze_scheduled(req: AnalyzeRequest) -> AnalyzeResponse:
+    """Run one ticket through the micro-batching scheduler when enabled, else inline."""
+    if scheduler is not None and scheduler.running:
+        try:
+            result, stats = scheduler.submit(req).result()
+        except (SchedulerFull, SchedulerStopped) as exc:
+            raise HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": "1"})
+        return result.model_copy(update={"scheduler": stats})
+    return _analyze_one(req)
+
+
+def _analyze_one(req: AnalyzeRequest) -> AnalyzeResponse:
+    """Triage one ticket on the calling thread."""
+    text = req.text.strip()
+    windows = req.windows()
+    if len(windows) > 1 or req.mode == "cascade":
+        # Long ticket: its windows run as one batch per stage and are merged back.
+        # Cascade: the batch path runs the prefilter and only the stages it left undecided.
+        results, _ = _analyze_batch([req])
+        del results[0].timings_ms["batch_size"]
+        return results[0]
+
+    skipped: List[str] = []
+    if req.mode == "fused":
+        outputs, timings_ms = _analyze_fused([req])
+        ent, sev, itn, j = outputs[0]
+    else:
+        # Precompiled preset schemas (presets.py); the extract() calls match extract_entities/classify_text/extract_json.
+        compiled = req.compiled()
+        # Routing inputs first: under load or a tight deadline entities and extract_json may be skipped
+        t0 = time.perf_counter()
+        sev = extractor.extract(windows[0], compiled.severity)
+        t1 = time.perf_counter()
+
+        itn = extractor.extract(windows[0], compiled.intent)
+        t2 = time.perf_counter()
+
+        timings_ms = {"severity": (t1 - t0) * 1000.0, "intent": (t2 - t1) * 1000.0}
+        ent = j = None
+        if _stage_wanted(req, "entities", skipped):
+            s0 = time.perf_counter()
+            ent = extractor.extract(windows[0], compiled.entities, **_entity_kwargs(req))
+            timings_ms["entities"] = (time.perf_counter() - s0) * 1000.0
+
+        if _stage_wanted(req, "extract_json", skipped):
+            s0 = time.perf_counter()
+            j = extractor.extract(windows[0], compiled.ticket_fields)
+            timings_ms["extract_json"] = (time.perf_counter() - s0) * 1000.0
+        timings_ms["total"] = (time.perf_counter() - t0) * 1000.0
+    timings_ms["chunks"] = 1.0
+
+    ent, raw = _split_entities(req, ent)
+    severity_val, intent_val = _label(sev), _label(itn)
+    routing = _route(severity_val, intent_val)
+    _remember(text, routing, severity_val, intent_val)
+    _observe_stages(req.preset, timings_ms)
 
     return AnalyzeResponse(
         preset=req.preset,
@@ -216,11 +1444,249 @@ def analyze(req: AnalyzeRequest) -> AnalyzeResponse:
         intent=itn,
         ticket_fields=j,
         routing=routing,
-        timings_ms={
-            "entities": (t1 - t0) * 1000.0,
-            "severity": (t2 - t1) * 1000.0,
-            "intent": (t3 - t2) * 1000.0,
-            "extract_json": (t4 - t3) * 1000.0,
-            "total": (t4 - t0) * 1000.0
-        },
+        timings_ms=timings_ms,
+        skipped_stages=skipped or None,
+        **raw,
+    )
+
+
+def _stream_event(event: str, data: Any, ms: Optional[float], t0: float) -> bytes:
+    """One NDJSON line: {"event", "data", "ms" (stage time), "elapsed_ms" (since request start)}."""
+    line = {"event": event, "data": data, "ms": ms, "elapsed_ms": (time.perf_counter() - t0) * 1000.0}
+    return (json.dumps(line, default=str) + "\n").encode("utf-8")
+
+
+def _analyze_stages(
+    req: AnalyzeRequest, key: Optional[str], cached: Optional[AnalyzeResponse]
+) -> Iterator[tuple[str, Any, Optional[float]]]:
+    """Run the staged pipeline, yielding (event, data, stage ms) for each stage as soon as it finishes.
+
+    Severity and intent run first so routing is emitted before entities and extract_json. The caller
+    looks up `key` once: `cached` is replayed as is, and on a miss the result is stored under `key`.
+    """
+    t0 = time.perf_counter()
+    if cached is not None:
+        _remember(req.text.strip(), cached.routing, _label(cached.severity), _label(cached.intent))
+        _count_triage(req.preset, cached.routing, "hit")
+        for event, data in (
+            ("severity", cached.severity),
+            ("intent", cached.intent),
+            ("routing", cached.routing),
+            ("entities", cached.entities),
+            ("ticket_fields", cached.ticket_fields),
+        ):
+            yield event, data, 0.0
+        if cached.entity_scores is not None:
+            yield "entity_scores", {"entity_scores": cached.entity_scores, "score_floor": cached.score_floor}, None
+        yield "done", {"preset": cached.preset, "timings_ms": cached.timings_ms, "decided_by": cached.decided_by, "cache": "hit"}, None
+        return
+
+    text = req.text.strip()
+    windows = [req.windows()]
+    compiled = req.compiled()
+    timings_ms: Dict[str, float] = {"chunks": float(len(windows[0]))}
+    decision = _cascade(req)
+    decided_by = decision.decided_by() if decision is not None else None
+    if decision is None:
+        decision = prefilter.Decision()  # staged: nothing decided, every stage runs the model
+    else:
+        timings_ms["prefilter"] = (time.perf_counter() - t0) * 1000.0
+    try:
+        s0 = time.perf_counter()
+        sev = decision.severity or _on_model_thread(
+            lambda: _extract_windows(windows, compiled.severity, ticket_text.merge_classification, scored=True)[0]
+        )
+        timings_ms["severity"] = (time.perf_counter() - s0) * 1000.0
+        yield "severity", sev, timings_ms["severity"]
+
+        s0 = time.perf_counter()
+        itn = decision.intent or _on_model_thread(
+            lambda: _extract_windows(windows, compiled.intent, ticket_text.merge_classification, scored=True)[0]
+        )
+        timings_ms["intent"] = (time.perf_counter() - s0) * 1000.0
+        yield "intent", itn, timings_ms["intent"]
+
+        severity_val, intent_val = _label(sev), _label(itn)
+        routing = _route(severity_val, intent_val)
+        _remember(text, routing, severity_val, intent_val)
+        _count_triage(req.preset, routing, "miss" if key is not None else None)
+        timings_ms["routing"] = (time.perf_counter() - t0) * 1000.0  # time-to-routing
+        yield "routing", routing, timings_ms["routing"]
+
+        # Under load or a tight deadline the admission ladder drops these (no event is sent for them)
+        ent, raw, j = None, {}, None
+        skipped: List[str] = []
+        if decision.entities is not None or _stage_wanted(req, "entities", skipped):
+            s0 = time.perf_counter()
+            ent, raw = _split_entities(req, decision.entities or _on_model_thread(
+                lambda: _extract_windows(windows, compiled.entities, _merge_entities(req), **_entity_kwargs(req))[0]
+            ))
+            timings_ms["entities"] = (time.perf_counter() - s0) * 1000.0
+            yield "entities", ent, timings_ms["entities"]
+            if raw:
+                yield "entity_scores", raw, None
+
+        if _stage_wanted(req, "extract_json", skipped):
+            s0 = time.perf_counter()
+            j = _on_model_thread(lambda: _extract_windows(windows, compiled.ticket_fields, ticket_text.merge_structures)[0])
+            timings_ms["extract_json"] = (time.perf_counter() - s0) * 1000.0
+            yield "ticket_fields", j, timings_ms["extract_json"]
+    except HTTPException as exc:
+        m_triage_errors.inc(preset=req.preset, status=str(exc.status_code))
+        yield "error", {"status": exc.status_code, "detail": exc.detail}, None
+        return
+    except Exception as exc:
+        m_triage_errors.inc(preset=req.preset, status="500")
+        yield "error", {"status": 500, "detail": str(exc)}, None
+        return
+
+    timings_ms["total"] = (time.perf_counter() - t0) * 1000.0
+    _observe_stages(req.preset, {k: v for k, v in timings_ms.items() if k != "routing"})
+    _count_cascade(req.preset, decided_by)
+    result = AnalyzeResponse(
+        preset=req.preset,
+        entities=ent,
+        severity=sev,
+        intent=itn,
+        ticket_fields=j,
+        routing=routing,
+        timings_ms=timings_ms,
+        decided_by=decided_by,
+        skipped_stages=skipped or None,
+        **raw,
     )
+    if key is not None and not skipped:
+        triage_cache.put(key, result)
+    done = {"preset": req.preset, "timings_ms": timings_ms, "decided_by": decided_by}
+    yield "done", {**done, "skipped_stages": skipped} if skipped else done, None
+
+
+async def _admitted_stages(req: AnalyzeRequest) -> AsyncIterator[Optional[tuple[str, Any, Optional[float]]]]:
+    """_analyze_stages on the threadpool, holding an admission slot (ladder and deadline applied) while the model runs.
+
+    Yields None first, once the slot is held, so _start_stages() can turn Overloaded into a 503 before
+    any of the 200 response is sent. Cache hits need no slot: the one lookup made here is what
+    _analyze_stages replays, so a hit cannot expire into an unadmitted model run. The slot is freed
+    after the last stage, before a caller such as /triage moves on to the draft.
+    """
+    key = _cache_key(req) if triage_cache is not None else None
+    cached = triage_cache.get(key) if key is not None else None
+    async with _admitted([] if cached is not None else [req]):
+        yield None
+        async for stage in iterate_in_threadpool(_analyze_stages(req, key, cached)):
+            yield stage
+
+
+async def _start_stages(req: AnalyzeRequest) -> AsyncIterator[Optional[tuple[str, Any, Optional[float]]]]:
+    stages = _admitted_stages(req)
+    try:
+        await stages.__anext__()
+    except Overloaded as exc:
+        raise _shed(exc)
+    return stages
+
+
+async def _analyze_stream_events(stages: AsyncIterator[Any]) -> AsyncIterator[bytes]:
+    t0 = time.perf_counter()
+    try:
+        async for event, data, ms in stages:
+            yield _stream_event(event, data, ms, t0)
+    finally:
+        await stages.aclose()  # a client that disconnects mid-stream frees its admission slot now
+
+
+@app.post("/analyze/stream")
+async def analyze_stream(
+    req: AnalyzeRequest,
+    x_triage_deadline_ms: Optional[float] = Header(default=None, gt=0),
+) -> StreamingResponse:
+    """NDJSON stream of severity, intent, routing, entities, ticket_fields, then done (staged; cascade mode skips the stages its rules decide).
+
+    Admitted like /analyze: 503 + Retry-After when the queue is full, and the ladder or deadline may drop
+    entities / ticket_fields (done then lists skipped_stages).
+    """
+    req.start_deadline(x_triage_deadline_ms or req.deadlineMs or TRIAGE_DEADLINE_MS)
+    with _counting_errors(req.preset):
+        _require_model()
+        stages = await _start_stages(req)
+    return StreamingResponse(_analyze_stream_events(stages), media_type="application/x-ndjson")
+
+
+async def _triage_events(req: TriageRequest, stages: AsyncIterator[Any]) -> AsyncIterator[bytes]:
+    """The /analyze/stream events, then the draft reply, with the draft LLM call started at routing.
+
+    The draft is rendered with the fields known at routing (none yet) and runs while entities and
+    extract_json do. Once ticket_fields arrive, the early draft is kept if they add nothing: every
+    value is empty or already in the ticket or the triage labels (extract_json is extractive, so this
+    is the usual case). Otherwise the draft is cancelled and restarted with the final prompt, the one
+    /draft renders, or kept anyway with draftPolicy="keep".
+    """
+    t0 = time.perf_counter()
+    text = req.text.strip()
+    triage: Dict[str, Any] = {"preset": req.preset}
+    speculative: Optional[tuple[str, Optional[str], asyncio.Task]] = None  # (prompt, similar snippet, LLM call)
+    started_ms = 0.0
+    wanted = False
+    try:
+        async for event, data, ms in stages:
+            yield _stream_event(event, data, ms, t0)
+            if event == "error":
+                return
+            if event in ("done", "entity_scores"):
+                triage.update(data)
+            else:
+                triage[event] = data
+            if event == "routing":
+                wanted = req.draftPriorities is None or data.get("priority") in req.draftPriorities
+                if wanted and draft_llm.configured:
+                    snippet = _find_similar_ticket(text, data)
+                    prompt = _render_draft_prompt(text, {**triage, "ticket_fields": {}}, snippet)
+                    speculative = (prompt, snippet, asyncio.create_task(_complete_draft(prompt, _draft_labels(triage))))
+                    started_ms = (time.perf_counter() - t0) * 1000.0
+                    yield _stream_event("draft_started", {"speculative": True}, None, t0)
+        if not wanted:
+            return
+        if speculative is None:
+            yield _stream_event("draft_error", {"status": 503, "detail": "OPENAI_API_KEY not set; cannot generate draft reply."}, None, t0)
+            return
+
+        prompt, snippet, task = speculative
+        final = _render_draft_prompt(text, triage, snippet)
+        if final == prompt or _fields_add_nothing(text, triage):
+            outcome = "kept"
+        elif req.draftPolicy == "keep":
+            outcome = "stale"  # the draft did not see the extracted fields
+        else:
+            outcome = "restarted"
+            task.cancel()
+            task = asyncio.create_task(_complete_draft(final, _draft_labels(triage)))
+            speculative = (final, snippet, task)
+        m_draft_speculation.inc(outcome=outcome)
+        try:
+            completion = await task
+        except Exception as exc:
+            yield _stream_event("draft_error", {"status": getattr(exc, "status_code", None) or 502, "detail": str(exc)}, None, t0)
+            return
+        result = _draft_response(completion, snippet, triage.get("routing") or {}).model_dump()
+        result["speculation"] = {"outcome": outcome, "started_ms": started_ms}
+        yield _stream_event("draft", result, completion.latency_ms, t0)
+    finally:
+        await stages.aclose()
+        if speculative is not None and not speculative[2].done():
+            speculative[2].cancel()
+
+
+@app.post("/triage")
+async def triage(
+    req: TriageRequest,
+    x_triage_deadline_ms: Optional[float] = Header(default=None, gt=0),
+) -> StreamingResponse:
+    """NDJSON: /analyze/stream's events, then draft (or draft_error); the draft LLM call starts as soon as routing is known.
+
+    The triage stages hold an admission slot like /analyze/stream; the draft does not.
+    """
+    req.start_deadline(x_triage_deadline_ms or req.deadlineMs or TRIAGE_DEADLINE_MS)
+    with _counting_errors(req.preset):
+        _require_model()
+        stages = await _start_stages(req)
+    return StreamingResponse(_triage_events(req, stages), media_type="application/x-ndjson")
@@ -5,6 +5,8 @@ Run from repo root or python/: pytest python/tests -v
 from __future__ import annotations
 
 import json
+import os
+import time
 from pathlib import Path
 
 import pytest
@@ -16,17 +18,39 @@ _server_dir = Path(__file__).resolve().parent.parent
 if str(_server_dir) not in sys.path:
     sys.path.insert(0, str(_server_dir))
 
-from server import app, _load_model
+# Stability/latency tests measure the model, so the triage cache stays off unless explicitly enabled
+os.environ.setdefault("TRIAGE_CACHE", "0")
+# Tests must not read or append to the local triage history
+os.environ.setdefault("TRIAGE_STORE_PATH", "")
+# Draft tests count LLM calls against the stub; test_draft_cache enables its own cache
+os.environ.setdefault("DRAFT_CACHE", "0")
+
+from server import app
 
 FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
 GOLDEN_TICKETS_PATH = FIXTURES_DIR / "golden_tickets.json"
 
 
+MODEL_READY_TIMEOUT_S = 600
+
+
 @pytest.fixture(scope="session")
 def client():
-    # Load the GLiNER2 model before any request; TestClient may not run startup in time
-    _load_model()
-    return TestClient(app)
+    # Entering the client runs the app lifespan, which loads and warms the model in the background;
+    # wait for /health to report ready before any test request.
+    with TestClient(app) as c:
+        deadline = time.monotonic() + MODEL_READY_TIMEOUT_S
+        while True:
+            resp = c.get("/health")
+            if resp.status_code == 200:
+                break
+            state = resp.json()
+            if state.get("state") == "error":
+                pytest.fail(f"Model failed to load: {state.get('error')}")
+            if time.monotonic() > deadline:
+                pytest.fail(f"Model not ready after {MODEL_READY_TIMEOUT_S}s: {state}")
+            time.sleep(0.5)
+        yield c
 
 
 @pytest.fixture(scope="session")
@@ -0,0 +1,109 @@
+"""
+Local OpenAI-compatible stub server for draft tests: POST /v1/chat/completions (JSON or SSE stream).
+"""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+REPLY = "Thanks for reaching out. We are looking into the duplicate charge and will refund it today."
+
+
+class OpenAIStub:
+    """Serves REPLY word by word; records request count, peak concurrency and client ports (connections)."""
+
+    def __init__(self, delay_s: float = 0.0, token_delay_s: float = 0.0) -> None:
+        self.delay_s = delay_s
+        self.token_delay_s = token_delay_s
+        self.requests = 0
+        self.active = 0
+        self.peak_active = 0
+        self.client_ports: set = set()
+        self.prompts: List[str] = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self._server.server_address[1]}/v1"
+
+    def __enter__(self) -> "OpenAIStub":
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is observable
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def do_POST(self) -> None:
+                body = json.loads(self.rfile.read(int(self.headers["content-length"])))
+                with stub._lock:
+                    stub.requests += 1
+                    stub.active += 1
+                    stub.peak_active = max(stub.peak_active, stub.active)
+                    stub.client_ports.add(self.client_address[1])
+                    stub.prompts.append(body["messages"][-1]["content"])
+                try:
+                    time.sleep(stub.delay_s)
+                    if body.get("stream"):
+                        self._stream(body)
+                    else:
+                        self._json(body)
+                finally:
+                    with stub._lock:
+                        stub.active -= 1
+
+            def _usage(self, body) -> dict:
+                prompt_tokens = len(body["messages"][-1]["content"].split())
+                return {"prompt_tokens": prompt_tokens, "completion_tokens": len(REPLY.split()), "total_tokens": prompt_tokens + len(REPLY.split())}
+
+            def _json(self, body) -> None:
+                data = json.dumps({
+                    "id": "chatcmpl-stub", "object": "chat.completion", "created": 0, "model": body["model"],
+                    "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": REPLY}}],
+                    "usage": self._usage(body),
+                }).encode()
+                self.send_response(200)
+                self.send_header("content-type", "application/json")
+                self.send_header("content-length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _stream(self, body) -> None:
+                self.send_response(200)
+                self.send_header("content-type", "text/event-stream")
+                self.send_header("transfer-encoding", "chunked")
+                self.end_headers()
+
+                def send(payload) -> None:
+                    line = f"data: {payload}\n\n".encode()
+                    self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+                    self.wfile.flush()
+
+                words = REPLY.split(" ")
+                for i, word in enumerate(words):
+                    delta = word if i == 0 else " " + word
+                    send(json.dumps({
+                        "id": "chatcmpl-stub", "object": "chat.completion.chunk", "created": 0, "model": body["model"],
+                        "choices": [{"index": 0, "delta": {"content": delta}, "finish_reason": None}],
+                    }))
+                    time.sleep(stub.token_delay_s)
+                send(json.dumps({
+                    "id": "chatcmpl-stub", "object": "chat.completion.chunk", "created": 0, "model": body["model"],
+                    "choices": [], "usage": self._usage(body),
+                }))
+                send("[DONE]")
+                self.wfile.write(b"0\r\n\r\n")
+                self.wfile.flush()
+
+        return Handler
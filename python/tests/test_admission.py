@@ -0,0 +1,210 @@
+"""
+Admission control tests (no model needed: a stand-in extractor that sleeps per stage).
+Covers the bounded queue (503 + Retry-After), deadlines while queued and mid-pipeline, the
+degradation ladder (extract_json first, then entities, routing always), that degraded
+results are not cached, and that /analyze/stream, /triage and /analyze/batch take the same slots.
+Run: pytest python/tests/test_admission.py -v
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+
+import server
+from admission import Admission, Overloaded
+from draft_llm import DraftLLM
+from result_cache import ResultCache
+from tests.openai_stub import OpenAIStub
+from tests.payloads import build_preset_payload
+
+OUTAGE = "Critical: prod down, all users get 500s. This is a complete outage. Sev0."
+
+
+class _SlowExtractor:
+    def __init__(self, stage_s=0.02):
+        self.stage_s = stage_s
+        self.stages = []
+
+    def extract(self, text, schema, threshold=0.5, **kw):
+        time.sleep(self.stage_s)
+        built = schema.build()
+        if built.get("entities"):
+            self.stages.append("entities")
+            return {"entities": {label: [] for label in built["entities"]}}
+        if built.get("classifications"):
+            task = built["classifications"][0]["task"]
+            self.stages.append(task)
+            return {task: {"severity": "sev0", "intent": "incident"}[task]}
+        self.stages.append("extract_json")
+        return {"ticket_fields": [{}]}
+
+    def batch_extract(self, texts, schema, batch_size=8, threshold=0.5, **kw):
+        return [self.extract(text, schema, threshold) for text in texts]
+
+
+@pytest.fixture
+def model(monkeypatch):
+    fake = _SlowExtractor()
+    monkeypatch.setattr(server, "extractor", fake)
+    monkeypatch.setattr(server, "triage_cache", None)
+    monkeypatch.setitem(server._model_state, "status", "ready")
+    return fake
+
+
+def _post_all(payloads, headers=None, path="/analyze"):
+    """Send every payload at once on one event loop (as concurrent clients would) and return the responses in order."""
+    async def run():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(client.post(path, json=p, headers=headers) for p in payloads))
+
+    return asyncio.run(run())
+
+
+def test_admission_queue_deadline_and_ladder():
+    async def run():
+        gate = Admission(max_concurrency=1, max_queue=1, degrade_at=(1, 2))
+        assert gate.skip_for(0) == [] and gate.skip_for(1) == ["extract_json"] and gate.skip_for(5) == ["extract_json", "entities"]
+        async with gate.admit() as skip:
+            assert skip == []
+            queued = gate.admit()  # keep a reference: dropping it would release the slot
+            waiter = asyncio.create_task(queued.__aenter__())
+            await asyncio.sleep(0)
+            assert gate.waiting == 1
+            with pytest.raises(Overloaded) as full:
+                async with gate.admit():
+                    pass
+            assert full.value.reason == "queue_full" and full.value.retry_after_s >= 1
+        assert await waiter == [] and gate.running == 1  # the slot was handed to the waiter
+
+        with pytest.raises(Overloaded) as late:
+            async with gate.admit(deadline=time.perf_counter() + 0.05):
+                pass
+        assert late.value.reason == "deadline" and gate.waiting == 0
+        assert gate.stats()["queue_full"] == 1 and gate.stats()["deadline"] == 1
+
+    asyncio.run(run())
+
+
+def test_ladder_drops_extract_json_then_entities(model, monkeypatch):
+    monkeypatch.setattr(server, "admission", Admission(max_concurrency=1, max_queue=8, degrade_at=(1, 2)))
+    responses = _post_all([build_preset_payload("saas_support", OUTAGE, 0.6)] * 4)
+    assert all(r.status_code == 200 for r in responses)
+    outs = [r.json() for r in responses]
+    # One runs at once: later tickets are admitted with 2, 1 and 0 still waiting behind them
+    assert sorted(len(o["skipped_stages"] or []) for o in outs) == [0, 0, 1, 2]
+    for out in outs:
+        assert out["routing"] == {"next_queue": "oncall_incidents", "priority": "P0"}
+        skipped = out["skipped_stages"] or []
+        assert (out["entities"] is None) == ("entities" in skipped)
+        assert (out["ticket_fields"] is None) == ("extract_json" in skipped)
+        assert not set(skipped) & set(out["timings_ms"])
+    assert model.stages.count("severity") == 4 and model.stages.count("extract_json") == 2
+
+
+def test_queue_full_sheds_with_retry_after(model, monkeypatch):
+    monkeypatch.setattr(server, "admission", Admission(max_concurrency=1, max_queue=1, degrade_at=()))
+    responses = _post_all([build_preset_payload("saas_support", OUTAGE, 0.6)] * 3)
+    assert sorted(r.status_code for r in responses) == [200, 200, 503]
+    shed = next(r for r in responses if r.status_code == 503)
+    assert int(shed.headers["retry-after"]) >= 1
+
+
+def test_deadline_skips_stages_that_would_overrun(model, monkeypatch):
+    gate = Admission(max_concurrency=1, max_queue=8, degrade_at=())
+    monkeypatch.setattr(server, "admission", gate)
+    gate.observe("entities", 5000.0)  # recent entities runs took 5 s: never fits a 1 s budget
+    out = _post_all([build_preset_payload("saas_support", OUTAGE, 0.6)], headers={"X-Triage-Deadline-Ms": "1000"})[0].json()
+    assert out["skipped_stages"] == ["entities"]
+    assert out["ticket_fields"] == {"ticket_fields": [{}]} and out["routing"]["priority"] == "P0"
+
+    # A budget shorter than the wait for a slot sheds the waiting ticket instead
+    model.stage_s = 0.1
+    responses = _post_all([{**build_preset_payload("saas_support", OUTAGE, 0.6), "deadlineMs": 150}] * 2)
+    assert sorted(r.status_code for r in responses) == [200, 503]
+
+
+def test_degraded_results_are_not_cached(model, monkeypatch):
+    monkeypatch.setattr(server, "triage_cache", ResultCache(ttl_s=60))
+    monkeypatch.setattr(server, "admission", Admission(max_concurrency=1, max_queue=8, degrade_at=(1,)))
+    payloads = [build_preset_payload("saas_support", f"{OUTAGE} Region {region}.", 0.6) for region in ("us", "eu", "ap")]
+    outs = [r.json() for r in _post_all(payloads)]
+    degraded = [p for p, o in zip(payloads, outs) if o["skipped_stages"]]
+    assert len(degraded) == 1
+    # The degraded result was not stored: the same ticket runs again, in full, once the queue is empty
+    again = _post_all(degraded)[0].json()
+    assert again["cache"] == "miss" and again["skipped_stages"] is None
+    assert all(r.json()["cache"] == "hit" for r in _post_all([p for p in payloads if p not in degraded]))
+
+
+def test_streams_take_admission_slots_and_degrade(model, monkeypatch):
+    monkeypatch.setattr(server, "admission", Admission(max_concurrency=1, max_queue=2, degrade_at=(1,)))
+    responses = _post_all([build_preset_payload("saas_support", OUTAGE, 0.6)] * 4, path="/analyze/stream")
+    assert sorted(r.status_code for r in responses) == [200, 200, 200, 503]
+    streams = [[json.loads(line) for line in r.text.splitlines()] for r in responses if r.status_code == 200]
+    # The ticket admitted with one still waiting skips extract_json: no ticket_fields event, done says why
+    degraded = [events for events in streams if events[-1]["data"].get("skipped_stages")]
+    assert len(degraded) == 1 and degraded[0][-1]["data"]["skipped_stages"] == ["extract_json"]
+    assert [e["event"] for e in degraded[0]] == ["severity", "intent", "routing", "entities", "done"]
+    assert model.stages.count("extract_json") == 2
+
+
+def test_triage_frees_its_slot_before_the_draft(model, monkeypatch):
+    gate = Admission(max_concurrency=1, max_queue=8, degrade_at=())
+    monkeypatch.setattr(server, "admission", gate)
+    payload = build_preset_payload("saas_support", OUTAGE, 0.6)
+    with OpenAIStub(delay_s=0.5) as stub:
+        monkeypatch.setattr(server, "draft_llm", DraftLLM("sk-test", "stub-model", base_url=stub.base_url))
+
+        async def run():
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=10) as client:
+                await client.post("/triage", json=payload)  # warm up: the first draft call builds the LLM client on the loop
+                triage = asyncio.create_task(client.post("/triage", json=payload))
+                await asyncio.sleep(0.05)  # /triage holds the only slot for its stages
+                t0 = time.perf_counter()
+                analyzed = await client.post("/analyze", json=payload)
+                analyze_s = time.perf_counter() - t0
+                return await triage, analyzed, analyze_s
+
+        triage, analyzed, analyze_s = asyncio.run(run())
+    assert analyzed.status_code == 200 and triage.status_code == 200
+    assert [json.loads(line)["event"] for line in triage.text.splitlines()][-1] == "draft"
+    assert analyze_s < 0.4  # waited for the triage stages, not for the 0.5 s draft
+    assert gate.running == 0 and gate.stats()["admitted"] == 3
+
+
+def test_stream_cache_hit_is_looked_up_once(model, monkeypatch):
+    cache = ResultCache(ttl_s=60)
+    monkeypatch.setattr(server, "triage_cache", cache)
+    gate = Admission(max_concurrency=1, max_queue=8, degrade_at=())
+    monkeypatch.setattr(server, "admission", gate)
+    payload = build_preset_payload("saas_support", OUTAGE, 0.6)
+    for _ in range(2):
+        assert _post_all([payload], path="/analyze/stream")[0].status_code == 200
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert gate.stats()["admitted"] == 1  # the hit replayed without a slot
+
+
+def test_batch_holds_a_slot_per_ticket(model, monkeypatch):
+    gate = Admission(max_concurrency=2, max_queue=0, degrade_at=())
+    monkeypatch.setattr(server, "admission", gate)
+    model.stage_s = 0.05
+    payload = build_preset_payload("saas_support", OUTAGE, 0.6)
+
+    async def run():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=10) as client:
+            batch = asyncio.create_task(client.post("/analyze/batch", json={"tickets": [payload] * 4, "batchSize": 2}))
+            await asyncio.sleep(0.05)  # the first two-ticket batch holds both slots
+            single = await client.post("/analyze", json=payload)
+            return await batch, single
+
+    batch, single = asyncio.run(run())
+    assert batch.status_code == 200 and len(batch.json()["results"]) == 4
+    assert single.status_code == 503 and int(single.headers["retry-after"]) >= 1
+    assert gate.running == 0 and gate.stats()["admitted"] == 2
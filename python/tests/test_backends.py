@@ -0,0 +1,48 @@
+"""
+Inference backend tests (no model needed): backend selection, int8 quantization, ONNX encoder swap.
+Run: pytest python/tests/test_backends.py -v
+"""
+from __future__ import annotations
+
+import pytest
+import torch
+
+from backends import OnnxEncoder, export_encoder, load_extractor, quantize_int8
+
+
+class _TinyEncoder(torch.nn.Module):
+    def __init__(self) -> None:
+        super().__init__()
+        self.embed = torch.nn.Embedding(32, 8)
+        self.proj = torch.nn.Linear(8, 8)
+
+    def forward(self, input_ids, attention_mask=None):
+        hidden = self.proj(self.embed(input_ids)) * attention_mask.unsqueeze(-1)
+        return type("Out", (), {"last_hidden_state": hidden})()
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError, match="TRIAGE_BACKEND"):
+        load_extractor("unused", "tensorrt")
+
+
+def test_int8_quantizes_linear_layers():
+    model = torch.nn.Sequential(torch.nn.Linear(8, 8), torch.nn.ReLU(), torch.nn.Linear(8, 2))
+    x = torch.randn(4, 8)
+    expected = model(x)
+    quantize_int8(model)
+    assert "quantized" in type(model[0]).__module__
+    assert torch.allclose(model(x), expected, atol=0.1)
+
+
+def test_onnx_encoder_matches_torch(tmp_path):
+    pytest.importorskip("onnxruntime")
+    encoder = _TinyEncoder().eval()
+    path = export_encoder(encoder, tmp_path / "tiny.onnx")
+    onnx_encoder = OnnxEncoder(path, threads=1)
+    ids = torch.randint(0, 32, (3, 11))  # batch/sequence differ from the export shape
+    mask = torch.ones_like(ids)
+    with torch.no_grad():
+        expected = encoder(ids, mask).last_hidden_state
+    got = onnx_encoder(input_ids=ids, attention_mask=mask).last_hidden_state
+    assert torch.allclose(got, expected, atol=1e-5)
@@ -0,0 +1,90 @@
+"""
+Bulk triage CLI tests (no model needed: the batched analyze call is replaced by a stand-in):
+ordered JSONL output, bad lines, checkpoint resume after an interruption.
+Run: pytest python/tests/test_bulk_triage.py -v
+"""
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+import bulk_triage  # noqa: E402
+
+import server
+
+
+def _fake_analyze_batch(reqs):
+    results = []
+    for r in reqs:
+        sev = "sev1" if "outage" in r.text else "sev3"
+        results.append(server.AnalyzeResponse(
+            preset=r.preset, entities={}, severity={"severity": sev}, intent={"intent": "other"},
+            ticket_fields={}, routing=server._route(sev, "other"), timings_ms={"total": 1.0},
+        ))
+    return results, {"total": 1.0}
+
+
+@pytest.fixture
+def tickets(tmp_path, monkeypatch):
+    monkeypatch.setattr(bulk_triage, "_worker_init", lambda *args: None)
+    monkeypatch.setattr(server, "_analyze_batch", _fake_analyze_batch)
+    path = tmp_path / "tickets.jsonl"
+    lines = [json.dumps({"id": f"t{i}", "text": f"ticket {i}" + (" outage" if i % 3 == 0 else ""), "preset": "billing"}) for i in range(25)]
+    lines[7] = "{not json"
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+
+def _run(tickets, out, **kwargs):
+    return bulk_triage.run(tickets, out, workers=0, chunk_size=4, batch_size=3, progress=False, **kwargs)
+
+
+def test_outputs_every_line_in_order(tickets, tmp_path):
+    out = tmp_path / "out.jsonl"
+    state = _run(tickets, out)
+    rows = [json.loads(line) for line in out.read_text().splitlines()]
+    assert state["lines_done"] == 25
+    assert [r["line"] for r in rows] == list(range(25))
+    assert "error" in rows[7]
+    assert rows[3]["routing"] == {"next_queue": "oncall_incidents", "priority": "P1"}
+    assert rows[4]["id"] == "t4" and rows[4]["preset"] == "billing"
+    assert not (tmp_path / "out.jsonl.ckpt").exists()
+
+
+def test_resume_after_interruption(tickets, tmp_path, monkeypatch):
+    expected = tmp_path / "expected.jsonl"
+    _run(tickets, expected)
+
+    out = tmp_path / "out.jsonl"
+    calls = {"n": 0}
+    real = bulk_triage._triage_chunk
+
+    def interrupted(chunk, defaults, batch_size):
+        calls["n"] += 1
+        if calls["n"] == 4:
+            raise KeyboardInterrupt
+        return real(chunk, defaults, batch_size)
+
+    monkeypatch.setattr(bulk_triage, "_triage_chunk", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        _run(tickets, out)
+    ckpt = json.loads((tmp_path / "out.jsonl.ckpt").read_text())
+    assert ckpt["lines_done"] == 12
+    with open(out, "a") as f:
+        f.write('{"partial": ')  # torn write after the last checkpoint is discarded on resume
+
+    monkeypatch.setattr(bulk_triage, "_triage_chunk", real)
+    _run(tickets, out)
+    assert out.read_text() == expected.read_text()
+
+
+def test_refuses_to_overwrite_without_checkpoint(tickets, tmp_path):
+    out = tmp_path / "out.jsonl"
+    _run(tickets, out)
+    with pytest.raises(SystemExit):
+        _run(tickets, out)
+    assert _run(tickets, out, restart=True)["lines_done"] == 25
@@ -0,0 +1,99 @@
+"""
+Draft tests against a local OpenAI-compatible stub (no model, no API key): pooled client,
+concurrency limit, token streaming with time-to-first-token.
+Run: pytest python/tests/test_draft.py -v
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from draft_llm import DraftLLM
+from tests.openai_stub import REPLY, OpenAIStub
+
+TRIAGE = {
+    "routing": {"next_queue": "billing_ops", "priority": "P2"},
+    "severity": {"severity": "sev3"},
+    "intent": {"intent": "refund_request"},
+    "ticket_fields": {"ticket_fields": [{"invoice_id": "INV-19383"}]},
+}
+TICKET = "We were billed twice for Invoice INV-19383. Can you refund the duplicate charge?"
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    with OpenAIStub(token_delay_s=0.01) as s:
+        monkeypatch.setattr(server, "draft_llm", DraftLLM("sk-test", "stub-model", base_url=s.base_url))
+        yield s
+
+
+def test_one_pooled_connection_across_drafts():
+    async def run(llm):
+        for _ in range(5):
+            assert (await llm.complete("hello")).draft == REPLY
+        await llm.aclose()
+
+    with OpenAIStub() as s:
+        asyncio.run(run(DraftLLM("sk-test", "stub-model", base_url=s.base_url)))
+    assert s.requests == 5
+    assert len(s.client_ports) == 1  # keep-alive: every draft reused one connection
+
+
+def test_concurrency_limit():
+    async def run(llm):
+        await asyncio.gather(*(llm.complete(f"ticket {i}") for i in range(8)))
+        await llm.aclose()
+
+    with OpenAIStub(delay_s=0.1) as s:
+        asyncio.run(run(DraftLLM("sk-test", "stub-model", base_url=s.base_url, max_concurrency=2)))
+    assert s.requests == 8
+    assert s.peak_active == 2
+
+
+def test_abandoned_stream_releases_its_connection():
+    async def run(llm):
+        tokens = llm.stream("ticket")
+        assert await tokens.__anext__() == REPLY.split(" ")[0]
+        await tokens.aclose()  # the client went away mid-draft
+        assert llm.in_flight == 0
+        # One pooled connection: the next draft only gets it if the abandoned stream gave it back
+        assert (await asyncio.wait_for(llm.complete("next ticket"), 2.0)).draft == REPLY
+        await llm.aclose()
+
+    with OpenAIStub(token_delay_s=0.2) as s:
+        asyncio.run(run(DraftLLM("sk-test", "stub-model", base_url=s.base_url, max_concurrency=1, timeout_s=10.0)))
+    assert s.requests == 2
+
+
+def test_draft_endpoint(stub):
+    resp = TestClient(server.app).post("/draft", json={"text": TICKET, "triage": TRIAGE})
+    assert resp.status_code == 200, resp.text
+    data = resp.json()
+    assert data["draft"] == REPLY
+    assert data["tokens_out"] == len(REPLY.split()) and data["tokens_in"] > 0
+    # /draft shows the extracted fields as sent, even values the ticket already contains
+    assert '- Extracted fields: {"ticket_fields": [{"invoice_id": "INV-19383"}]}' in stub.prompts[-1]
+
+
+def test_draft_stream_reports_ttft(stub):
+    resp = TestClient(server.app).post("/draft/stream", json={"text": TICKET, "triage": TRIAGE})
+    assert resp.status_code == 200
+    events = [json.loads(line) for line in resp.text.splitlines() if line]
+    assert events[0]["event"] == "context"
+    tokens = [e["data"] for e in events if e["event"] == "token"]
+    assert "".join(tokens) == REPLY and len(tokens) == len(REPLY.split())
+    done = events[-1]
+    assert done["event"] == "done"
+    assert 0 < done["data"]["ttft_ms"] < done["data"]["latency_ms"]
+    assert done["data"]["tokens_out"] == len(REPLY.split())
+
+
+def test_draft_needs_api_key(monkeypatch):
+    monkeypatch.setattr(server, "draft_llm", DraftLLM(None, "stub-model"))
+    client = TestClient(server.app)
+    assert client.post("/draft", json={"text": TICKET, "triage": TRIAGE}).status_code == 503
+    assert client.post("/draft/stream", json={"text": TICKET, "triage": TRIAGE}).status_code == 503
@@ -0,0 +1,71 @@
+"""
+Draft cache tests (no model, no API key): repeated drafts skip the LLM, persistence across restarts.
+Run: pytest python/tests/test_draft_cache.py -v
+"""
+from __future__ import annotations
+
+import json
+
+from fastapi.testclient import TestClient
+
+import server
+from draft_llm import DraftLLM
+from result_cache import PersistentResultCache, ResultCache
+from tests.openai_stub import REPLY, OpenAIStub
+from tests.test_draft import TICKET, TRIAGE
+
+
+def test_repeated_draft_is_served_from_cache(monkeypatch):
+    monkeypatch.setattr(server, "draft_cache", ResultCache(ttl_s=60))
+    with OpenAIStub() as stub:
+        monkeypatch.setattr(server, "draft_llm", DraftLLM("sk-test", "stub-model", base_url=stub.base_url))
+        client = TestClient(server.app)
+        first = client.post("/draft", json={"text": TICKET, "triage": TRIAGE}).json()
+        second = client.post("/draft", json={"text": TICKET, "triage": TRIAGE}).json()
+        assert first["cached"] is False and first["tokens_out"] > 0
+        assert second["cached"] is True and second["draft"] == REPLY
+        assert second["tokens_in"] == second["tokens_out"] == 0
+
+        events = [json.loads(line) for line in client.post("/draft/stream", json={"text": TICKET, "triage": TRIAGE}).text.splitlines()]
+        assert "".join(e["data"] for e in events if e["event"] == "token") == REPLY
+        assert events[-1]["data"]["cached"] is True
+
+        # A different triage renders a different prompt: cache miss
+        other = {**TRIAGE, "routing": {"next_queue": "oncall_incidents", "priority": "P1"}}
+        assert client.post("/draft", json={"text": TICKET, "triage": other}).json()["cached"] is False
+        # Same prompt on another model: cache miss
+        monkeypatch.setattr(server, "draft_llm", DraftLLM("sk-test", "other-model", base_url=stub.base_url))
+        assert client.post("/draft", json={"text": TICKET, "triage": TRIAGE}).json()["cached"] is False
+    assert stub.requests == 3
+
+
+def test_persistent_cache_survives_restart_and_expires(tmp_path):
+    path = tmp_path / "drafts.jsonl"
+    cache = PersistentResultCache(path, ttl_s=60)
+    cache.put("a", {"draft": "hello"})
+    cache.put("b", {"draft": "short-lived"}, ttl_s=0.0)
+    reloaded = PersistentResultCache(path, ttl_s=60)
+    assert reloaded.get("a") == {"draft": "hello"}
+    assert reloaded.get("b") is None
+    assert len(path.read_text().splitlines()) == 1  # compacted on load
+
+
+def test_persistent_cache_compacts_rewrites(tmp_path):
+    path = tmp_path / "drafts.jsonl"
+    cache = PersistentResultCache(path, ttl_s=60)
+    for i in range(100):
+        cache.put("same", {"draft": f"v{i}"})
+    assert len(path.read_text().splitlines()) <= 2 * 16 + 1
+    assert PersistentResultCache(path, ttl_s=60).get("same") == {"draft": "v99"}
+
+
+def test_persistent_cache_shared_by_workers(tmp_path):
+    """Two caches on one file (as serve.py workers have): one's compaction keeps the other's appends."""
+    path = tmp_path / "drafts.jsonl"
+    first, second = PersistentResultCache(path, ttl_s=60), PersistentResultCache(path, ttl_s=60)
+    second.put("from-second", {"draft": "kept"})
+    for i in range(100):
+        first.put(f"k{i % 20}", {"draft": f"v{i}"})  # rewrites the file several times
+    reloaded = PersistentResultCache(path, ttl_s=60)
+    assert reloaded.get("from-second") == {"draft": "kept"}
+    assert reloaded.get("k19") == {"draft": "v99"}
@@ -0,0 +1,145 @@
+"""
+Background draft job tests (no model, no API key): bounded workers, 429 backpressure, timings, cancellation,
+and polls / cancels for jobs owned by another serve.py worker (shared JobTable).
+Run: pytest python/tests/test_draft_jobs.py -v
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from draft_jobs import CANCELLED, DONE, ERROR, RUNNING, DraftJobQueue, JobQueueFull, JobTable
+from draft_llm import DraftLLM
+from tests.openai_stub import REPLY, OpenAIStub
+from tests.test_draft import TICKET, TRIAGE
+
+
+def test_bounded_workers_and_backpressure():
+    running = []
+    peak = [0]
+
+    async def run(n):
+        running.append(n)
+        peak[0] = max(peak[0], len(running))
+        await asyncio.sleep(0.05)
+        running.remove(n)
+        return n * 2
+
+    async def main():
+        jobs = DraftJobQueue(run, workers=2, max_queue=3)
+        submitted = [jobs.submit(i) for i in range(3)]
+        await asyncio.sleep(0)  # workers pick up two jobs; one stays queued
+        submitted += [jobs.submit(3), jobs.submit(4)]
+        with pytest.raises(JobQueueFull) as full:
+            jobs.submit(5)
+        assert full.value.retry_after_s >= 1
+        for job in submitted:
+            await jobs.wait(job, 5.0)
+        await jobs.stop()
+        return submitted, jobs.stats()
+
+    submitted, stats = asyncio.run(main())
+    assert [j.result for j in submitted] == [0, 2, 4, 6, 8]
+    assert all(j.status == DONE for j in submitted)
+    assert peak[0] == 2
+    assert stats["completed"] == 5 and stats["rejected"] == 1
+    last = submitted[-1].timings_ms()
+    assert last["queue_wait"] >= 50 and last["run"] >= 50  # waited behind two full rounds of work
+
+
+def test_cancel_queued_and_running_jobs_and_errors():
+    async def run(payload):
+        if payload == "boom":
+            raise RuntimeError("provider down")
+        await asyncio.sleep(10)
+
+    async def main():
+        jobs = DraftJobQueue(run, workers=1, max_queue=10)
+        running, queued = jobs.submit("slow"), jobs.submit("slow")
+        await asyncio.sleep(0.01)
+        assert jobs.cancel(queued) and jobs.cancel(running)
+        await jobs.wait(running, 1.0)
+        failed = jobs.submit("boom")
+        await jobs.wait(failed, 1.0)
+        assert not jobs.cancel(failed)
+        await jobs.stop()
+        return running, queued, failed
+
+    running, queued, failed = asyncio.run(main())
+    assert running.status == queued.status == CANCELLED
+    assert queued.timings_ms()["run"] is None
+    assert failed.status == ERROR and "provider down" in failed.error
+
+
+def test_background_draft_endpoints(monkeypatch):
+    monkeypatch.setattr(server, "_start_model_loader", lambda: None)
+    with OpenAIStub(delay_s=0.05) as stub:
+        monkeypatch.setattr(server, "draft_llm", DraftLLM("sk-test", "stub-model", base_url=stub.base_url))
+        with TestClient(server.app) as client:
+            resp = client.post("/draft", json={"text": TICKET, "triage": TRIAGE, "background": True})
+            assert resp.status_code == 202, resp.text
+            job_id = resp.json()["job_id"]
+            assert resp.headers["location"] == f"/draft/jobs/{job_id}"
+
+            data = client.get(f"/draft/jobs/{job_id}", params={"wait": 5}).json()
+            assert data["status"] == "done"
+            assert data["result"]["draft"] == REPLY
+            assert data["timings_ms"]["llm"] >= 50 and data["timings_ms"]["queue_wait"] is not None
+            assert client.delete(f"/draft/jobs/{job_id}").status_code == 409
+            assert client.get("/draft/jobs/nope").status_code == 404
+
+            monkeypatch.setattr(server.draft_jobs, "max_queue", 0)
+            resp = client.post("/draft", json={"text": TICKET, "triage": TRIAGE, "background": True})
+            assert resp.status_code == 429
+            assert int(resp.headers["retry-after"]) >= 1
+
+
+def test_cancelled_queued_jobs_free_queue_capacity():
+    async def run(payload):
+        await asyncio.sleep(10)
+
+    async def main():
+        jobs = DraftJobQueue(run, workers=1, max_queue=2)
+        jobs.submit("running")
+        await asyncio.sleep(0)
+        queued = [jobs.submit("a"), jobs.submit("b")]
+        with pytest.raises(JobQueueFull):
+            jobs.submit("c")
+        for job in queued:
+            jobs.cancel(job)  # still in the asyncio.Queue until the worker skips it
+        assert jobs.depth() == 0
+        jobs.submit("c")
+        await jobs.stop()
+
+    asyncio.run(main())
+
+
+def test_jobs_owned_by_another_worker(monkeypatch, tmp_path):
+    table = JobTable(tmp_path / "jobs.sqlite3")
+    monkeypatch.setattr(server, "draft_job_table", table)
+    monkeypatch.setattr(server, "_start_model_loader", lambda: None)
+    # "remote" was accepted by another worker: it exists only in the shared table
+    table.save("remote", 1, RUNNING, {"job_id": "remote", "status": RUNNING, "result": None})
+    finish = threading.Timer(0.3, table.save, ("remote", 2, DONE, {"job_id": "remote", "status": DONE, "result": {"draft": REPLY}}))
+    with OpenAIStub(delay_s=2.0) as stub:
+        monkeypatch.setattr(server, "draft_llm", DraftLLM("sk-test", "stub-model", base_url=stub.base_url))
+        with TestClient(server.app) as client:
+            assert client.get("/draft/jobs/remote").json()["status"] == RUNNING
+            finish.start()
+            assert client.get("/draft/jobs/remote", params={"wait": 5}).json()["result"] == {"draft": REPLY}
+            assert client.delete("/draft/jobs/remote").status_code == 409
+            assert client.get("/draft/jobs/nope").status_code == 404
+
+            # A DELETE that lands on another worker flags the job; this worker's watcher cancels it
+            job_id = client.post("/draft", json={"text": TICKET, "triage": TRIAGE, "background": True}).json()["job_id"]
+            assert table.request_cancel(job_id) in ("queued", RUNNING)
+            assert client.get(f"/draft/jobs/{job_id}", params={"wait": 5}).json()["status"] == CANCELLED
+            deadline = time.perf_counter() + 2
+            while table.load(job_id)[0] != CANCELLED and time.perf_counter() < deadline:
+                time.sleep(0.02)
+            assert table.load(job_id)[0] == CANCELLED
@@ -0,0 +1,51 @@
+"""
+Fused-mode encode/decode timing tests (no model needed: a torch module that sleeps in forward).
+Concurrent requests share one encoder; each request's timer must count only its own passes.
+Run: pytest python/tests/test_fused_timings.py -v
+"""
+from __future__ import annotations
+
+import threading
+import time
+
+import torch
+
+import server
+
+
+class _SleepyEncoder(torch.nn.Module):
+    def forward(self, seconds):
+        time.sleep(seconds)
+        return seconds
+
+
+class _Model:
+    def __init__(self) -> None:
+        self.encoder = _SleepyEncoder()
+
+
+def test_concurrent_timers_count_only_their_own_passes():
+    model = _Model()
+    encode_s = {}
+    start = threading.Barrier(2)
+
+    def request(name, passes, seconds):
+        start.wait()
+        with server._EncoderTimer(model) as timer:
+            for _ in range(passes):
+                model.encoder(seconds)
+        encode_s[name] = timer.encode_s
+
+    threads = [
+        threading.Thread(target=request, args=("short", 1, 0.05)),
+        threading.Thread(target=request, args=("long", 4, 0.05)),
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert 0.04 < encode_s["short"] < 0.1  # the other thread's four passes overlap it but are not counted
+    assert 0.19 < encode_s["long"] < 0.3
+    # Hooks stay installed once; passes outside any timer are not attributed anywhere
+    model.encoder(0.0)
+    assert len(model.encoder._forward_pre_hooks) == 1 and len(model.encoder._forward_hooks) == 1
@@ -0,0 +1,31 @@
+"""
+Model lifecycle tests (no model needed): /health readiness and 503s while loading.
+Run: pytest python/tests/test_health.py -v
+"""
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+import server
+from tests.payloads import build_preset_payload
+
+
+def test_not_ready_until_loaded(monkeypatch):
+    monkeypatch.setitem(server._model_state, "status", "loading")
+    client = TestClient(server.app)  # no lifespan: the background loader is not started
+    resp = client.get("/health")
+    assert resp.status_code == 503
+    assert resp.json()["state"] == "loading"
+    resp = client.post("/analyze", json=build_preset_payload("billing", "refund INV-1", 0.6))
+    assert resp.status_code == 503
+    assert resp.headers.get("retry-after")
+
+
+def test_load_error_is_reported(monkeypatch):
+    monkeypatch.setitem(server._model_state, "status", "error")
+    monkeypatch.setitem(server._model_state, "error", "OSError: no such checkpoint")
+    client = TestClient(server.app)
+    resp = client.get("/health")
+    assert resp.status_code == 503
+    assert "no such checkpoint" in resp.json()["error"]
+    assert client.post("/analyze", json=build_preset_payload("billing", "x", 0.6)).status_code == 500
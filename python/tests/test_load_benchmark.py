@@ -0,0 +1,70 @@
+"""
+Load benchmark tests (no model needed: the open-loop driver runs against a stand-in ASGI app):
+arrival schedule, stage percentiles, error counting, baseline regression gate.
+Run: pytest python/tests/test_load_benchmark.py -v
+"""
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+import load_benchmark  # noqa: E402
+
+TICKETS = [{"text": "ticket one", "preset": "saas_support"}, {"text": "FAIL this one", "preset": "billing"}]
+
+
+def _stand_in_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/analyze")
+    async def analyze(body: dict):
+        await asyncio.sleep(0.05)  # slower than the arrival gap, so requests overlap
+        if body["text"].startswith("FAIL"):
+            return JSONResponse({"detail": "overloaded"}, status_code=503)
+        return {"timings_ms": {"encode": 40.0, "total": 50.0, "batch_size": 4.0}}
+
+    return app
+
+
+def _run(rate: float, duration_s: float, seed: int = 0) -> dict:
+    async def go():
+        transport = httpx.ASGITransport(app=_stand_in_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            return await load_benchmark.run_level(client, TICKETS, rate, duration_s, 0.6, seed=seed)
+
+    return asyncio.run(go())
+
+
+def test_open_loop_level_summary():
+    level = _run(rate=100.0, duration_s=0.5)
+    assert 25 <= level["sent"] <= 90  # ~50 Poisson arrivals
+    assert level["ok"] + level["errors"]["503"] == level["sent"]
+    assert level["in_flight_peak"] > 1  # arrivals did not wait for earlier responses
+    assert set(level["stages_ms"]) == {"encode", "total"}  # batch_size is not a duration
+    assert level["stages_ms"]["total"]["p99"] == 50.0
+    assert level["latency_ms"]["p50"] >= 50.0
+    assert level["tickets_per_s"] > 0
+
+
+def test_same_seed_same_schedule():
+    assert _run(50.0, 0.3, seed=7)["sent"] == _run(50.0, 0.3, seed=7)["sent"]
+
+
+def test_baseline_gate():
+    base = {"levels": [{"offered_rps": 4, "tickets_per_s": 4.0, "latency_ms": {"p50": 100.0, "p95": 200.0, "p99": 300.0}}]}
+    same = {"levels": [{"offered_rps": 4.0, "tickets_per_s": 3.9, "latency_ms": {"p50": 110.0, "p95": 230.0, "p99": 300.0}}]}
+    assert load_benchmark.compare_to_baseline(same, base, tolerance=0.2) == []
+
+    worse = {"levels": [
+        {"offered_rps": 4.0, "tickets_per_s": 3.0, "latency_ms": {"p50": 100.0, "p95": 260.0, "p99": 300.0}},
+        {"offered_rps": 8.0, "tickets_per_s": 1.0, "latency_ms": {"p50": 9e9, "p95": 9e9, "p99": 9e9}},  # no baseline level
+    ]}
+    failures = load_benchmark.compare_to_baseline(worse, base, tolerance=0.2)
+    assert len(failures) == 2
+    assert "throughput" in failures[0] and "p95" in failures[1]
@@ -0,0 +1,102 @@
+"""
+/metrics tests (no model needed: a stand-in extractor and the OpenAI stub): Prometheus text format,
+stage histograms, request/error counters by preset and queue, draft latency and tokens, gauges.
+Run: pytest python/tests/test_metrics.py -v
+"""
+from __future__ import annotations
+
+import re
+from typing import Dict
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from draft_llm import DraftLLM
+from metrics import Registry
+from tests.openai_stub import OpenAIStub
+from tests.payloads import build_preset_payload
+from tests.test_draft import TICKET, TRIAGE
+
+_SAMPLE_RE = re.compile(r"^([a-zA-Z_:][a-zA-Z0-9_:]*(?:\{.*\})?) (\S+)$")
+
+
+def _scrape(client: TestClient) -> Dict[str, float]:
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain; version=0.0.4")
+    samples = {}
+    for line in resp.text.splitlines():
+        if line and not line.startswith("#"):
+            match = _SAMPLE_RE.match(line)
+            assert match, f"bad exposition line: {line!r}"
+            samples[match.group(1)] = float(match.group(2))
+    return samples
+
+
+class _StandInExtractor:
+    def extract(self, text, schema, threshold=0.5, **kw):
+        return {"label": "sev1"}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(server, "extractor", _StandInExtractor())
+    monkeypatch.setitem(server._model_state, "status", "ready")
+    return TestClient(server.app)  # no lifespan: the model loader is not started
+
+
+def test_histogram_exposition():
+    registry = Registry()
+    hist = registry.histogram("demo_seconds", "demo", ["stage"], buckets=(0.1, 1.0))
+    hist.observe(0.05, stage="a")
+    hist.observe(0.1, stage="a")  # le is inclusive
+    hist.observe(5.0, stage="a")
+    registry.counter("demo_total", "demo", ["who"]).inc(who='say "hi"')
+    text = registry.render()
+    assert 'demo_seconds_bucket{stage="a",le="0.1"} 2' in text
+    assert 'demo_seconds_bucket{stage="a",le="1"} 2' in text
+    assert 'demo_seconds_bucket{stage="a",le="+Inf"} 3' in text
+    assert 'demo_seconds_count{stage="a"} 3' in text
+    assert 'demo_total{who="say \\"hi\\""} 1' in text
+
+
+def test_analyze_metrics(client, monkeypatch):
+    before = _scrape(client)
+    for _ in range(2):
+        assert client.post("/analyze", json=build_preset_payload("billing", "refund INV-1", 0.6)).status_code == 200
+    monkeypatch.setitem(server._model_state, "status", "loading")
+    assert client.post("/analyze", json=build_preset_payload("billing", "refund INV-1", 0.6)).status_code == 503
+    after = _scrape(client)
+
+    def delta(name):
+        return after.get(name, 0.0) - before.get(name, 0.0)
+
+    for stage in ("entities", "severity", "intent", "extract_json", "total"):
+        assert delta(f'triage_stage_seconds_count{{stage="{stage}",preset="billing"}}') == 2
+    assert delta('triage_requests_total{preset="billing",queue="oncall_incidents",cache="off"}') == 2
+    assert delta('triage_errors_total{preset="billing",status="503"}') == 1
+    assert delta('http_requests_total{path="/analyze",status="200"}') == 2
+    assert after['http_requests_in_flight{path="/analyze"}'] == 0
+    assert after["triage_model_ready"] == 0
+    assert after["process_resident_memory_bytes"] > 0
+
+
+def test_draft_metrics(client, monkeypatch):
+    with OpenAIStub() as stub:
+        monkeypatch.setattr(server, "draft_llm", DraftLLM("sk-test", "stub-model", base_url=stub.base_url))
+        before = _scrape(client)
+        triage = {**TRIAGE, "preset": "billing"}
+        assert client.post("/draft", json={"text": TICKET, "triage": triage}).status_code == 200
+        with client.stream("POST", "/draft/stream", json={"text": TICKET + " again", "triage": triage}) as resp:
+            resp.read()
+        after = _scrape(client)
+
+    def delta(name):
+        return after.get(name, 0.0) - before.get(name, 0.0)
+
+    assert delta('draft_llm_seconds_count{mode="complete"}') == 1
+    assert delta('draft_llm_seconds_count{mode="stream"}') == 1
+    assert delta("draft_llm_ttft_seconds_count") == 1
+    assert delta('draft_requests_total{preset="billing",queue="billing_ops",cached="false"}') == 2
+    assert delta('draft_tokens_total{direction="out"}') > 0
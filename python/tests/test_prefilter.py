@@ -0,0 +1,147 @@
+"""
+Cascade-mode tests (no model needed: a stand-in extractor that records which stages reach it).
+Covers rule decisions and fall-through, rule validation, and the model stages skipped by /analyze,
+/analyze/batch and /analyze/stream, plus the golden report's comparison math.
+Run: pytest python/tests/test_prefilter.py -v
+"""
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+import prefilter
+import presets
+import server
+from tests.payloads import build_analyze_payload, build_preset_payload
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+from cascade_report import build_report  # noqa: E402
+
+REFUND = "We were billed twice for Invoice INV-19383 ($4,500 USD). Please refund the duplicate charge."
+OUTAGE = "Critical: prod down, all users get 500s. This is a complete outage. Sev0."
+VAGUE = "The BigQuery sync job is failing with permission denied. We're on Team plan."
+
+
+class _StageExtractor:
+    def __init__(self):
+        self.stages = []  # (stage, number of texts)
+
+    def _one(self, built):
+        if built.get("entities"):
+            return "entities", {"entities": {label: [] for label in built["entities"]}}
+        if built.get("classifications"):
+            task = built["classifications"][0]["task"]
+            return task, {task: {"severity": "sev2", "intent": "bug"}[task]}
+        return "ticket_fields", {"ticket_fields": [{}]}
+
+    def extract(self, text, schema, threshold=0.5, **kw):
+        stage, out = self._one(schema.build())
+        self.stages.append((stage, 1))
+        return out
+
+    def batch_extract(self, texts, schema, batch_size=8, threshold=0.5, **kw):
+        stage, out = self._one(schema.build())
+        self.stages.append((stage, len(texts)))
+        return [out for _ in texts]
+
+
+@pytest.fixture
+def model(monkeypatch):
+    fake = _StageExtractor()
+    monkeypatch.setattr(server, "extractor", fake)
+    monkeypatch.setattr(server, "triage_cache", None)
+    monkeypatch.setitem(server._model_state, "status", "ready")
+    return fake
+
+
+def _decide(preset, text):
+    return prefilter.RULES[preset].decide(text, server.TRIAGE_CASCADE_MIN_SCORE, server.TRIAGE_CASCADE_MIN_MARGIN)
+
+
+def test_rules_decide_obvious_tickets_only():
+    refund = _decide("billing", REFUND)
+    assert refund.severity == {"severity": "sev3"} and refund.intent == {"intent": "refund_request"}
+    assert refund.decided_by() == {"entities": "model", "severity": "rules", "intent": "rules", "ticket_fields": "model"}
+    assert _decide("saas_support", OUTAGE).severity == {"severity": "sev0"}
+    vague = _decide("saas_support", VAGUE)
+    assert vague.severity is None and vague.intent is None
+    # A billing ticket that also reads like an outage is not confidently low severity
+    assert _decide("billing", "Checkout is down, payment fails for all users, outage since 9am").severity is None
+
+
+def test_register_rules_validates_and_entity_rules_need_full_coverage(monkeypatch):
+    monkeypatch.setattr(presets, "PRESETS", dict(presets.PRESETS))
+    monkeypatch.setattr(prefilter, "RULES", dict(prefilter.RULES))
+    with pytest.raises(ValueError):
+        prefilter.register_rules("billing", intent={"intent": [(r"refund", "no_such_label", 1.0)]})
+    with pytest.raises(ValueError):
+        prefilter.register_rules("billing", entities={"no_such_label": r"x"})
+
+    presets.register_preset(
+        "ids_only", name="IDs", description="pattern-only labels",
+        entity_labels=["invoice_id", "amount"],
+        intent_schema={"intent": ["refund_request", "other"]},
+        json_schema={"ticket_fields": ["invoice_id::str::Invoice ID"]},
+    )
+    rules = prefilter.register_rules("ids_only", entities={"invoice_id": r"\bINV-\d+\b", "amount": r"\$([\d,]+(?:\.\d\d)?)"})
+    assert rules.decide(REFUND).entities == {"entities": {"invoice_id": ["INV-19383"], "amount": ["4,500"]}}
+    assert prefilter.RULES["billing"].decide(REFUND).entities is None  # billing has free-text labels
+
+
+def test_cascade_skips_decided_stages(model):
+    client = TestClient(server.app)
+    out = client.post("/analyze", json={**build_preset_payload("billing", REFUND, 0.6), "mode": "cascade"}).json()
+    assert [stage for stage, _ in model.stages] == ["entities", "ticket_fields"]
+    assert out["decided_by"]["severity"] == out["decided_by"]["intent"] == "rules"
+    assert out["severity"] == {"severity": "sev3"} and out["routing"]["next_queue"] == "billing_ops"
+    assert "prefilter" in out["timings_ms"]
+
+    model.stages.clear()
+    out = client.post("/analyze", json={**build_preset_payload("saas_support", VAGUE, 0.6), "mode": "cascade"}).json()
+    assert [stage for stage, _ in model.stages] == ["severity", "intent", "entities", "ticket_fields"]
+    assert set(out["decided_by"].values()) == {"model"}
+
+    staged = client.post("/analyze", json=build_preset_payload("billing", REFUND, 0.6)).json()
+    assert staged["decided_by"] is None
+    # Inline schemas that differ from the preset get no rules: everything falls through
+    custom = {**build_analyze_payload("billing", REFUND, 0.6), "intentSchema": {"intent": ["refund", "other"]}, "mode": "cascade"}
+    assert set(client.post("/analyze", json=custom).json()["decided_by"].values()) == {"model"}
+
+
+def test_cascade_batch_and_stream(model):
+    client = TestClient(server.app)
+    tickets = [{**build_preset_payload("saas_support", text, 0.6), "mode": "cascade"} for text in (OUTAGE, VAGUE, OUTAGE)]
+    batch = client.post("/analyze/batch", json={"tickets": tickets}).json()
+    assert dict(model.stages)["severity"] == 1  # only the vague ticket reaches the severity stage
+    assert [r["severity"] for r in batch["results"]] == [{"severity": "sev0"}, {"severity": "sev2"}, {"severity": "sev0"}]
+    assert batch["results"][0]["routing"] == {"next_queue": "oncall_incidents", "priority": "P0"}
+
+    model.stages.clear()
+    events = [json.loads(line) for line in client.post("/analyze/stream", json=tickets[0]).text.splitlines()]
+    by_event = {e["event"]: e["data"] for e in events}
+    assert by_event["severity"] == {"severity": "sev0"}
+    assert by_event["done"]["decided_by"]["severity"] == "rules"
+    assert "severity" not in dict(model.stages) and "intent" not in dict(model.stages)
+
+
+def test_report_compares_routing_and_latency():
+    tickets = [
+        {"preset": "billing", "expected_routing": {"next_queue": "billing_ops", "priority": "P2"}},
+        {"preset": "saas_support", "expected_routing": {"next_queue": "general_support", "priority": "P3"}},
+    ]
+    billing, general = {"next_queue": "billing_ops", "priority": "P2"}, {"next_queue": "general_support", "priority": "P3"}
+    full = [{"routing": billing, "ms": 200.0, "decided_by": None}, {"routing": general, "ms": 200.0, "decided_by": None}]
+    cascade = [
+        {"routing": billing, "ms": 100.0, "decided_by": {"severity": "rules", "intent": "rules", "entities": "model"}},
+        {"routing": billing, "ms": 200.0, "decided_by": {"severity": "model", "intent": "model", "entities": "model"}},
+    ]
+    report = build_report(tickets, full, cascade)
+    assert report["agreement_pct"] == 50.0
+    assert report["pipelines"]["cascade"]["accuracy_pct"] == 50.0
+    assert report["latency_saved_pct"] == 25.0
+    assert report["coverage"]["all"] == {"tickets": 2, "severity": 1, "intent": 1, "entities": 0}
+    assert [d["index"] for d in report["disagreements"]] == [1]
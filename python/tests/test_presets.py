@@ -0,0 +1,80 @@
+"""
+Preset registry tests (no model needed): validation, slim payloads, precompiled schema reuse.
+Run: pytest python/tests/test_presets.py -v
+"""
+from __future__ import annotations
+
+import pytest
+from pydantic import ValidationError
+
+import presets
+from server import AnalyzeRequest
+from tests.payloads import PRESETS, build_analyze_payload, build_preset_payload
+
+
+@pytest.mark.parametrize("preset", PRESETS)
+def test_slim_payload_resolves_to_precompiled_schemas(preset):
+    slim = AnalyzeRequest(**build_preset_payload(preset, "ticket", 0.6))
+    full = AnalyzeRequest(**build_analyze_payload(preset, "ticket", 0.6))
+    assert slim.entityLabels == full.entityLabels and slim.jsonSchema == full.jsonSchema
+    assert slim.compiled() is presets.PRESETS[preset].compiled
+    assert full.compiled() is presets.PRESETS[preset].compiled
+
+
+def test_custom_inline_schema_is_compiled_separately():
+    payload = build_analyze_payload("billing", "ticket", 0.6)
+    payload["entityLabels"] = ["invoice_id"]
+    req = AnalyzeRequest(**payload)
+    assert req.compiled() is not presets.PRESETS["billing"].compiled
+    assert req.compiled().entity_labels == ["invoice_id"]
+
+
+def test_unknown_preset_needs_inline_schemas():
+    with pytest.raises(ValidationError):
+        AnalyzeRequest(**build_preset_payload("nope", "ticket", 0.6))
+    req = AnalyzeRequest(**{**build_analyze_payload("billing", "ticket", 0.6), "preset": "custom"})
+    assert req.preset == "custom"
+
+
+def test_malformed_schemas_are_rejected():
+    with pytest.raises(ValueError):
+        presets.validate_schemas([], {"severity": ["sev0"]}, {"intent": ["bug"]}, {"f": ["a::str"]})
+    with pytest.raises(ValueError):
+        presets.validate_schemas(["a", "a"], {"severity": ["sev0"]}, {"intent": ["bug"]}, {"f": ["a::str"]})
+    with pytest.raises(ValidationError):
+        AnalyzeRequest(**{**build_analyze_payload("billing", "ticket", 0.6), "jsonSchema": {"ticket_fields": []}})
+
+
+def test_field_spec_parsing():
+    assert presets.parse_field_spec("region::str::Region") == ("region", "str", None, "Region")
+    assert presets.parse_field_spec("env::[prod|dev]") == ("env", "str", ["prod", "dev"], None)
+    assert presets.parse_field_spec("tags::list::[a|b]") == ("tags", "list", ["a", "b"], None)
+
+
+def test_inline_schemas_are_compiled_once():
+    payload = build_analyze_payload("billing", "ticket", 0.6)
+    payload["entityLabels"] = ["invoice_id", "plan"]
+    first = AnalyzeRequest(**payload).compiled()
+    # Same schemas with keys in another order hit the same entry
+    payload["severitySchema"] = dict(reversed(list(payload["severitySchema"].items())))
+    assert AnalyzeRequest(**payload).compiled() is first
+    payload["entityLabels"] = ["plan", "invoice_id"]
+    assert AnalyzeRequest(**payload).compiled() is not first
+
+
+def test_structures_follow_the_model_record_mode(monkeypatch):
+    class _RecordsModel:
+        enable_records = True
+
+    compiled = presets.PRESETS["billing"].compiled
+    monkeypatch.setattr(presets, "_inline", presets.OrderedDict())
+    try:
+        presets.use_model(_RecordsModel())
+        assert compiled.ticket_fields._record_metadata["ticket_fields"]["mode"] == "natural"
+        assert compiled.fused(0.6)._record_metadata["ticket_fields"]["mode"] == "natural"
+        payload = build_analyze_payload("billing", "ticket", 0.6)
+        payload["entityLabels"] = ["invoice_id"]
+        assert AnalyzeRequest(**payload).compiled().record_mode == "natural"
+    finally:
+        presets.use_model(object())
+    assert compiled.record_mode is None and not compiled.ticket_fields._record_metadata
@@ -0,0 +1,77 @@
+"""
+Profiling hook tests (no model needed: a stand-in extractor): per-request torch trace and stack-sample
+flamegraph linked from the response, armed and sampled time windows, disabled by default.
+Run: pytest python/tests/test_profiling.py -v
+"""
+from __future__ import annotations
+
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from profiling import Profiler
+from tests.payloads import build_preset_payload
+
+PAYLOAD = build_preset_payload("billing", "Refund the duplicate charge on INV-19383", 0.6)
+
+
+class _SlowExtractor:
+    def extract(self, text, schema, threshold=0.5, **kw):
+        time.sleep(0.02)  # long enough for the stack sampler to see it
+        return {"label": "sev3"}
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    monkeypatch.setattr(server, "extractor", _SlowExtractor())
+    monkeypatch.setitem(server._model_state, "status", "ready")
+    monkeypatch.setattr(server, "profiler", Profiler(tmp_path, keep=3))
+    return TestClient(server.app)
+
+
+def test_disabled_by_default(monkeypatch):
+    monkeypatch.setattr(server, "extractor", _SlowExtractor())
+    monkeypatch.setitem(server._model_state, "status", "ready")
+    client = TestClient(server.app)
+    resp = client.post("/analyze", json=PAYLOAD, headers={"X-Triage-Profile": "sample"})
+    assert resp.status_code == 200 and resp.json()["profile"] is None
+    assert client.get("/profiles").status_code == 404
+    assert client.post("/admin/profile", json={"kind": "sample", "seconds": 1}).status_code == 404
+
+
+def test_sample_profile_linked_from_response(client):
+    resp = client.post("/analyze", json=PAYLOAD, headers={"X-Triage-Profile": "sample"})
+    profile = resp.json()["profile"]
+    assert profile["kind"] == "sample" and profile["samples"] > 0
+    folded = client.get(profile["url"]).text
+    assert "_analyze_one" in folded and "extract" in folded
+    stack, count = folded.splitlines()[0].rsplit(" ", 1)
+    assert int(count) > 0 and ";" in stack
+    assert client.post("/analyze", json=PAYLOAD).json()["profile"] is None  # header-less requests are untouched
+
+
+def test_torch_trace_and_armed_window(client):
+    assert client.post("/admin/profile", json={"kind": "torch", "seconds": 30}).json()["mode"] == "per_request"
+    profile = client.post("/analyze", json=PAYLOAD).json()["profile"]  # no header: the window arms it
+    assert profile["kind"] == "torch" and profile["file"].endswith(".json")
+    trace = json.loads(client.get(profile["url"]).content)
+    assert "traceEvents" in trace
+
+
+def test_sample_window_and_pruning(client):
+    resp = client.post("/admin/profile", json={"kind": "sample", "seconds": 0.2})
+    assert resp.status_code == 202
+    assert client.post("/admin/profile", json={"kind": "sample", "seconds": 0.2}).status_code == 409  # one capture at a time
+    for _ in range(3):
+        client.post("/analyze", json=PAYLOAD)
+    deadline = time.monotonic() + 5
+    while client.get(resp.json()["url"]).status_code != 200:
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    for _ in range(4):
+        client.post("/analyze", json=PAYLOAD, headers={"X-Triage-Profile": "sample"})
+    assert len(client.get("/profiles").json()["profiles"]) == 3  # keep=3
+    assert client.get("/profiles/..%2Fsecrets.json").status_code == 404
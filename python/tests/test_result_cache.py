@@ -0,0 +1,80 @@
+"""
+Triage result cache tests (no model needed): LRU/TTL/byte bounds, counters, single-flight.
+Run: pytest python/tests/test_result_cache.py -v
+"""
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from result_cache import ResultCache, content_key
+
+
+def test_content_key_is_order_independent_for_dicts():
+    assert content_key("t", {"a": 1, "b": 2}) == content_key("t", {"b": 2, "a": 1})
+    assert content_key("t", 0.6) != content_key("t", 0.7)
+
+
+def test_lru_eviction_by_bytes():
+    cache = ResultCache(max_bytes=30, size_of=len)
+    cache.put("a", "x" * 10)
+    cache.put("b", "y" * 10)
+    assert cache.get("a") == "x" * 10  # a is now most recently used
+    cache.put("c", "z" * 15)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["bytes"] <= 30
+    cache.put("huge", "h" * 31)  # larger than the whole budget: not stored
+    assert cache.get("huge") is None
+
+
+def test_ttl_expiry():
+    cache = ResultCache(ttl_s=0.01)
+    cache.put("k", {"v": 1})
+    time.sleep(0.02)
+    assert cache.get("k") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_single_flight_coalesces_concurrent_identical_requests():
+    cache = ResultCache()
+    calls = []
+    release = threading.Event()
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return {"routing": "billing_ops"}
+
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        futures = [pool.submit(cache.get_or_compute, "same", compute) for _ in range(5)]
+        time.sleep(0.05)
+        release.set()
+        outputs = [f.result(timeout=5) for f in futures]
+    assert len(calls) == 1
+    assert sorted(status for _, status in outputs) == ["coalesced"] * 4 + ["miss"]
+    assert cache.get_or_compute("same", compute) == ({"routing": "billing_ops"}, "hit")
+
+
+def test_caller_arriving_while_the_result_is_stored_does_not_recompute():
+    calls = []
+    late = []
+
+    def compute():
+        calls.append(1)
+        return {"routing": "billing_ops"}
+
+    class _SlowPut(ResultCache):
+        def put(self, key, value, ttl_s=None):
+            # A second request for the same key lands while the first result is being stored
+            if not late:
+                late.append(ThreadPoolExecutor(max_workers=1).submit(self.get_or_compute, key, compute))
+                time.sleep(0.05)
+            super().put(key, value, ttl_s)
+
+    cache = _SlowPut()
+    assert cache.get_or_compute("same", compute) == ({"routing": "billing_ops"}, "miss")
+    assert late[0].result(timeout=5) == ({"routing": "billing_ops"}, "coalesced")
+    assert len(calls) == 1
@@ -0,0 +1,88 @@
+"""
+Micro-batching scheduler tests (no model needed): batching, grouping by key, error propagation, shutdown.
+Run: pytest python/tests/test_scheduler.py -v
+"""
+from __future__ import annotations
+
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pytest
+
+from scheduler import InferenceScheduler, SchedulerFull, SchedulerStopped, _Item
+
+
+def _echo_batch(items):
+    time.sleep(0.01)
+    return [item["text"].upper() for item in items], {"total": 10.0}
+
+
+def test_concurrent_requests_share_a_batch():
+    sched = InferenceScheduler(_echo_batch, key=lambda item: item["preset"], max_batch=8, max_wait_ms=50)
+    sched.start()
+    try:
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            futures = list(pool.map(lambda i: sched.submit({"preset": "billing", "text": f"t{i}"}), range(8)))
+            outputs = [f.result(timeout=5) for f in futures]
+    finally:
+        sched.stop()
+    assert [result for result, _ in outputs] == [f"T{i}" for i in range(8)]
+    assert max(stats["batch_size"] for _, stats in outputs) > 1
+    assert all({"queue_wait_ms", "queue_depth", "batch_size"} <= set(stats) for _, stats in outputs)
+
+
+def test_groups_by_key():
+    seen = []
+
+    def run_batch(items):
+        seen.append({item["preset"] for item in items})
+        return [item["text"] for item in items], {"total": 0.0}
+
+    sched = InferenceScheduler(run_batch, key=lambda item: item["preset"], max_batch=8, max_wait_ms=50)
+    sched.start()
+    try:
+        futures = [sched.submit({"preset": p, "text": p}) for p in ["billing", "auth_incident", "billing"]]
+        assert [f.result(timeout=5)[0] for f in futures] == ["billing", "auth_incident", "billing"]
+    finally:
+        sched.stop()
+    assert all(len(presets) == 1 for presets in seen)
+
+
+def test_errors_and_queue_limit():
+    def boom(items):
+        raise RuntimeError("model failed")
+
+    sched = InferenceScheduler(boom, key=lambda item: "k", max_queue=0)
+    with pytest.raises(SchedulerFull):
+        sched.submit({"text": "x"})
+
+    sched = InferenceScheduler(boom, key=lambda item: "k")
+    sched.start()
+    try:
+        with pytest.raises(RuntimeError):
+            sched.submit({"text": "x"}).result(timeout=5)
+        assert sched.call(lambda: 42).result(timeout=5) == 42
+    finally:
+        sched.stop()
+
+
+def test_stop_resolves_every_future_and_rejects_new_items():
+    def slow(items):
+        time.sleep(0.2)
+        return [item["text"].upper() for item in items], {"total": 200.0}
+
+    sched = InferenceScheduler(slow, key=lambda item: "k", max_batch=1, max_wait_ms=0)
+    sched.start()
+    running, queued = sched.submit({"text": "a"}), sched.submit({"text": "b"})
+    time.sleep(0.05)  # "a" is on the model thread, "b" waits
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        stopping = pool.submit(sched.stop)
+        time.sleep(0.05)  # stop() has queued its sentinel behind "b"
+        with pytest.raises(SchedulerStopped):
+            sched.submit({"text": "c"})
+        late = _Item({"text": "d"}, Future(), time.perf_counter(), 0, key="k")
+        sched._queue.put(late)  # anything that still ends up behind the sentinel
+        stopping.result(timeout=5)
+    assert running.result(timeout=1)[0] == "A" and queued.result(timeout=1)[0] == "B"
+    with pytest.raises(SchedulerStopped):
+        late.future.result(timeout=1)
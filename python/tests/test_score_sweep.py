@@ -0,0 +1,90 @@
+"""
+Raw-score tests (no model needed: a stand-in extractor that honors threshold and include_confidence):
+one model pass, re-filtered at any threshold; /analyze, /analyze/batch and /analyze/stream agree.
+Run: pytest python/tests/test_score_sweep.py -v
+"""
+from __future__ import annotations
+
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import score_sweep
+import server
+from tests.payloads import build_preset_payload
+
+TEXT = "Refund the duplicate charge on INV-19383 for the Pro plan"
+SPANS = [("INV-19383", 0.92), ("Pro plan", 0.64), ("duplicate charge", 0.41), ("Refund", 0.12)]
+
+
+class _ScoringExtractor:
+    """Every entity label gets the same SPANS; classification returns fixed labels."""
+
+    def __init__(self):
+        self.entity_calls = 0
+
+    def _entities(self, schema, threshold, include_confidence):
+        self.entity_calls += 1
+        labels = schema.build()["entities"]
+        kept = [(t, c) for t, c in SPANS if c >= threshold]
+        return {"entities": {label: [{"text": t, "confidence": c} if include_confidence else t for t, c in kept] for label in labels}}
+
+    def extract(self, text, schema, threshold=0.5, include_confidence=False, **kw):
+        built = schema.build()
+        if built.get("entities"):
+            return self._entities(schema, threshold, include_confidence)
+        if built.get("classifications"):
+            return {"label": "sev3"}
+        return {"ticket_fields": [{}]}
+
+    def batch_extract(self, texts, schema, batch_size=8, threshold=0.5, include_confidence=False, **kw):
+        return [self.extract(t, schema, threshold, include_confidence) for t in texts]
+
+
+@pytest.fixture
+def model(monkeypatch):
+    fake = _ScoringExtractor()
+    monkeypatch.setattr(server, "extractor", fake)
+    monkeypatch.setitem(server._model_state, "status", "ready")
+    return fake
+
+
+def _payload(threshold, raw=True):
+    return {**build_preset_payload("billing", TEXT, threshold), "rawScores": raw}
+
+
+def test_sweep_matches_per_threshold_runs(model):
+    client = TestClient(server.app)
+    raw = client.post("/analyze", json=_payload(0.5)).json()
+    assert raw["score_floor"] == server.TRIAGE_RAW_SCORE_FLOOR
+    assert raw["entities"] == client.post("/analyze", json=_payload(0.5, raw=False)).json()["entities"]
+    calls = model.entity_calls
+    swept = score_sweep.sweep(raw["entity_scores"], [0.3, 0.5, 0.6, 0.7, 0.95], floor=raw["score_floor"])
+    assert model.entity_calls == calls  # no model work
+    for threshold, entities in swept.items():
+        assert entities == client.post("/analyze", json=_payload(threshold, raw=False)).json()["entities"]
+    with pytest.raises(ValueError):
+        score_sweep.sweep(raw["entity_scores"], [0.1], floor=raw["score_floor"])
+
+
+def test_raw_scores_on_batch_and_stream(model):
+    client = TestClient(server.app)
+    single = client.post("/analyze", json=_payload(0.6)).json()
+    batch = client.post("/analyze/batch", json={"tickets": [_payload(0.6), _payload(0.6, raw=False)]}).json()
+    assert batch["results"][0]["entity_scores"] == single["entity_scores"]
+    assert batch["results"][0]["entities"] == batch["results"][1]["entities"] == single["entities"]
+    assert batch["results"][1]["entity_scores"] is None
+    assert len(batch["batches"]) == 2  # raw and filtered tickets run as separate forward passes
+
+    events = [json.loads(line) for line in client.post("/analyze/stream", json=_payload(0.6)).text.splitlines()]
+    by_event = {e["event"]: e["data"] for e in events}
+    assert by_event["entities"] == single["entities"]
+    assert by_event["entity_scores"] == {"entity_scores": single["entity_scores"], "score_floor": single["score_floor"]}
+
+
+def test_raw_scores_run_staged(model):
+    req = server.AnalyzeRequest(**_payload(0.6), mode="fused")
+    assert req.mode == "staged"
+    assert req.score_floor() == min(0.6, server.TRIAGE_RAW_SCORE_FLOOR)
+    assert server.AnalyzeRequest(**_payload(0.2)).score_floor() == 0.2
@@ -0,0 +1,186 @@
+"""
+Long-ticket preprocessing tests (no model needed: a stand-in extractor that reads the windows it is given).
+Covers quote and signature stripping, overlapping windows and the merge helpers. Also checks that
+/analyze, /analyze/batch, /analyze/stream and fused mode run a long ticket's windows as one batch and
+agree on the merged result.
+Run: pytest python/tests/test_ticket_text.py -v
+"""
+from __future__ import annotations
+
+import json
+import re
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+import ticket_text
+from tests.payloads import build_preset_payload
+
+BODY = "Checkout is down for all users in prod since 09:10 UTC.\nEvery payment fails with a 500."
+REPLY = (
+    f"{BODY}\n\nThanks,\nJane Doe\nPlatform Lead | Acme Corp\n+1 555 0100\n\n"
+    "On Mon, Jun 3, 2024 at 9:14 AM Support <support@example.com> wrote:\n"
+    "> Hi Jane, can you share the request id?\n> Thanks, Support"
+)
+LOG_LINE = "2024-06-03T09:10:02Z worker-7 INFO retrying payment job after upstream timeout"
+# Outage statement first, ~850 words of pasted log, the telling error code last, then a signature
+LONG_TICKET = f"Production outage: checkout fails for every customer.\n{chr(10).join([LOG_LINE] * 85)}\nFATAL ERR_UPSTREAM_TIMEOUT\n-- \nJane"
+
+
+class _WindowExtractor:
+    """Scores each window on its own words, like the model would; records every call it gets."""
+
+    def __init__(self):
+        self.calls = []  # (method, number of texts)
+        self.seen = []
+
+    def _one(self, text, built, include_confidence):
+        self.seen.append(text)
+        conf = (lambda value, c: {"text": value, "confidence": c} if include_confidence else value)
+        out = {}
+        if built.get("entities"):
+            codes = re.findall(r"ERR_[A-Z_]+", text)
+            envs = ["prod"] if re.search(r"\bprod", text, re.I) else []
+            out["entities"] = {"error_code": [conf(c, 0.9) for c in codes], "environment": [conf(e, 0.7) for e in envs]}
+        for cls in built.get("classifications", []):
+            outage = "outage" in text.lower()
+            label, c = {
+                "severity": ("sev0", 0.9) if outage else ("sev3", 0.4),
+                "intent": ("incident", 0.8) if outage else ("bug", 0.3),
+            }[cls["task"]]
+            out[cls["task"]] = {"label": label, "confidence": c} if include_confidence else label
+        for structure in built.get("json_structures", []):
+            for parent in structure:
+                code = (re.findall(r"ERR_[A-Z_]+", text) or [None])[0]
+                out[parent] = [{"error_code": conf(code, 0.8) if code else None, "environment": conf("prod", 0.6)}]
+        return out
+
+    def extract(self, text, schema, threshold=0.5, include_confidence=False, **kw):
+        self.calls.append(("extract", 1))
+        return self._one(text, schema.build(), include_confidence)
+
+    def batch_extract(self, texts, schema, batch_size=8, threshold=0.5, include_confidence=False, **kw):
+        self.calls.append(("batch_extract", len(texts)))
+        built = schema.build()
+        return [self._one(t, built, include_confidence) for t in texts]
+
+
+@pytest.fixture
+def model(monkeypatch):
+    fake = _WindowExtractor()
+    monkeypatch.setattr(server, "extractor", fake)
+    monkeypatch.setattr(server, "triage_cache", None)
+    monkeypatch.setitem(server._model_state, "status", "ready")
+    return fake
+
+
+def test_clean_strips_quoted_reply_and_signature():
+    assert ticket_text.clean(REPLY) == BODY
+    assert ticket_text.clean(f"{BODY}\n\nSent from my iPhone") == BODY
+    assert ticket_text.clean(f"{BODY}\n-- \nJane\nAcme") == BODY
+    # A "Thanks," with the rest of the ticket after it is not a signature
+    keep = "Thanks,\n" + "\n".join(f"step {i}: the export still times out at row {i}000" for i in range(8))
+    assert ticket_text.clean(keep) == keep
+    # Nothing but a quoted thread: keep the original rather than send the model an empty string
+    quoted = "On Mon, Jun 3 Support <support@example.com> wrote:\n> only quoted text"
+    assert ticket_text.clean(quoted) == quoted
+
+
+def test_clean_keeps_content_that_looks_like_quotes_or_sign_offs():
+    # An early "Thanks," followed by a short repro list is not a signature
+    repro = "Login loops back to the sign-in page.\n\nThanks,\n1. open the app\n2. click Login\n3. spinner forever"
+    assert ticket_text.clean(repro) == repro
+    # ">" lines outside a quoted reply are pasted shell output or logs
+    shell = "Deploy breaks:\n$ kubectl apply -f deploy.yaml\n> error: no matches for kind Rollout\nPlease advise."
+    assert ticket_text.clean(shell) == shell
+    # A bottom-posted reply: the quoted block goes, the answer under it stays
+    bottom = "On Mon, Jun 3, 2024 at 9:14 AM Support <support@example.com> wrote:\n> Can you share the request id?\n\nIt is req-8841.\n\nThanks,\nJane"
+    assert ticket_text.clean(bottom) == "It is req-8841."
+
+
+def test_split_windows_overlap_and_cap():
+    words = [f"w{i}" for i in range(500)]
+    text = " ".join(words)
+    assert ticket_text.split_windows("short ticket", size=200) == ["short ticket"]
+    windows = ticket_text.split_windows(text, size=200, overlap=40)
+    assert [w.split()[0] for w in windows] == ["w0", "w160", "w320"]
+    assert all(len(w.split()) <= 200 for w in windows)
+    assert windows[0].split()[-40:] == windows[1].split()[:40]
+    assert windows[-1].split()[-1] == "w499"
+
+    capped = ticket_text.split_windows(" ".join(f"w{i}" for i in range(2000)), size=200, overlap=40, max_windows=3)
+    assert len(capped) == 3
+    assert capped[0].startswith("w0 ") and capped[-1].endswith("w1999")
+    with pytest.raises(ValueError):
+        ticket_text.split_windows(text, size=100, overlap=100)
+
+
+def test_merge_helpers():
+    ents = ticket_text.merge_entities(
+        [
+            {"entities": {"error_code": [{"text": "E42", "confidence": 0.6}], "region": []}},
+            {"entities": {"error_code": [{"text": "e42", "confidence": 0.9}, {"text": "E7", "confidence": 0.5}]}},
+        ],
+        keep_confidence=True,
+    )
+    assert ents == {"entities": {"error_code": [{"text": "e42", "confidence": 0.9}, {"text": "E7", "confidence": 0.5}], "region": []}}
+    assert ticket_text.merge_entities([{"entities": {"a": ["x"]}}, {"entities": {"a": ["X", "y"]}}]) == {"entities": {"a": ["x", "y"]}}
+
+    cls = ticket_text.merge_classification([
+        {"severity": {"label": "sev0", "confidence": 0.9}, "tags": [{"label": "a", "confidence": 0.4}]},
+        {"severity": {"label": "sev3", "confidence": 0.5}, "tags": [{"label": "b", "confidence": 0.7}]},
+        {"severity": {"label": "sev3", "confidence": 0.5}, "tags": []},
+    ])
+    assert cls == {"severity": "sev0", "tags": ["b", "a"]}
+
+    fields = ticket_text.merge_structures([
+        {"ticket": [{"code": None, "tags": ["a"]}]},
+        {"ticket": [{"code": {"text": "E42", "confidence": 0.8}, "tags": [{"text": "b", "confidence": 0.5}, "a"]}]},
+        {"ticket": [{"code": "E7", "tags": []}], "other": []},
+    ])
+    assert fields == {"ticket": [{"code": "E42", "tags": ["a", "b"]}], "other": []}
+
+
+def test_long_ticket_runs_as_one_batch_and_merges(model):
+    client = TestClient(server.app)
+    windows = server.AnalyzeRequest(**build_preset_payload("saas_support", LONG_TICKET, 0.6)).windows()
+    assert 1 < len(windows) <= server.TRIAGE_MAX_WINDOWS
+    assert all(not w.rstrip().endswith("Jane") for w in windows)  # signature stripped
+
+    resp = client.post("/analyze", json=build_preset_payload("saas_support", LONG_TICKET, 0.6))
+    assert resp.status_code == 200, resp.text
+    out = resp.json()
+    assert out["timings_ms"]["chunks"] == len(windows)
+    assert "batch_size" not in out["timings_ms"]
+    assert model.calls == [("batch_extract", len(windows))] * 4  # one batch per stage
+    assert out["severity"] == {"severity": "sev0"}  # the outage window outweighs the log windows
+    assert out["intent"] == {"intent": "incident"}
+    assert out["entities"]["entities"] == {"error_code": ["ERR_UPSTREAM_TIMEOUT"], "environment": ["prod"]}
+    assert out["ticket_fields"] == {"ticket_fields": [{"error_code": "ERR_UPSTREAM_TIMEOUT", "environment": "prod"}]}
+
+    batch = client.post("/analyze/batch", json={"tickets": [build_preset_payload("saas_support", LONG_TICKET, 0.6)] * 2}).json()
+    assert batch["batches"][0]["chunks"] == 2 * len(windows)
+    for result in batch["results"]:
+        assert {k: result[k] for k in ("severity", "intent", "entities", "ticket_fields")} == {
+            k: out[k] for k in ("severity", "intent", "entities", "ticket_fields")
+        }
+        assert result["timings_ms"]["chunks"] == len(windows)
+
+    events = [json.loads(line) for line in client.post("/analyze/stream", json=build_preset_payload("saas_support", LONG_TICKET, 0.6)).text.splitlines()]
+    by_event = {e["event"]: e["data"] for e in events}
+    assert by_event["severity"] == out["severity"] and by_event["entities"] == out["entities"]
+    assert by_event["done"]["timings_ms"]["chunks"] == len(windows)
+
+    fused = client.post("/analyze", json={**build_preset_payload("saas_support", LONG_TICKET, 0.6), "mode": "fused"}).json()
+    assert fused["severity"] == out["severity"] and fused["entities"] == out["entities"]
+    assert fused["ticket_fields"] == out["ticket_fields"]
+
+
+def test_short_ticket_unchanged(model):
+    client = TestClient(server.app)
+    out = client.post("/analyze", json=build_preset_payload("saas_support", REPLY, 0.6)).json()
+    assert out["timings_ms"]["chunks"] == 1
+    assert {method for method, _ in model.calls} == {"extract"}
+    assert all(text == BODY for text in model.seen)  # the model never saw the quoted thread or signature
+    assert out["severity"] == {"severity": "sev3"}
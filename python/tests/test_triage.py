@@ -10,11 +10,13 @@ from pathlib import Path
 
 import pytest
 
+import score_sweep
 from tests.payloads import build_analyze_payload
 
 # Shared results for metrics report (filled by tests, written in conftest pytest_sessionfinish)
 METRICS_RESULTS = {
-    "correctness": {},  # threshold -> { total, correct_next_queue, correct_priority, correct_both }
+    "routing": {},      # { total, correct_next_queue, correct_priority, correct_both } (threshold-independent)
+    "correctness": {},  # threshold -> { total, entity_spans, entity_spans_per_ticket }
     "stability": {},    # { passed: bool, runs_per_ticket: int, tickets_checked: int }
     "latency": [],      # list of timings_ms dicts per run
     "thresholds": [],
@@ -29,42 +31,78 @@ STABILITY_TICKET_INDEXES = [0, 5, 10, 20, 30]  # subset of golden tickets for st
 # client and golden_tickets fixtures come from conftest.py (conftest loads model before client)
 
 def test_correctness_per_threshold(client, golden_tickets):
-    """Routing accuracy: for each threshold, run all golden tickets and compare next_queue + priority."""
+    """Routing accuracy, and the entities kept at each threshold, from one pass: each ticket runs once with
+    rawScores at the lowest threshold, and score_sweep applies every threshold to the returned span scores.
+    Routing comes from severity + intent, which the entity threshold does not touch, so it is scored once."""
     METRICS_RESULTS["thresholds"] = THRESHOLDS
+    routing = {"next": 0, "priority": 0, "both": 0}
+    spans = {threshold: 0 for threshold in THRESHOLDS}
+    total = len(golden_tickets)
+    for item in golden_tickets:
+        payload = {**build_analyze_payload(item["preset"], item["text"], min(THRESHOLDS)), "rawScores": True}
+        resp = client.post("/analyze", json=payload)
+        assert resp.status_code == 200, resp.text
+        data = resp.json()
+        swept = score_sweep.sweep(data["entity_scores"], THRESHOLDS, floor=data["score_floor"])
+        assert swept[min(THRESHOLDS)] == data["entities"]
+        best = {label: {} for label in data["entity_scores"]}
+        for label, scored in data["entity_scores"].items():
+            for span in scored:
+                best[label][span["text"]] = max(span["confidence"], best[label].get(span["text"], 0.0))
+        previous = None
+        for threshold in sorted(THRESHOLDS):
+            kept = swept[threshold]["entities"]
+            # Every kept span scores at least the threshold, and raising the threshold only drops spans
+            assert all(best[label][text] >= threshold for label, texts in kept.items() for text in texts)
+            if previous is not None:
+                assert all(set(texts) <= set(previous[label]) for label, texts in kept.items())
+            spans[threshold] += sum(len(texts) for texts in kept.values())
+            previous = kept
+        expected = item["expected_routing"]
+        got = data.get("routing") or {}
+        queue_ok = got.get("next_queue") == expected.get("next_queue")
+        priority_ok = got.get("priority") == expected.get("priority")
+        routing["next"] += queue_ok
+        routing["priority"] += priority_ok
+        routing["both"] += queue_ok and priority_ok
+    METRICS_RESULTS["routing"] = {
+        "total": total,
+        "correct_next_queue": routing["next"],
+        "correct_priority": routing["priority"],
+        "correct_both": routing["both"],
+        "accuracy_next_queue_pct": round(100 * routing["next"] / total, 1),
+        "accuracy_priority_pct": round(100 * routing["priority"] / total, 1),
+        "accuracy_both_pct": round(100 * routing["both"] / total, 1),
+    }
     for threshold in THRESHOLDS:
-        correct_next = 0
-        correct_priority = 0
-        correct_both = 0
-        total = len(golden_tickets)
-        for item in golden_tickets:
-            payload = build_analyze_payload(
-                item["preset"], item["text"], threshold
-            )
-            resp = client.post("/analyze", json=payload)
-            assert resp.status_code == 200, resp.text
-            data = resp.json()
-            expected = item["expected_routing"]
-            got = data.get("routing") or {}
-            if got.get("next_queue") == expected.get("next_queue"):
-                correct_next += 1
-            if got.get("priority") == expected.get("priority"):
-                correct_priority += 1
-            if (
-                got.get("next_queue") == expected.get("next_queue")
-                and got.get("priority") == expected.get("priority")
-            ):
-                correct_both += 1
         METRICS_RESULTS["correctness"][str(threshold)] = {
             "total": total,
-            "correct_next_queue": correct_next,
-            "correct_priority": correct_priority,
-            "correct_both": correct_both,
-            "accuracy_next_queue_pct": round(100 * correct_next / total, 1),
-            "accuracy_priority_pct": round(100 * correct_priority / total, 1),
-            "accuracy_both_pct": round(100 * correct_both / total, 1),
+            "entity_spans": spans[threshold],
+            "entity_spans_per_ticket": round(spans[threshold] / total, 2),
         }
 
 
+def test_raw_scores_match_threshold_run(client, golden_tickets):
+    """Re-filtering raw scores reproduces a real run at that threshold (same routing, same entities)."""
+    for item in golden_tickets[::9]:
+        raw = client.post("/analyze", json={**build_analyze_payload(item["preset"], item["text"], 0.5), "rawScores": True}).json()
+        direct = client.post("/analyze", json=build_analyze_payload(item["preset"], item["text"], 0.7)).json()
+        assert raw["routing"] == direct["routing"]
+        assert score_sweep.filter_entities(raw["entity_scores"], 0.7) == direct["entities"]
+
+
+def test_long_ticket_routes_like_its_body(client, golden_tickets):
+    """A ticket buried under a pasted log, a signature and a quoted thread is split into windows and still routes like the ticket alone."""
+    log = "\n".join(f"2024-06-03T09:10:{i % 60:02d}Z worker-{i % 8} INFO job {i} retried after upstream timeout" for i in range(120))
+    for item in golden_tickets[::9]:
+        text = f"{item['text']}\n\n{log}\n\nThanks,\nJane\n\nOn Mon, Jun 3, 2024 at 9:14 AM Support <support@example.com> wrote:\n> Can you share logs?"
+        resp = client.post("/analyze", json=build_analyze_payload(item["preset"], text, 0.6))
+        assert resp.status_code == 200, resp.text
+        long_out = resp.json()
+        assert long_out["timings_ms"]["chunks"] > 1
+        assert long_out["routing"] == client.post("/analyze", json=build_analyze_payload(item["preset"], item["text"], 0.6)).json()["routing"]
+
+
 def test_stability(client, golden_tickets):
     """Same ticket run N times yields identical routing (determinism)."""
     threshold = 0.6
@@ -100,3 +138,99 @@ def test_latency(client, golden_tickets):
         data = resp.json()
         METRICS_RESULTS["latency"].append(data.get("timings_ms") or {})
     assert len(METRICS_RESULTS["latency"]) == len(golden_tickets)
+
+
+def test_batch_matches_single(client, golden_tickets):
+    """/analyze/batch returns results in request order with the same routing as /analyze."""
+    threshold = 0.6
+    tickets = [
+        build_analyze_payload(item["preset"], item["text"], threshold)
+        for item in golden_tickets
+    ]
+    resp = client.post("/analyze/batch", json={"tickets": tickets, "batchSize": 8})
+    assert resp.status_code == 200, resp.text
+    data = resp.json()
+    assert len(data["results"]) == len(tickets)
+    assert sum(b["size"] for b in data["batches"]) == len(tickets)
+    for payload, result in zip(tickets, data["results"]):
+        assert result["preset"] == payload["preset"]
+        single = client.post("/analyze", json=payload).json()
+        assert result["routing"] == single["routing"]
+
+
+def test_fused_matches_staged(client, golden_tickets):
+    """Fused single-pass mode keeps the response shape and agrees with staged routing."""
+    threshold = 0.6
+    agree = 0
+    for item in golden_tickets:
+        payload = build_analyze_payload(item["preset"], item["text"], threshold)
+        staged = client.post("/analyze", json=payload).json()
+        resp = client.post("/analyze", json={**payload, "mode": "fused"})
+        assert resp.status_code == 200, resp.text
+        fused = resp.json()
+        assert set(fused) == set(staged)
+        assert {"encode", "decode", "total"} <= set(fused["timings_ms"])
+        if fused["routing"] == staged["routing"]:
+            agree += 1
+    METRICS_RESULTS["fused_routing_agreement_pct"] = round(100 * agree / len(golden_tickets), 1)
+    assert agree >= 0.9 * len(golden_tickets)
+
+
+def test_cascade_matches_staged(client, golden_tickets):
+    """Cascade mode routes golden tickets like the full pipeline while rules decide some stages."""
+    agree, by_rules = 0, 0
+    for item in golden_tickets:
+        payload = build_analyze_payload(item["preset"], item["text"], 0.6)
+        staged = client.post("/analyze", json=payload).json()
+        resp = client.post("/analyze", json={**payload, "mode": "cascade"})
+        assert resp.status_code == 200, resp.text
+        cascade = resp.json()
+        agree += cascade["routing"] == staged["routing"]
+        by_rules += "rules" in cascade["decided_by"].values()
+    assert by_rules > 0
+    METRICS_RESULTS["cascade_routing_agreement_pct"] = round(100 * agree / len(golden_tickets), 1)
+    assert agree >= 0.9 * len(golden_tickets)
+
+
+def test_degraded_routing_matches_full(client, golden_tickets, monkeypatch):
+    """Tickets degraded by the admission ladder skip entities and extract_json but route like full runs."""
+    import server
+    from admission import Admission
+
+    full = [client.post("/analyze", json=build_analyze_payload(item["preset"], item["text"], 0.6)).json() for item in golden_tickets[::6]]
+    monkeypatch.setattr(server, "admission", Admission(degrade_at=(0, 0)))  # every ticket takes the bottom rung
+    for item, expected in zip(golden_tickets[::6], full):
+        resp = client.post("/analyze", json=build_analyze_payload(item["preset"], item["text"], 0.6))
+        assert resp.status_code == 200, resp.text
+        degraded = resp.json()
+        assert degraded["skipped_stages"] == ["entities", "extract_json"]
+        assert degraded["entities"] is None and degraded["ticket_fields"] is None
+        assert degraded["routing"] == expected["routing"]
+
+
+def test_preset_payload_matches_inline(client, golden_tickets):
+    """Slim preset + text payloads (server-side registry) give the same triage as inline schemas."""
+    from tests.payloads import build_preset_payload
+
+    for item in golden_tickets[::5]:
+        full = client.post("/analyze", json=build_analyze_payload(item["preset"], item["text"], 0.6)).json()
+        resp = client.post("/analyze", json=build_preset_payload(item["preset"], item["text"], 0.6))
+        assert resp.status_code == 200, resp.text
+        slim = resp.json()
+        assert slim["routing"] == full["routing"]
+        assert slim["entities"] == full["entities"]
+
+
+def test_stream_emits_routing_before_extract_json(client, golden_tickets):
+    """/analyze/stream sends each stage as an NDJSON event; routing arrives before ticket_fields."""
+    item = golden_tickets[0]
+    payload = build_analyze_payload(item["preset"], item["text"], 0.6)
+    resp = client.post("/analyze/stream", json=payload)
+    assert resp.status_code == 200
+    events = [json.loads(line) for line in resp.text.splitlines() if line.strip()]
+    names = [e["event"] for e in events]
+    assert names == ["severity", "intent", "routing", "entities", "ticket_fields", "done"]
+    by_name = {e["event"]: e for e in events}
+    assert by_name["routing"]["elapsed_ms"] < by_name["ticket_fields"]["elapsed_ms"]
+    single = client.post("/analyze", json=payload).json()
+    assert by_name["routing"]["data"] == single["routing"]
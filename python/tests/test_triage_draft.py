@@ -0,0 +1,101 @@
+"""
+/triage tests (no model, no API key: a stand-in extractor and the local OpenAI-compatible stub).
+Covers the draft starting at routing, before extract_json finishes; keeping it when the extracted
+fields add nothing (empty, or already in the ticket); restarting it (or keeping it with draftPolicy="keep") when they
+do; and the draftPriorities and missing-key cases.
+Run: pytest python/tests/test_triage_draft.py -v
+"""
+from __future__ import annotations
+
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from draft_llm import DraftLLM
+from tests.openai_stub import REPLY, OpenAIStub
+from tests.payloads import build_preset_payload
+
+TICKET = "We were billed twice for Invoice INV-19383. Can you refund the duplicate charge?"
+
+
+class _SlowFieldsExtractor:
+    """Billing triage; extract_json takes `fields_s` and returns `fields`."""
+
+    def __init__(self, fields, fields_s=0.0):
+        self.fields = fields
+        self.fields_s = fields_s
+
+    def extract(self, text, schema, threshold=0.5, **kw):
+        built = schema.build()
+        if built.get("entities"):
+            return {"entities": {label: [] for label in built["entities"]}}
+        if built.get("classifications"):
+            task = built["classifications"][0]["task"]
+            return {task: {"severity": "sev3", "intent": "refund_request"}[task]}
+        time.sleep(self.fields_s)
+        return {"ticket_fields": [self.fields]}
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    monkeypatch.setattr(server, "triage_cache", None)
+    monkeypatch.setitem(server._model_state, "status", "ready")
+    with OpenAIStub(delay_s=0.05) as s:
+        monkeypatch.setattr(server, "draft_llm", DraftLLM("sk-test", "stub-model", base_url=s.base_url))
+        yield s
+
+
+def _events(payload):
+    resp = TestClient(server.app).post("/triage", json=payload)
+    assert resp.status_code == 200, resp.text
+    return [json.loads(line) for line in resp.text.splitlines() if line]
+
+
+def test_draft_starts_at_routing_and_is_kept(stub, monkeypatch):
+    monkeypatch.setattr(server, "extractor", _SlowFieldsExtractor({"invoice_id": None, "plan": None}, fields_s=0.2))
+    events = _events(build_preset_payload("billing", TICKET, 0.6))
+    names = [e["event"] for e in events]
+    assert names == ["severity", "intent", "routing", "draft_started", "entities", "ticket_fields", "done", "draft"]
+    by_event = {e["event"]: e for e in events}
+    draft = by_event["draft"]["data"]
+    assert draft["draft"] == REPLY
+    # Empty fields add nothing, so the draft that ran alongside extract_json is used
+    assert draft["speculation"]["outcome"] == "kept" and stub.requests == 1
+    assert draft["speculation"]["started_ms"] < by_event["ticket_fields"]["elapsed_ms"]
+    assert by_event["routing"]["data"] == {"next_queue": "billing_ops", "priority": "P2"}
+
+
+def test_fields_already_in_the_ticket_keep_the_draft(stub, monkeypatch):
+    """Extracted spans of the ticket and repeated triage labels add nothing the early draft missed: no restart."""
+    fields = {"invoice_id": "INV-19383", "intent": "refund_request", "next_queue": "billing_ops", "amount": ""}
+    monkeypatch.setattr(server, "extractor", _SlowFieldsExtractor(fields, fields_s=0.1))
+    draft = _events(build_preset_payload("billing", TICKET, 0.6))[-1]["data"]
+    assert draft["speculation"]["outcome"] == "kept" and stub.requests == 1
+
+
+def test_changed_fields_restart_or_keep_the_draft(stub, monkeypatch):
+    monkeypatch.setattr(server, "extractor", _SlowFieldsExtractor({"invoice_id": "INV-19383", "plan": "Enterprise"}))
+    draft = _events(build_preset_payload("billing", TICKET, 0.6))[-1]["data"]
+    assert draft["speculation"]["outcome"] == "restarted"
+    # The restarted draft uses the /draft prompt: every extracted field, as extracted
+    assert 'Extracted fields: {"ticket_fields": [{"invoice_id": "INV-19383", "plan": "Enterprise"}]}' in stub.prompts[-1]
+    assert '"Enterprise"' not in stub.prompts[0]
+
+    stub.prompts.clear()
+    draft = _events({**build_preset_payload("billing", TICKET, 0.6), "draftPolicy": "keep"})[-1]["data"]
+    assert draft["speculation"]["outcome"] == "stale" and draft["draft"] == REPLY
+    assert len(stub.prompts) == 1 and "Extracted fields: {}" in stub.prompts[0]
+
+
+def test_draft_priorities_and_missing_key(stub, monkeypatch):
+    monkeypatch.setattr(server, "extractor", _SlowFieldsExtractor({}))
+    names = [e["event"] for e in _events({**build_preset_payload("billing", TICKET, 0.6), "draftPriorities": ["P0", "P1"]})]
+    assert names[-1] == "done" and stub.requests == 0
+
+    monkeypatch.setattr(server, "draft_llm", DraftLLM(None, "stub-model"))
+    events = _events(build_preset_payload("billing", TICKET, 0.6))
+    assert [e["event"] for e in events][-2:] == ["done", "draft_error"]
+    assert events[-1]["data"]["status"] == 503
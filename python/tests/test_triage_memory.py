@@ -0,0 +1,58 @@
+"""
+Similar-ticket memory tests (no model needed): per-queue ring buffer, top-k similarity, concurrent writes.
+Run: pytest python/tests/test_triage_memory.py -v
+"""
+from __future__ import annotations
+
+import threading
+
+from triage_memory import TriageMemory
+
+BILLING = {"next_queue": "billing_ops", "priority": "P2"}
+IDENTITY = {"next_queue": "identity_access", "priority": "P2"}
+
+
+def test_most_similar_ticket_in_same_queue():
+    memory = TriageMemory(per_queue=100)
+    memory.add("Refund request for invoice INV-2211, we were charged twice this month", BILLING)
+    memory.add("Please upgrade our plan to Enterprise from next billing cycle", BILLING)
+    memory.add("Okta SSO login fails with SAML assertion error for all users", IDENTITY)
+    hits = memory.similar("We were charged twice on invoice INV-9001, need a refund", "billing_ops", k=2)
+    assert [h[1]["ticket"][:6] for h in hits] == ["Refund", "Please"]
+    assert hits[0][0] > hits[1][0]
+    assert memory.similar("charged twice", "general_support") == []
+
+
+def test_same_text_is_skipped():
+    memory = TriageMemory()
+    memory.add("SSO broken after IdP certificate rotation", IDENTITY)
+    assert memory.snippet("SSO broken after IdP certificate rotation", "identity_access") is None
+    memory.add("Azure AD SSO broken since the certificate rotation", IDENTITY)
+    assert memory.snippet("SSO broken after IdP certificate rotation", "identity_access").startswith("Azure AD")
+
+
+def test_ring_buffer_evicts_oldest_per_queue():
+    memory = TriageMemory(per_queue=3)
+    for i in range(5):
+        memory.add(f"refund invoice number {i}", BILLING)
+    memory.add("sso login issue", IDENTITY)
+    assert len(memory) == 4
+    assert memory.stats()["queues"] == {"billing_ops": 3, "identity_access": 1}
+    tickets = {h[1]["ticket"] for h in memory.similar("refund invoice", "billing_ops", k=10)}
+    assert tickets == {"refund invoice number 2", "refund invoice number 3", "refund invoice number 4"}
+
+
+def test_concurrent_writes():
+    memory = TriageMemory(per_queue=10_000)
+
+    def write(worker: int) -> None:
+        for i in range(500):
+            memory.add(f"worker {worker} ticket {i} refund invoice", BILLING)
+
+    threads = [threading.Thread(target=write, args=(w,)) for w in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(memory) == 4000
+    assert len(memory.similar("worker 3 ticket 7 refund invoice", "billing_ops", k=5)) == 5
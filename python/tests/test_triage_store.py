@@ -0,0 +1,69 @@
+"""
+Triage store tests (no model needed): group-committed appends, warm start of the similar-ticket memory.
+Run: pytest python/tests/test_triage_store.py -v
+"""
+from __future__ import annotations
+
+import sqlite3
+
+import triage_store
+from triage_memory import TriageMemory
+from triage_store import TriageStore
+
+BILLING = {"next_queue": "billing_ops", "priority": "P2"}
+IDENTITY = {"next_queue": "identity_access", "priority": "P2"}
+
+
+def test_appends_are_group_committed(tmp_path):
+    store = TriageStore(tmp_path / "triage.sqlite3", flush_ms=20)
+    for i in range(500):
+        store.append(f"refund invoice {i}", BILLING, "sev3", "refund_request")
+    store.start()  # rows queued before start are kept and written in the first batches
+    store.stop()
+    stats = store.stats()
+    assert stats["written"] == 500 and stats["pending"] == 0 and stats["dropped"] == 0
+    assert stats["batches"] <= 500 // store.batch_max + 1
+
+
+def test_recent_is_bounded_per_queue_and_oldest_first(tmp_path):
+    store = TriageStore(tmp_path / "triage.sqlite3")
+    store.start()
+    for i in range(10):
+        store.append(f"refund invoice {i}", BILLING)
+    store.append("okta sso fails", IDENTITY, "sev2", "sso_issue")
+    store.stop()
+    rows = TriageStore(tmp_path / "triage.sqlite3").recent(per_queue=3)
+    assert [r["ticket"] for r in rows] == ["refund invoice 7", "refund invoice 8", "refund invoice 9", "okta sso fails"]
+    assert rows[-1] == {"ticket": "okta sso fails", "routing": IDENTITY, "severity": "sev2", "intent": "sso_issue"}
+
+
+def test_recent_lists_queues_without_scanning_the_history(tmp_path):
+    store = TriageStore(tmp_path / "triage.sqlite3")
+    store.start()
+    for i in range(2000):
+        store.append(f"refund invoice {i}", BILLING)
+    store.append("okta sso fails", IDENTITY)
+    store.append("unrouted ticket", {})
+    store.stop()
+    conn = sqlite3.connect(str(tmp_path / "triage.sqlite3"))
+    try:
+        plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + triage_store._QUEUES)]
+        assert sorted(q for (q,) in conn.execute(triage_store._QUEUES)) == ["", "billing_ops", "identity_access"]
+    finally:
+        conn.close()
+    assert not any(step.startswith("SCAN triage") for step in plan)
+    rows = TriageStore(tmp_path / "triage.sqlite3").recent(per_queue=1)
+    assert [r["ticket"] for r in rows] == ["refund invoice 1999", "okta sso fails", "unrouted ticket"]
+
+
+def test_memory_warm_start_after_restart(tmp_path):
+    store = TriageStore(tmp_path / "triage.sqlite3")
+    store.start()
+    store.append("Charged twice for invoice INV-2211, please refund", BILLING)
+    store.append("Okta SSO login fails with SAML error", IDENTITY)
+    store.stop()
+
+    memory = TriageMemory()
+    assert memory.extend(TriageStore(tmp_path / "triage.sqlite3").recent(per_queue=100)) == 2
+    assert memory.snippet("We were charged twice, need a refund", "billing_ops").startswith("Charged twice")
+    assert TriageStore(tmp_path / "missing.sqlite3").recent(per_queue=100) == []
@@ -0,0 +1,205 @@
+"""
+Long-ticket preprocessing: what the model reads of a ticket, and how split results come back together.
+
+Real tickets carry quoted email threads, signatures and pasted logs or stack traces. clean()
+drops the quoted history and the signature, so the model reads what the customer actually wrote.
+split_windows() cuts text longer than the encoder's useful context into overlapping word windows.
+The server runs every window of a ticket in one padded batch per stage, and the merge_* helpers
+fold the per-window results back into the shape a single extract() call returns:
+- entities are unioned;
+- structure fields take their first value in text order;
+- classification labels are scored by their most confident window.
+At most `max_windows` windows are kept, so model time stays bounded however long a ticket gets.
+"""
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, List
+
+# Gmail / Apple Mail reply header. The ">" block under it is dropped; text after the block (a bottom-posted
+# reply) is kept. With no ">" block under it, everything below is quoted history and is dropped.
+_WROTE_RE = re.compile(r"^[ \t]*On\b[^\n]{0,200}(?:\n[^\n]{0,200})?\bwrote:[ \t]*(?:\n|$)", re.M)
+_QUOTED_BLOCK_RE = re.compile(r"(?:[ \t]*(?:>[^\n]*)?\n)*(?:[ \t]*>[^\n]*$)?")
+# Start of the quoted thread in an Outlook reply; everything from the match down is dropped
+_REPLY_HEADER_RES = (
+    re.compile(r"^[ \t]*-{2,}[ \t]*Original Message[ \t]*-{2,}[ \t]*$", re.M | re.I),
+    re.compile(r"^[ \t]*From:[^\n]+\n[ \t]*(?:Sent|Date):", re.M),  # header block
+)
+# Signature starts: the RFC 3676 "-- " delimiter and mobile footers cut everything below them
+_SIGNATURE_RE = re.compile(r"^(?:-- ?|Sent from my [^\n]+|Get Outlook for [^\n]+)[ \t]*$", re.M)
+# A sign-off line counts only among the last lines, followed by a few short lines (name, title, phone)
+_SIGN_OFF_RE = re.compile(
+    r"^[ \t]*(?:thanks|thank you|many thanks|thx|best|best regards|kind regards|warm regards|regards|cheers|sincerely)[ \t]*[,.!]?[ \t]*$",
+    re.M | re.I,
+)
+_SIGN_OFF_MAX_LINES = 5
+_SIGN_OFF_MAX_LINE_CHARS = 80
+# Lines after a sign-off that are ticket content, not a signature: list items, prompts, code and log lines
+_NOT_SIGNATURE_RE = re.compile(r"^[ \t]*(?:[-*•]|\d+[.)]|[$#>]|at )|[{};=]|\d{1,2}:\d{2}:\d{2}|\b(?:error|exception|failed|fails)\b", re.I)
+_WORD_RE = re.compile(r"\S+")
+
+
+def _cut(text: str, match: Any) -> str:
+    return text[:match.start()] if match else text
+
+
+def _strip_wrote_blocks(text: str) -> str:
+    kept = []
+    pos = 0
+    while True:
+        header = _WROTE_RE.search(text, pos)
+        if header is None:
+            return "".join(kept) + text[pos:]
+        kept.append(text[pos:header.start()])
+        block = _QUOTED_BLOCK_RE.match(text, header.end())
+        if ">" not in block.group():
+            return "".join(kept)
+        pos = block.end()
+
+
+def strip_quoted(text: str) -> str:
+    """Drop quoted history: each "On … wrote:" header with the ">" block under it, and an Outlook thread.
+
+    ">" lines anywhere else (pasted shell sessions, log excerpts) are ticket content and are kept.
+    """
+    text = _strip_wrote_blocks(text)
+    for pattern in _REPLY_HEADER_RES:
+        text = _cut(text, pattern.search(text))
+    return text
+
+
+def strip_signature(text: str) -> str:
+    """Drop a trailing signature: below a "-- " delimiter or mobile footer, or a sign-off and the short lines after it.
+
+    Only the last sign-off counts, and only when at most `_SIGN_OFF_MAX_LINES` lines follow it and
+    none of them looks like ticket content (a list item, command or log line).
+    """
+    text = _cut(text, _SIGNATURE_RE.search(text))
+    matches = list(_SIGN_OFF_RE.finditer(text))
+    if not matches:
+        return text
+    tail = [line for line in text[matches[-1].end():].splitlines() if line.strip()]
+    if len(tail) > _SIGN_OFF_MAX_LINES:
+        return text
+    if any(len(line) > _SIGN_OFF_MAX_LINE_CHARS or _NOT_SIGNATURE_RE.search(line) for line in tail):
+        return text
+    return text[:matches[-1].start()]
+
+
+def clean(text: str) -> str:
+    """Ticket text without quoted replies and signature; the stripped original if nothing else is left."""
+    cleaned = strip_signature(strip_quoted(text)).strip()
+    return cleaned or text.strip()
+
+
+def split_windows(text: str, size: int = 200, overlap: int = 40, max_windows: int = 8) -> List[str]:
+    """Overlapping windows of at most `size` words (slices of `text`, so whitespace and offsets survive).
+
+    Text of `size` words or fewer comes back as [text]. Past `max_windows`, the opening windows and the
+    last one are kept: the problem statement sits at the top, and logs and stack traces end at the bottom.
+    """
+    if size <= 0 or not 0 <= overlap < size:
+        raise ValueError(f"need size > 0 and 0 <= overlap < size (got size={size}, overlap={overlap})")
+    if max_windows < 1:
+        raise ValueError(f"max_windows must be >= 1 (got {max_windows})")
+    words = [m.span() for m in _WORD_RE.finditer(text)]
+    if len(words) <= size:
+        return [text]
+    starts = [0]
+    while starts[-1] + size < len(words):
+        starts.append(starts[-1] + size - overlap)
+    if len(starts) > max_windows:
+        starts = starts[:max_windows - 1] + [starts[-1]] if max_windows > 1 else starts[:1]
+    return [text[words[s][0]:words[min(s + size, len(words)) - 1][1]] for s in starts]
+
+
+def _text(value: Any) -> Any:
+    """A span or field value without its confidence ({"text", "confidence"} -> text)."""
+    if isinstance(value, dict) and "text" in value:
+        return value["text"]
+    if isinstance(value, list):
+        return [_text(v) for v in value]
+    return value
+
+
+def _confidence(value: Any) -> float:
+    return float(value.get("confidence", 1.0)) if isinstance(value, dict) else 1.0
+
+
+def merge_entities(results: List[Any], keep_confidence: bool = False) -> Dict[str, Any]:
+    """Union of per-window {"entities": {label: [...]}} in text order, deduplicated case-insensitively.
+
+    A span found by several windows keeps its highest confidence. Without keep_confidence, spans come
+    back as plain text, as with an extract() call that did not ask for confidences.
+    """
+    merged: Dict[str, Dict[str, Any]] = {}
+    for result in results:
+        entities = result.get("entities", {}) if isinstance(result, dict) else {}
+        for label, spans in entities.items():
+            bucket = merged.setdefault(label, {})
+            for span in spans if isinstance(spans, list) else [spans] if spans else []:
+                text = _text(span)
+                if not isinstance(text, str) or not text:
+                    continue
+                key = text.casefold()
+                if key not in bucket or _confidence(span) > _confidence(bucket[key]):
+                    bucket[key] = span
+    return {"entities": {
+        label: [span if keep_confidence else _text(span) for span in bucket.values()]
+        for label, bucket in merged.items()
+    }}
+
+
+def merge_classification(results: List[Any]) -> Dict[str, Any]:
+    """{task: label} from per-window classification results (run with include_confidence=True).
+
+    Each label scores the confidence of its most confident window. A window that states the problem
+    therefore outweighs any number of log windows that only weakly suggest another label. Multi-label
+    tasks return every label found, best first. Labels without a confidence count as 1.0.
+    """
+    scores: Dict[str, Dict[str, float]] = {}
+    multi: Dict[str, bool] = {}
+    for result in results:
+        for task, value in (result or {}).items():
+            task_scores = scores.setdefault(task, {})
+            multi[task] = multi.get(task, False) or isinstance(value, list)
+            for item in value if isinstance(value, list) else [value]:
+                label = item.get("label") if isinstance(item, dict) else item
+                if label is None:
+                    continue
+                task_scores[str(label)] = max(task_scores.get(str(label), 0.0), _confidence(item))
+    merged: Dict[str, Any] = {}
+    for task, task_scores in scores.items():
+        ranked = sorted(task_scores, key=lambda label: -task_scores[label])  # stable: ties go to the earlier window
+        merged[task] = ranked if multi[task] else (ranked[0] if ranked else None)
+    return merged
+
+
+def merge_structures(results: List[Any]) -> Dict[str, List[Dict[str, Any]]]:
+    """One instance per extract_json structure from per-window results.
+
+    Each field takes its first non-empty value in text order, and list fields collect their unique
+    values across windows.
+    """
+    merged: Dict[str, Dict[str, Any]] = {}
+    seen: Dict[str, bool] = {}
+    for result in results:
+        for parent, instances in (result or {}).items():
+            fields = merged.setdefault(parent, {})
+            seen.setdefault(parent, False)
+            for instance in instances if isinstance(instances, list) else [instances]:
+                if not isinstance(instance, dict):
+                    continue
+                seen[parent] = True
+                for name, value in instance.items():
+                    value = _text(value)
+                    if isinstance(value, list):
+                        current = fields.get(name)
+                        if not isinstance(current, list):
+                            current = fields[name] = []
+                        for v in value:
+                            if v not in current:
+                                current.append(v)
+                    elif fields.get(name) in (None, ""):
+                        fields[name] = value
+    return {parent: [fields] if seen[parent] else [] for parent, fields in merged.items()}
@@ -0,0 +1,172 @@
+"""
+Bounded, indexed similar-ticket memory for the draft step.
+
+Each routing queue keeps a ring buffer of its last `per_queue` triaged tickets
+and a NumPy matrix of their hashed TF-IDF vectors, stored bucket-major
+(dim x capacity) so one hashed feature is one contiguous row. A lookup scores
+every ticket in the queue on the query's `probe` strongest features, then
+re-ranks the best candidates by exact cosine; it reads a few MB instead of
+the whole matrix and stays sub-millisecond at 100k+ entries spread over the
+queues. Writes overwrite the oldest slot in place. One lock guards writes and
+lookups.
+"""
+from __future__ import annotations
+
+import re
+import threading
+import zlib
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+_TOKEN_RE = re.compile(r"[a-z0-9_]+")
+
+
+@lru_cache(maxsize=1 << 16)
+def _hash(token: str) -> int:
+    return zlib.crc32(token.encode("utf-8"))
+
+
+def _tokens(text: str) -> List[str]:
+    """Lowercased word unigrams plus bigrams (bigrams keep "error code" apart from "code error")."""
+    words = _TOKEN_RE.findall(text.lower())
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+class _QueueRing:
+    """Fixed-capacity ring of one queue's tickets; columns grow by doubling up to capacity."""
+
+    def __init__(self, capacity: int, dim: int) -> None:
+        self.capacity = capacity
+        self.vectors = np.zeros((dim, min(capacity, 64)), dtype=np.float32)
+        self.fingerprints = np.zeros(self.vectors.shape[1], dtype=np.int64)
+        self.records: List[Optional[Dict[str, Any]]] = [None] * self.vectors.shape[1]
+        self.size = 0
+        self.next = 0
+
+    def _grow(self) -> None:
+        cols = min(self.capacity, self.vectors.shape[1] * 2)
+        vectors = np.zeros((self.vectors.shape[0], cols), dtype=np.float32)
+        vectors[:, :self.size] = self.vectors[:, :self.size]
+        self.vectors = vectors
+        self.fingerprints = np.resize(self.fingerprints, cols)
+        self.records.extend([None] * (cols - len(self.records)))
+
+    def put(self, vector: np.ndarray, fingerprint: int, record: Dict[str, Any]) -> Optional[np.ndarray]:
+        """Store in the next slot; returns the evicted vector (for document-frequency upkeep) if full."""
+        if self.size == self.vectors.shape[1] and self.size < self.capacity:
+            self._grow()
+        slot = self.next
+        evicted = self.vectors[:, slot].copy() if self.size == self.capacity else None
+        self.vectors[:, slot] = vector
+        self.fingerprints[slot] = fingerprint
+        self.records[slot] = record
+        self.next = (slot + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        return evicted
+
+    def top(self, query: np.ndarray, probe: np.ndarray, fingerprint: int, k: int) -> List[Tuple[float, int]]:
+        """Coarse score on the probe features, exact cosine re-rank of the best candidates."""
+        vectors = self.vectors[:, :self.size]
+        coarse = query[probe] @ vectors[probe]
+        coarse[self.fingerprints[:self.size] == fingerprint] = -np.inf
+        n = min(self.size, max(4 * k, 32))
+        candidates = np.argpartition(-coarse, n - 1)[:n] if n < self.size else np.arange(self.size)
+        candidates = candidates[coarse[candidates] != -np.inf]
+        exact = query @ vectors[:, candidates]
+        order = np.argsort(-exact)[:k]
+        return [(float(exact[i]), int(candidates[i])) for i in order]
+
+
+class TriageMemory:
+    def __init__(self, per_queue: int = 10_000, dim: int = 256, probe: int = 16, snippet_chars: int = 500) -> None:
+        self.per_queue = per_queue
+        self.dim = dim
+        self.probe = probe
+        self.snippet_chars = snippet_chars
+        self._queues: Dict[str, _QueueRing] = {}
+        self._df = np.zeros(dim, dtype=np.float32)  # documents per hashed bucket, over live entries
+        self._docs = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._docs
+
+    def _term_vector(self, text: str) -> np.ndarray:
+        """Signed feature hashing with sublinear tf (1 + log tf)."""
+        vec = np.zeros(self.dim, dtype=np.float32)
+        hashes = np.fromiter(map(_hash, _tokens(text)), dtype=np.int64)
+        np.add.at(vec, hashes % self.dim, np.where(hashes >> 31, 1.0, -1.0).astype(np.float32))
+        nz = vec != 0
+        vec[nz] = np.sign(vec[nz]) * (1.0 + np.log(np.abs(vec[nz])))
+        return vec
+
+    def _weigh(self, tf: np.ndarray) -> np.ndarray:
+        idf = np.log((1.0 + self._docs) / (1.0 + self._df)) + 1.0
+        vec = tf * idf
+        norm = float(np.linalg.norm(vec))
+        return vec / norm if norm else vec
+
+    @staticmethod
+    def _fingerprint(text: str) -> int:
+        return zlib.crc32(text.strip()[:200].encode("utf-8"))
+
+    def add(self, text: str, routing: Dict[str, Any], severity: str = "", intent: str = "") -> None:
+        """Record one triaged ticket under its routing queue."""
+        queue = (routing or {}).get("next_queue") or ""
+        record = {"ticket": text, "routing": routing, "intent": intent, "severity": severity}
+        tf = self._term_vector(text)
+        with self._lock:
+            ring = self._queues.get(queue)
+            if ring is None:
+                ring = self._queues[queue] = _QueueRing(self.per_queue, self.dim)
+            self._df += tf != 0
+            self._docs += 1
+            evicted = ring.put(self._weigh(tf), self._fingerprint(text), record)
+            if evicted is not None:
+                self._df -= evicted != 0
+                self._docs -= 1
+
+    def extend(self, entries: Iterable[Dict[str, Any]]) -> int:
+        """Bulk add() of {"ticket", "routing", "severity", "intent"} records, oldest first."""
+        n = 0
+        for entry in entries:
+            self.add(entry["ticket"], entry.get("routing") or {}, entry.get("severity", ""), entry.get("intent", ""))
+            n += 1
+        return n
+
+    def similar(self, text: str, queue: Optional[str] = None, k: int = 1) -> List[Tuple[float, Dict[str, Any]]]:
+        """Top-k (cosine score, record) in `queue` (all queues if None), skipping tickets with the same text."""
+        fingerprint = self._fingerprint(text)
+        tf = self._term_vector(text)
+        hits: List[Tuple[float, Dict[str, Any]]] = []
+        with self._lock:
+            query = self._weigh(tf)
+            if queue is None:
+                rings = list(self._queues.values())
+            else:
+                rings = [self._queues[queue]] if queue in self._queues else []
+            probe = np.argpartition(-np.abs(query), self.probe - 1)[:self.probe] if self.probe < self.dim else np.arange(self.dim)
+            for ring in rings:
+                if ring.size:
+                    hits.extend((score, ring.records[slot]) for score, slot in ring.top(query, probe, fingerprint, k))
+        hits.sort(key=lambda hit: hit[0], reverse=True)
+        return hits[:k]
+
+    def snippet(self, text: str, queue: Optional[str]) -> Optional[str]:
+        """Most similar past ticket in the queue, truncated for the draft prompt."""
+        for _, record in self.similar(text, queue, k=1):
+            snippet = (record.get("ticket") or "")[:self.snippet_chars]
+            if snippet:
+                return snippet
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": self._docs,
+                "per_queue_max": self.per_queue,
+                "dim": self.dim,
+                "queues": {queue: ring.size for queue, ring in self._queues.items()},
+            }
@@ -0,0 +1,180 @@
+"""
+Durable, append-only triage history (SQLite in WAL mode).
+
+append() only enqueues; a background writer thread group-commits whatever has
+queued up (up to `batch_max` rows, or after `flush_ms`) in one transaction, so
+persisting never sits on the /analyze latency path. On restart, recent() reads
+back the newest rows per queue so the similar-ticket memory starts warm.
+Rows are never updated or deleted.
+"""
+from __future__ import annotations
+
+import json
+import queue
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS triage (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    queue TEXT NOT NULL,
+    priority TEXT,
+    severity TEXT,
+    intent TEXT,
+    ticket TEXT NOT NULL,
+    routing TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS triage_queue_id ON triage (queue, id);
+"""
+
+# Distinct queues as a skip-scan over triage_queue_id: one index seek per queue, not a scan of every row
+_QUEUES = """
+WITH RECURSIVE queues(q) AS (
+    SELECT MIN(queue) FROM triage
+    UNION ALL
+    SELECT (SELECT MIN(queue) FROM triage WHERE queue > q) FROM queues WHERE q IS NOT NULL
+)
+SELECT q FROM queues WHERE q IS NOT NULL
+"""
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(str(path), timeout=30.0, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # WAL + NORMAL: a commit is durable against process crashes; an OS crash can drop only the last batches
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+class TriageStore:
+    def __init__(self, path: Path, batch_max: int = 256, flush_ms: float = 50.0, max_pending: int = 100_000) -> None:
+        self.path = Path(path)
+        self.batch_max = batch_max
+        self.flush_ms = flush_ms
+        self.max_pending = max_pending
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self.last_error: Optional[str] = None
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        _connect(self.path).close()  # create the schema before anyone reads
+        self._thread = threading.Thread(target=self._loop, name="triage-store", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Flush everything queued so far, then stop the writer."""
+        if not self.running:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def append(self, ticket: str, routing: Dict[str, Any], severity: str = "", intent: str = "") -> None:
+        """Queue one triage row; drops (and counts) it if the writer is this far behind."""
+        if self._queue.qsize() >= self.max_pending:
+            self.dropped += 1
+            return
+        self._queue.put({"ts": time.time(), "ticket": ticket, "routing": routing, "severity": severity, "intent": intent})
+
+    def _collect(self, first: Dict[str, Any]) -> tuple[List[Dict[str, Any]], bool]:
+        rows = [first]
+        deadline = time.perf_counter() + self.flush_ms / 1000.0
+        while len(rows) < self.batch_max:
+            remaining = deadline - time.perf_counter()
+            try:
+                row = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if row is None:
+                return rows, True
+            rows.append(row)
+        return rows, False
+
+    def _loop(self) -> None:
+        conn = _connect(self.path)
+        try:
+            while True:
+                first = self._queue.get()
+                if first is None:
+                    return
+                rows, stop = self._collect(first)
+                self._write(conn, rows)
+                if stop:
+                    return
+        finally:
+            conn.close()
+
+    def _write(self, conn: sqlite3.Connection, rows: List[Dict[str, Any]]) -> None:
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT INTO triage (ts, queue, priority, severity, intent, ticket, routing) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            r["ts"],
+                            (r["routing"] or {}).get("next_queue") or "",
+                            (r["routing"] or {}).get("priority"),
+                            r["severity"],
+                            r["intent"],
+                            r["ticket"],
+                            json.dumps(r["routing"] or {}),
+                        )
+                        for r in rows
+                    ],
+                )
+        except sqlite3.Error as exc:
+            self.dropped += len(rows)
+            self.last_error = f"{type(exc).__name__}: {exc}"
+            return
+        self.written += len(rows)
+        self.batches += 1
+
+    def recent(self, per_queue: int) -> List[Dict[str, Any]]:
+        """Newest `per_queue` rows of every queue, oldest first (memory.add() order).
+
+        Listing the queues and reading each one are (queue, id) index seeks, so warm
+        start reads at most per_queue rows per queue however long the history is.
+        """
+        if not self.path.exists():
+            return []
+        conn = _connect(self.path)
+        try:
+            queues = [q for (q,) in conn.execute(_QUEUES)]
+            rows = []
+            for q in queues:
+                rows.extend(conn.execute(
+                    "SELECT id, ticket, routing, severity, intent FROM triage WHERE queue = ? ORDER BY id DESC LIMIT ?",
+                    (q, per_queue),
+                ))
+        finally:
+            conn.close()
+        rows.sort(key=lambda row: row[0])
+        return [
+            {"ticket": ticket, "routing": json.loads(routing), "severity": severity or "", "intent": intent or ""}
+            for _, ticket, routing, severity, intent in rows
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": str(self.path),
+            "written": self.written,
+            "batches": self.batches,
+            "pending": self._queue.qsize(),
+            "dropped": self.dropped,
+            "last_error": self.last_error,
+        }